@@ -0,0 +1,216 @@
+# File: backend/hybrid-detection/autotune.py
+# Fungsi: Mencari kombinasi thread torch/OpenCV, jumlah worker dan CPU affinity terbaik untuk mesin ini
+#         dengan pipeline asli (YOLO + OpenCV), lalu menulis hasilnya ke Settings.TUNING_FILE
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Tambahkan src directory ke Python path
+current_dir = Path(__file__).parent
+src_dir = current_dir / "src"
+sys.path.insert(0, str(src_dir))
+
+from config.settings import settings
+from benchmarking.synthetic import make_bottle_image, parse_resolution
+from inference.cpu_budget import available_cores, physical_cores
+
+
+def run_trial(config: dict, width: int, height: int, samples: int, duration: float, warmup: int) -> dict:
+    """
+    Satu percobaan di proses baru (spawn): budget thread diterapkan sebelum torch/model dimuat,
+    lalu `workers` thread memproses frame sintetis bersamaan seperti executor server
+    Returns:
+        Dict p50/p99 (ms) dan throughput frame per detik, atau {'error': ...}
+    """
+    from api import pipeline
+    from inference.cpu_budget import apply_thread_budget
+
+    applied = apply_thread_budget(
+        torch_threads=config['torch_threads'],
+        opencv_threads=config['opencv_threads'],
+        affinity=config['affinity'],
+    )
+    try:
+        pipeline.init_components()
+    except Exception as e:
+        return {'error': str(e)}
+    pipeline.warmup(warmup)
+
+    specs = list(settings.KNOWN_BOTTLE_SPECS.values())
+    images = [make_bottle_image(width, height, specs[i % len(specs)], seed=i)[0] for i in range(samples)]
+
+    latencies, lock = [], threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            pipeline.analyze_frame(images[i % len(images)], overlay='none')
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+            i += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(config['workers'])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        return {'error': 'No frames processed'}
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'throughput_per_s': round(len(latencies) / elapsed, 2),
+        'frames': len(latencies),
+        'applied': applied,
+    }
+
+
+def build_configs(torch_threads: list, opencv_threads: list, workers: list, affinities: list,
+                  max_oversubscription: float) -> list:
+    """
+    Semua kombinasi kandidat, tanpa kombinasi yang jelas oversubscribed
+    (workers x torch_threads jauh di atas jumlah core pada affinity tersebut)
+    """
+    core_sets = {'all': available_cores(), 'physical': physical_cores()}
+    configs = []
+    for torch_count, opencv_count, worker_count, affinity in itertools.product(
+            torch_threads, opencv_threads, workers, affinities):
+        cores = core_sets[affinity]
+        if worker_count * max(1, torch_count) > max_oversubscription * len(cores):
+            continue
+        configs.append({
+            'torch_threads': torch_count,
+            'opencv_threads': opencv_count,
+            'workers': worker_count,
+            'affinity_name': affinity,
+            # 'all' = tidak dipin (sama dengan default server)
+            'affinity': cores if affinity != 'all' else None,
+        })
+    return configs
+
+
+def pick_best(results: list, min_throughput_ratio: float) -> dict:
+    """p99 terendah di antara konfigurasi dengan throughput >= rasio x throughput terbaik"""
+    valid = [r for r in results if 'error' not in r['result']]
+    if not valid:
+        return None
+    best_throughput = max(r['result']['throughput_per_s'] for r in valid)
+    eligible = [r for r in valid if r['result']['throughput_per_s'] >= min_throughput_ratio * best_throughput]
+    return min(eligible, key=lambda r: (r['result']['p99_ms'], -r['result']['throughput_per_s']))
+
+
+def tuned_settings(config: dict) -> dict:
+    """Nilai Settings dari konfigurasi terpilih"""
+    values = {
+        'TORCH_NUM_THREADS': config['torch_threads'],
+        'OPENCV_NUM_THREADS': config['opencv_threads'],
+        'EXECUTOR_MAX_WORKERS': config['workers'],
+        'EXECUTOR_MAX_CONCURRENCY': config['workers'],
+        'CPU_AFFINITY': config['affinity'],
+    }
+    if settings.YOLO_BACKEND == 'onnxruntime':
+        values['ONNX_INTRA_OP_THREADS'] = config['torch_threads']
+    return values
+
+
+def main():
+    cpu_count = len(available_cores())
+    parser = argparse.ArgumentParser(description='CPU thread budget autotuner for the detection pipeline')
+    parser.add_argument('--torch-threads', nargs='+', type=int,
+                        default=sorted({1, 2, max(1, cpu_count // 2), cpu_count}),
+                        help='Kandidat torch.set_num_threads')
+    parser.add_argument('--opencv-threads', nargs='+', type=int, default=[0, 1, -1],
+                        help='Kandidat cv2.setNumThreads (-1 = default OpenCV)')
+    parser.add_argument('--workers', nargs='+', type=int,
+                        default=sorted({1, 2, max(1, cpu_count // 2), cpu_count}),
+                        help='Kandidat jumlah request paralel (EXECUTOR_MAX_WORKERS / MAX_CONCURRENCY)')
+    parser.add_argument('--affinity', nargs='+', choices=('all', 'physical'), default=['all', 'physical'],
+                        help='Core yang dipakai: semua logical CPU atau satu per core fisik')
+    parser.add_argument('--resolution', default='1280x720', help='Resolusi frame sintetis (WxH)')
+    parser.add_argument('--samples', type=int, default=16, help='Jumlah gambar sintetis berbeda')
+    parser.add_argument('--duration', type=float, default=10.0, help='Durasi pengukuran per konfigurasi (detik)')
+    parser.add_argument('--warmup', type=int, default=3, help='Iterasi warmup model per konfigurasi')
+    parser.add_argument('--max-oversubscription', type=float, default=2.0,
+                        help='Batas workers x torch_threads relatif terhadap jumlah core')
+    parser.add_argument('--min-throughput-ratio', type=float, default=0.9,
+                        help='Throughput minimum relatif terhadap yang terbaik saat memilih p99 terendah')
+    parser.add_argument('--output', default=str(settings.TUNING_FILE or current_dir / 'tuning.json'),
+                        help='File hasil (dibaca Settings saat startup)')
+    parser.add_argument('--dry-run', action='store_true', help='Tampilkan hasil tanpa menulis file')
+    args = parser.parse_args()
+
+    width, height = parse_resolution(args.resolution)
+    configs = build_configs(args.torch_threads, args.opencv_threads, args.workers, args.affinity,
+                            args.max_oversubscription)
+    if not configs:
+        raise SystemExit('No candidate configurations left after oversubscription pruning')
+    print(f'Autotuning {len(configs)} configurations at {width}x{height}, {args.duration:.0f}s each '
+          f'({cpu_count} cores, {len(physical_cores())} physical)')
+
+    results = []
+    # Proses baru per konfigurasi: jumlah thread torch/OpenMP hanya bisa diatur sebelum pool-nya dibuat
+    context = mp.get_context('spawn')
+    for i, config in enumerate(configs, 1):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_trial, config, width, height, args.samples,
+                                     args.duration, args.warmup).result()
+        results.append({'config': config, 'result': result})
+
+        label = (f'torch={config["torch_threads"]:<3} opencv={config["opencv_threads"]:<3} '
+                 f'workers={config["workers"]:<3} affinity={config["affinity_name"]:<9}')
+        if 'error' in result:
+            print(f'[{i}/{len(configs)}] {label} error: {result["error"]}')
+            if 'could not be loaded' in result['error']:
+                raise SystemExit(f'Model not available: {result["error"]}')
+            continue
+        print(f'[{i}/{len(configs)}] {label} p50={result["p50_ms"]:>8}ms p99={result["p99_ms"]:>8}ms '
+              f'{result["throughput_per_s"]:>7}/s')
+
+    best = pick_best(results, args.min_throughput_ratio)
+    if best is None:
+        raise SystemExit('All configurations failed')
+
+    values = tuned_settings(best['config'])
+    print(f'\nBest: {values} (p99 {best["result"]["p99_ms"]}ms, {best["result"]["throughput_per_s"]}/s)')
+    if args.dry_run:
+        return
+
+    report = {
+        'settings': values,
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'available_cores': cpu_count,
+            'physical_cores': len(physical_cores()),
+            'backend': settings.YOLO_BACKEND,
+            'resolution': f'{width}x{height}',
+            'duration_s': args.duration,
+        },
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f'Tuning written to {args.output} (applied at next server start)')
+
+
+if __name__ == '__main__':
+    main()
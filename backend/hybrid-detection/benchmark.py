@@ -0,0 +1,326 @@
+# File: backend/hybrid-detection/benchmark.py
+# Fungsi: Benchmark throughput/latency + akurasi pipeline dengan gambar botol sintetis dan cek regresi vs baseline JSON
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Tambahkan src directory ke Python path
+current_dir = Path(__file__).parent
+src_dir = current_dir / "src"
+sys.path.insert(0, str(src_dir))
+
+from config.settings import settings
+from api import pipeline
+from benchmarking.synthetic import DEFAULT_RESOLUTIONS, make_bottle_image, padded_bbox, parse_resolution
+from image_processing.batch_measurements import measure_batch
+from image_processing.catalog import CatalogStore
+from image_processing.size_calculator import OpenCVSizeCalculator
+
+CASES = ('decode', 'detect', 'contour', 'measure', 'measure_batch', 'encode', 'end_to_end')
+
+# Arah metric untuk cek regresi: 'lower' = makin kecil makin baik
+METRIC_DIRECTIONS = {
+    'p50_ms': 'lower',
+    'p99_ms': 'lower',
+    'throughput_per_s': 'higher',
+    'height_error_pct': 'lower',
+    'diameter_error_pct': 'lower',
+    'success_rate': 'higher',
+    'detection_rate': 'higher',
+}
+ACCURACY_METRICS = ('height_error_pct', 'diameter_error_pct')
+RATE_METRICS = ('success_rate', 'detection_rate')
+
+
+def box_iou(a, b) -> float:
+    """IoU dua bbox [x1, y1, x2, y2]"""
+    inter_w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    inter_h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def time_calls(fn, inputs: list, warmup: int) -> dict:
+    """
+    Jalankan fn untuk setiap input dan hitung latency
+    Returns:
+        Dict p50/p99 (ms), throughput serial dan list hasil
+    """
+    for item in inputs[:warmup]:
+        fn(item)
+
+    latencies, outputs = [], []
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'throughput_per_s': round(len(inputs) / elapsed, 2) if elapsed > 0 else 0.0,
+        'outputs': outputs,
+    }
+
+
+def build_samples(width: int, height: int, iterations: int) -> list:
+    """Gambar sintetis bergantian untuk semua spesifikasi botol (seed berbeda per iterasi)"""
+    specs = list(settings.KNOWN_BOTTLE_SPECS.items())
+    samples = []
+    for i in range(iterations):
+        name, spec = specs[i % len(specs)]
+        image, ground_truth = make_bottle_image(width, height, spec, seed=i)
+        samples.append({'spec': name, 'image': image, 'ground_truth': ground_truth})
+    return samples
+
+
+def contour_accuracy(samples: list, contours: list) -> dict:
+    """Error tinggi/diameter bbox kontur terhadap ground truth (persen) dan tingkat keberhasilan"""
+    height_errors, diameter_errors = [], []
+    for sample, bottle_data in zip(samples, contours):
+        if not bottle_data:
+            continue
+        _, _, w, h = bottle_data['bbox']
+        truth = sample['ground_truth']
+        height_errors.append(abs(h - truth['height_pixels']) / truth['height_pixels'] * 100)
+        diameter_errors.append(abs(w - truth['diameter_pixels']) / truth['diameter_pixels'] * 100)
+
+    return {
+        'success_rate': round(len(height_errors) / len(samples), 4) if samples else 0.0,
+        'height_error_pct': round(float(np.mean(height_errors)), 3) if height_errors else None,
+        'diameter_error_pct': round(float(np.mean(diameter_errors)), 3) if diameter_errors else None,
+    }
+
+
+def run_resolution(width: int, height: int, cases: set, iterations: int, warmup: int,
+                   calculator: OpenCVSizeCalculator) -> dict:
+    """Jalankan semua case (kecuali end_to_end) untuk satu resolusi"""
+    samples = build_samples(width, height, iterations)
+    images = [sample['image'] for sample in samples]
+    results = {}
+
+    if 'decode' in cases:
+        payloads = [pipeline.encode_image_to_base64(image) for image in images]
+        timed = time_calls(pipeline.decode_base64_image, payloads, warmup)
+        results['decode'] = {k: v for k, v in timed.items() if k != 'outputs'}
+
+    if 'encode' in cases:
+        timed = time_calls(pipeline.encode_image_to_base64, images, warmup)
+        results['encode'] = {k: v for k, v in timed.items() if k != 'outputs'}
+
+    if 'detect' in cases:
+        if pipeline.yolo_detector is None or pipeline.yolo_detector.model is None:
+            results['detect'] = {'skipped': 'YOLO model not available'}
+        else:
+            timed = time_calls(pipeline.yolo_detector.detect_bottles, images, warmup)
+            detected = sum(
+                1 for sample, detections in zip(samples, timed['outputs'])
+                if any(box_iou(d['bbox'], sample['ground_truth']['bbox']) >= 0.5 for d in detections)
+            )
+            results['detect'] = {k: v for k, v in timed.items() if k != 'outputs'}
+            results['detect']['detection_rate'] = round(detected / len(samples), 4)
+
+    contours = None
+    if cases & {'contour', 'measure', 'measure_batch'}:
+        # Bbox ground truth yang sedikit diperlebar menggantikan bbox YOLO agar hasil deterministik
+        bboxes = [padded_bbox(sample['ground_truth']['bbox'], sample['image'].shape) for sample in samples]
+        timed = time_calls(lambda i: calculator.extract_bottle_contour(images[i], bboxes[i]),
+                           list(range(len(samples))), warmup)
+        contours = timed['outputs']
+        if 'contour' in cases:
+            results['contour'] = {k: v for k, v in timed.items() if k != 'outputs'}
+            results['contour'].update(contour_accuracy(samples, contours))
+
+    extracted = [bottle_data for bottle_data in (contours or []) if bottle_data]
+    catalog = CatalogStore(settings.BOTTLE_CATALOG_PATH, settings.KNOWN_BOTTLE_SPECS).get()
+
+    if 'measure' in cases and extracted:
+        def measure_one(bottle_data):
+            dimensions = calculator.calculate_bottle_dimensions(bottle_data)
+            real_dimensions = calculator.estimate_real_dimensions_from_context(dimensions)
+            return calculator.classify_bottle(real_dimensions, catalog,
+                                              settings.CLASSIFICATION_TOLERANCE_PERCENT)
+
+        timed = time_calls(measure_one, extracted, warmup)
+        results['measure'] = {k: v for k, v in timed.items() if k != 'outputs'}
+
+    if 'measure_batch' in cases and extracted:
+        # Satu panggilan mengukur semua kontur; throughput dihitung per kontur
+        batch = [bottle_data['measurements'] for bottle_data in extracted]
+        timed = time_calls(lambda items: measure_batch(items, catalog,
+                                                       settings.CLASSIFICATION_TOLERANCE_PERCENT),
+                           [batch] * max(1, iterations // 4), warmup)
+        results['measure_batch'] = {k: v for k, v in timed.items() if k != 'outputs'}
+        results['measure_batch']['throughput_per_s'] = round(timed['throughput_per_s'] * len(batch), 2)
+
+    return results
+
+
+def run_end_to_end(url: str, width: int, height: int, requests_count: int, concurrency: int) -> dict:
+    """POST / dengan beberapa client paralel ke server yang sedang berjalan"""
+    samples = build_samples(width, height, min(requests_count, len(settings.KNOWN_BOTTLE_SPECS)))
+    bodies = [
+        json.dumps({'image': pipeline.encode_image_to_base64(sample['image']), 'overlay': 'none'}).encode('utf-8')
+        for sample in samples
+    ]
+
+    def post(i: int):
+        request = urllib.request.Request(url, data=bodies[i % len(bodies)],
+                                         headers={'Content-Type': 'application/json'})
+        started = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=60) as response:
+            payload = json.loads(response.read())
+        return (time.perf_counter() - started) * 1000, 'error' not in payload
+
+    try:
+        post(0)
+    except OSError as e:
+        return {'skipped': f'Server not reachable at {url}: {e}'}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(post, range(requests_count)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in outcomes]
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'throughput_per_s': round(requests_count / elapsed, 2) if elapsed > 0 else 0.0,
+        'success_rate': round(sum(ok for _, ok in outcomes) / len(outcomes), 4),
+        'concurrency': concurrency,
+    }
+
+
+def find_regressions(results: dict, baseline: dict, latency_tolerance: float, accuracy_tolerance: float,
+                     min_latency_delta_ms: float) -> list:
+    """Bandingkan hasil dengan baseline; kembalikan daftar pesan regresi"""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if not reference or 'skipped' in current or 'skipped' in reference:
+            continue
+
+        for metric, direction in METRIC_DIRECTIONS.items():
+            now, before = current.get(metric), reference.get(metric)
+            if now is None or before is None:
+                continue
+
+            if metric in ACCURACY_METRICS:
+                regressed = now > before + accuracy_tolerance
+            elif metric in RATE_METRICS:
+                regressed = now < before - accuracy_tolerance / 100
+            elif direction == 'lower':
+                # Abaikan selisih kecil di bawah noise timer
+                regressed = now > before * (1 + latency_tolerance) and now - before > min_latency_delta_ms
+            else:
+                regressed = now < before * (1 - latency_tolerance)
+
+            if regressed:
+                regressions.append(f'{key} {metric}: {before} -> {now}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline benchmark with synthetic bottle images')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES), help='Case yang dijalankan')
+    parser.add_argument('--resolutions', nargs='+', default=[f'{w}x{h}' for w, h in DEFAULT_RESOLUTIONS],
+                        help='Resolusi gambar sintetis (WxH)')
+    parser.add_argument('--iterations', type=int, default=40, help='Jumlah gambar per case per resolusi')
+    parser.add_argument('--warmup', type=int, default=3, help='Panggilan warmup sebelum pengukuran')
+    parser.add_argument('--url', default=f'http://127.0.0.1:{settings.API_PORT}/', help='URL POST / untuk end_to_end')
+    parser.add_argument('--requests', type=int, default=64, help='Jumlah request end_to_end')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client paralel end_to_end')
+    parser.add_argument('--baseline', default=str(current_dir / 'benchmarks' / 'baseline.json'),
+                        help='File baseline JSON')
+    parser.add_argument('--update-baseline', action='store_true', help='Tulis hasil sebagai baseline baru')
+    parser.add_argument('--output', help='Simpan hasil run ini ke file JSON')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25, help='Kenaikan latency relatif maksimum')
+    parser.add_argument('--accuracy-tolerance', type=float, default=1.0, help='Kenaikan error maksimum (poin persen)')
+    parser.add_argument('--min-latency-delta-ms', type=float, default=0.5, help='Selisih latency minimum yang dihitung')
+    args = parser.parse_args()
+
+    cases = set(args.cases)
+    resolutions = [parse_resolution(value) for value in args.resolutions]
+
+    if 'detect' in cases:
+        try:
+            pipeline.init_components()
+        except Exception:
+            pass  # Case detect dilaporkan sebagai skipped
+    calculator = OpenCVSizeCalculator(
+        cascade=settings.CONTOUR_CASCADE_ENABLED,
+        cascade_max_side=settings.CONTOUR_CASCADE_MAX_SIDE,
+        cascade_min_confidence=settings.CONTOUR_CASCADE_MIN_CONFIDENCE,
+    )
+
+    results = {}
+    for width, height in resolutions:
+        print(f'Benchmarking {width}x{height}...')
+        for case, result in run_resolution(width, height, cases, args.iterations, args.warmup, calculator).items():
+            results[f'{case}@{width}x{height}'] = result
+
+    if 'end_to_end' in cases:
+        width, height = resolutions[0]
+        print(f'Benchmarking end_to_end against {args.url} ({args.concurrency} clients)...')
+        results[f'end_to_end@{width}x{height}'] = run_end_to_end(args.url, width, height,
+                                                                 args.requests, args.concurrency)
+
+    print(f'\n{"case":<28} {"p50 ms":>10} {"p99 ms":>10} {"per s":>10} {"accuracy":>24}')
+    for key, result in results.items():
+        if 'skipped' in result:
+            print(f'{key:<28} skipped: {result["skipped"]}')
+            continue
+        accuracy = ', '.join(f'{m}={result[m]}' for m in ACCURACY_METRICS + RATE_METRICS if result.get(m) is not None)
+        print(f'{key:<28} {result["p50_ms"]:>10} {result["p99_ms"]:>10} {result["throughput_per_s"]:>10} {accuracy:>24}')
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f'\nBaseline written to {baseline_path}')
+        return
+
+    if not baseline_path.exists():
+        # Tanpa baseline tidak ada cek regresi: gagal eksplisit agar CI tidak lolos diam-diam
+        raise SystemExit(f'No baseline at {baseline_path}; run with --update-baseline to create one')
+
+    baseline = json.loads(baseline_path.read_text())
+    regressions = find_regressions(results, baseline.get('results', {}), args.latency_tolerance,
+                                   args.accuracy_tolerance, args.min_latency_delta_ms)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) vs {baseline_path}:')
+        for message in regressions:
+            print(f'   {message}')
+        sys.exit(1)
+    print(f'\nNo regressions vs {baseline_path}')
+
+
+if __name__ == '__main__':
+    main()
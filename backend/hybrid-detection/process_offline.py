@@ -0,0 +1,317 @@
+# File: backend/hybrid-detection/process_offline.py
+# Fungsi: CLI untuk memproses folder gambar atau file video dengan pipeline YOLO + OpenCV tanpa server HTTP
+import argparse
+import csv
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import cv2
+
+# Tambahkan src directory ke Python path
+current_dir = Path(__file__).parent
+src_dir = current_dir / "src"
+sys.path.insert(0, str(src_dir))
+
+from config.settings import settings
+from api import pipeline
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+COLUMNS = [
+    'source', 'frame_index', 'timestamp_ms', 'bottle_index', 'classification', 'confidence_percent',
+    'estimated_volume_ml', 'real_height_cm', 'real_diameter_cm', 'yolo_confidence', 'measurement_confidence',
+    'bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2', 'error',
+]
+
+# Penanda akhir stream di queue prefetch
+_END = object()
+
+
+def open_video(input_path: Path) -> cv2.VideoCapture:
+    """
+    Buka file video di thread utama agar error langsung terlihat (bukan di thread prefetch)
+    Raises:
+        SystemExit: Jika video tidak bisa dibuka
+    """
+    capture = cv2.VideoCapture(str(input_path))
+    if not capture.isOpened():
+        capture.release()
+        raise SystemExit(f'Could not open video: {input_path}')
+    return capture
+
+
+def iter_frames(input_path: Path, frame_step: int, capture: Optional[cv2.VideoCapture] = None):
+    """
+    Sumber frame: folder gambar (urut nama) atau file video
+    Args:
+        input_path: Folder gambar atau file video
+        frame_step: Proses setiap frame ke-N (video)
+        capture: Video yang sudah dibuka dengan open_video (None untuk folder)
+    Yields:
+        Tuple (source, frame_index, timestamp_ms, frame BGR atau None jika gagal dibaca)
+    """
+    if input_path.is_dir():
+        for index, path in enumerate(sorted(p for p in input_path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)):
+            yield path.name, index, None, cv2.imread(str(path))
+        return
+
+    if capture is None:
+        capture = open_video(input_path)
+
+    index = 0
+    try:
+        while True:
+            # grab() tanpa decode untuk frame yang dilewati
+            if index % frame_step != 0:
+                if not capture.grab():
+                    break
+                index += 1
+                continue
+
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield input_path.name, index, round(capture.get(cv2.CAP_PROP_POS_MSEC), 1), frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def count_frames(input_path: Path, frame_step: int):
+    """Perkiraan jumlah frame yang akan diproses (None jika tidak diketahui)"""
+    if input_path.is_dir():
+        return sum(1 for p in input_path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+    capture = cv2.VideoCapture(str(input_path))
+    if not capture.isOpened():
+        capture.release()
+        return None
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    return (total + frame_step - 1) // frame_step if total > 0 else None
+
+
+def prefetch(input_path: Path, frame_step: int, frames: queue.Queue, capture: Optional[cv2.VideoCapture] = None):
+    """
+    Thread decode: isi queue dengan frame agar inference tidak menunggu I/O
+    Exception dari thread ini dikirim lewat queue dan di-raise ulang di thread utama
+    """
+    try:
+        for item in iter_frames(input_path, frame_step, capture):
+            frames.put(item)
+    except BaseException as e:
+        frames.put(e)
+    finally:
+        frames.put(_END)
+
+
+def response_to_rows(source: str, frame_index: int, timestamp_ms, response: dict) -> list:
+    """Ubah response pipeline menjadi baris output (satu baris per botol)"""
+    base = {'source': source, 'frame_index': frame_index, 'timestamp_ms': timestamp_ms}
+    if 'error' in response:
+        return [{**base, 'error': response['error']}]
+
+    bottles = response.get('bottles', [response])
+    rows = []
+    for bottle_index, bottle in enumerate(bottles):
+        bbox = bottle.get('bbox') or [None] * 4
+        rows.append({
+            **base,
+            'bottle_index': bottle_index,
+            'classification': bottle.get('classification'),
+            'confidence_percent': bottle.get('confidence_percent'),
+            'estimated_volume_ml': bottle.get('estimated_volume_ml'),
+            'real_height_cm': bottle.get('real_height_cm'),
+            'real_diameter_cm': bottle.get('real_diameter_cm'),
+            'yolo_confidence': bottle.get('yolo_confidence'),
+            'measurement_confidence': bottle.get('measurement_details', {}).get('measurement_confidence'),
+            'bbox_x1': bbox[0], 'bbox_y1': bbox[1], 'bbox_x2': bbox[2], 'bbox_y2': bbox[3],
+            'error': bottle.get('error'),
+        })
+    return rows
+
+
+def measure_frame(frame, detections: list, multi: bool) -> dict:
+    """Tahap pengukuran untuk satu frame (dijalankan di worker pool)"""
+    if not detections:
+        return {'error': 'No bottles detected by YOLO'}
+
+    if multi:
+        response, _ = pipeline.measure_all_bottles(frame, detections, 'none')
+        return response
+
+    best_detection = max(detections, key=lambda x: x['confidence'])
+    response, _ = pipeline.measure_bottle(frame, best_detection, 'none')
+    if 'error' not in response:
+        response['bbox'] = best_detection['bbox']
+    return response
+
+
+class CsvResultWriter:
+    """Tulis hasil ke CSV baris per baris (flush setiap frame)"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, rows: list):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """Tulis hasil ke Parquet per row group agar memori tetap kecil"""
+
+    def __init__(self, path: Path, chunk_rows: int = 1000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ('source', pa.string()), ('frame_index', pa.int64()), ('timestamp_ms', pa.float64()),
+            ('bottle_index', pa.int64()), ('classification', pa.string()), ('confidence_percent', pa.float64()),
+            ('estimated_volume_ml', pa.float64()), ('real_height_cm', pa.float64()),
+            ('real_diameter_cm', pa.float64()), ('yolo_confidence', pa.float64()),
+            ('measurement_confidence', pa.float64()), ('bbox_x1', pa.int64()), ('bbox_y1', pa.int64()),
+            ('bbox_x2', pa.int64()), ('bbox_y2', pa.int64()), ('error', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+        self._chunk_rows = chunk_rows
+        self._buffer = []
+
+    def _flush(self):
+        if self._buffer:
+            columns = {name: [row.get(name) for row in self._buffer] for name in COLUMNS}
+            self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+            self._buffer = []
+
+    def write(self, rows: list):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self._chunk_rows:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline bottle measurement for image folders and video files')
+    parser.add_argument('input', help='Folder gambar atau file video')
+    parser.add_argument('--output', required=True, help='File hasil (.csv atau .parquet)')
+    parser.add_argument('--multi', action='store_true', help='Ukur semua botol per frame')
+    parser.add_argument('--batch-size', type=int, default=settings.BATCH_MAX_SIZE, help='Frame per forward pass YOLO')
+    parser.add_argument('--workers', type=int, default=settings.EXECUTOR_MAX_WORKERS, help='Worker pengukuran kontur')
+    parser.add_argument('--frame-step', type=int, default=1, help='Proses setiap frame ke-N (video)')
+    parser.add_argument('--prefetch', type=int, default=32, help='Ukuran antrian frame hasil decode')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Interval laporan progress (detik)')
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    if not input_path.exists():
+        raise SystemExit(f'Input not found: {input_path}')
+
+    try:
+        pipeline.init_components()
+    except Exception as e:
+        raise SystemExit(f'Could not initialize pipeline: {e}')
+
+    if output_path.suffix.lower() == '.parquet':
+        writer = ParquetResultWriter(output_path)
+    else:
+        writer = CsvResultWriter(output_path)
+
+    frame_step = max(1, args.frame_step)
+    capture = None if input_path.is_dir() else open_video(input_path)
+    total = count_frames(input_path, frame_step)
+    frames = queue.Queue(maxsize=args.prefetch)
+    threading.Thread(target=prefetch, args=(input_path, frame_step, frames, capture), daemon=True).start()
+
+    started = time.perf_counter()
+    last_report = started
+    processed, bottles = 0, 0
+    pending = deque()
+    finished = False
+
+    def write_oldest():
+        nonlocal processed, bottles
+        meta, future = pending.popleft()
+        rows = response_to_rows(*meta, future.result())
+        writer.write(rows)
+        processed += 1
+        bottles += sum(1 for row in rows if row.get('classification'))
+
+    def submit_measurements(batch: list, detect_future):
+        """Antrikan pengukuran per frame setelah deteksi batch-nya selesai (urutan frame dipertahankan)"""
+        detections = iter(detect_future.result() if detect_future is not None else [])
+        for source, index, timestamp, frame in batch:
+            if frame is None:
+                future = Future()
+                future.set_result({'error': 'Could not read image'})
+            else:
+                future = pool.submit(measure_frame, frame, next(detections), args.multi)
+            pending.append(((source, index, timestamp), future))
+
+    # Deteksi batch berjalan di thread sendiri (satu forward pass sekaligus) sehingga tumpang tindih dengan
+    # pengumpulan batch berikutnya dan pengukuran batch sebelumnya di worker pool
+    in_detection = None
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='measure') as pool, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='detect') as detect_pool:
+        try:
+            while not finished:
+                # Kumpulkan satu batch dari queue prefetch
+                batch = []
+                while len(batch) < args.batch_size:
+                    item = frames.get()
+                    if item is _END:
+                        finished = True
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    batch.append(item)
+
+                # Frame yang gagal dibaca tidak ikut dideteksi, tapi tetap ditulis sesuai urutan
+                readable = [frame for _, _, _, frame in batch if frame is not None]
+                next_detection = None
+                if batch:
+                    next_detection = (batch, detect_pool.submit(pipeline.detect_batch, readable) if readable else None)
+                # Batch sebelumnya diukur sementara batch ini dideteksi
+                if in_detection is not None:
+                    submit_measurements(*in_detection)
+                in_detection = next_detection
+                if finished and in_detection is not None:
+                    submit_measurements(*in_detection)
+                    in_detection = None
+
+                # Tulis hasil secara berurutan, batasi jumlah frame yang menunggu di memori
+                while pending and (pending[0][1].done() or len(pending) > args.workers * 2 or finished):
+                    write_oldest()
+
+                now = time.perf_counter()
+                if now - last_report >= args.progress_interval:
+                    last_report = now
+                    rate = processed / (now - started)
+                    progress = f'{processed}/{total}' if total else str(processed)
+                    eta = f', ETA {(total - processed) / rate:.0f}s' if total and rate > 0 else ''
+                    print(f'Processed {progress} frames ({rate:.1f} frames/s, {bottles} bottles{eta})')
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f'Done: {processed} frames, {bottles} bottles in {elapsed:.1f}s '
+          f'({processed / elapsed if elapsed > 0 else 0:.1f} frames/s) -> {output_path}')
+
+
+if __name__ == '__main__':
+    main()
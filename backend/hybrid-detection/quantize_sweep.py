@@ -0,0 +1,204 @@
+# File: backend/hybrid-detection/quantize_sweep.py
+# Fungsi: Membuat varian model terkuantisasi dan membandingkan akurasi vs latency pada dataset berlabel
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Tambahkan src directory ke Python path
+current_dir = Path(__file__).parent
+src_dir = current_dir / "src"
+sys.path.insert(0, str(src_dir))
+
+from config.settings import settings
+from detection.yolo_detector import YOLOBottleDetector
+from detection.quantization import backend_for_model, build_variants, list_images
+from image_processing.catalog import BottleCatalog, CatalogStore
+from image_processing.size_calculator import OpenCVSizeCalculator
+
+BOTTLE_CLASS_ID = 39
+
+
+def load_ground_truth(image_path: Path, image_shape: tuple) -> list:
+    """
+    Baca label format YOLO (class cx cy w h, ternormalisasi) dari file .txt di sebelah gambar
+    Returns:
+        List bbox botol [x1, y1, x2, y2] dalam pixel
+    """
+    label_path = image_path.with_suffix('.txt')
+    if not label_path.exists():
+        return []
+
+    height, width = image_shape[:2]
+    boxes = []
+    for line in label_path.read_text().splitlines():
+        parts = line.split()
+        if len(parts) < 5 or int(float(parts[0])) != BOTTLE_CLASS_ID:
+            continue
+        cx, cy, w, h = (float(v) for v in parts[1:5])
+        boxes.append([(cx - w / 2) * width, (cy - h / 2) * height, (cx + w / 2) * width, (cy + h / 2) * height])
+    return boxes
+
+
+def box_iou(a, b) -> float:
+    """IoU dua bbox [x1, y1, x2, y2]"""
+    inter_w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    inter_h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def classify_detection(calculator: OpenCVSizeCalculator, catalog: BottleCatalog, image: np.ndarray,
+                       detection: dict) -> str:
+    """Jalankan pipeline pengukuran OpenCV pada satu deteksi dan kembalikan klasifikasinya"""
+    bottle_data = calculator.extract_bottle_contour(image, detection['bbox'])
+    if not bottle_data:
+        return 'NoContour'
+    dimensions = calculator.calculate_bottle_dimensions(bottle_data)
+    if not dimensions:
+        return 'NoDimensions'
+    real_dimensions = calculator.estimate_real_dimensions_from_context(dimensions)
+    return calculator.classify_bottle(
+        real_dimensions, catalog, settings.CLASSIFICATION_TOLERANCE_PERCENT
+    )['classification']
+
+
+def run_variant(name: str, model_path: Path, images: list, iou_threshold: float, warmup: int) -> dict:
+    """Jalankan satu varian model pada seluruh dataset dan kumpulkan hasil per gambar"""
+    detector = YOLOBottleDetector(model_path=str(model_path), confidence=settings.YOLO_CONFIDENCE,
+                                  backend=backend_for_model(model_path))
+    if detector.model is None:
+        raise RuntimeError(f'Could not load variant {name} from {model_path}')
+    calculator = OpenCVSizeCalculator()
+    catalog = CatalogStore(settings.BOTTLE_CATALOG_PATH, settings.KNOWN_BOTTLE_SPECS).get()
+
+    for _ in range(warmup):
+        detector.detect_bottles(images[0][1])
+
+    latencies, per_image = [], []
+    matched_gt, total_gt = 0, 0
+
+    for image_path, image in images:
+        started = time.perf_counter()
+        detections = detector.detect_bottles(image)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        ground_truth = load_ground_truth(image_path, image.shape)
+        total_gt += len(ground_truth)
+        matched_gt += sum(
+            1 for gt in ground_truth
+            if any(box_iou(gt, d['bbox']) >= iou_threshold for d in detections)
+        )
+
+        best = max(detections, key=lambda d: d['confidence']) if detections else None
+        per_image.append({
+            'image': image_path.name,
+            'best_bbox': best['bbox'] if best else None,
+            'classification': classify_detection(calculator, catalog, image, best) if best else 'NoDetection',
+        })
+
+    return {
+        'variant': name,
+        'model_path': str(model_path),
+        'recall': round(matched_gt / total_gt, 4) if total_gt else None,
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'latency_p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'per_image': per_image,
+    }
+
+
+def compare_to_reference(result: dict, reference: dict) -> dict:
+    """Hitung drift IoU bbox dan kesepakatan klasifikasi terhadap varian referensi"""
+    ious, agreements = [], []
+    for current, ref in zip(result['per_image'], reference['per_image']):
+        agreements.append(current['classification'] == ref['classification'])
+        if current['best_bbox'] and ref['best_bbox']:
+            ious.append(box_iou(current['best_bbox'], ref['best_bbox']))
+        elif current['best_bbox'] or ref['best_bbox']:
+            ious.append(0.0)
+
+    return {
+        'mean_iou_vs_reference': round(float(np.mean(ious)), 4) if ious else None,
+        'min_iou_vs_reference': round(float(np.min(ious)), 4) if ious else None,
+        'classification_agreement': round(float(np.mean(agreements)), 4) if agreements else None,
+    }
+
+
+def parse_variants(values: list) -> dict:
+    """Parse argumen --variant nama=path"""
+    variants = {}
+    for value in values:
+        name, _, path = value.partition('=')
+        if not path:
+            raise SystemExit(f'Invalid --variant {value!r}, expected name=path')
+        variants[name] = Path(path)
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantized model accuracy vs latency sweep')
+    parser.add_argument('--images', required=True, help='Folder gambar berlabel (label YOLO .txt di sebelah gambar)')
+    parser.add_argument('--variant', action='append', default=[], help='Varian model nama=path (boleh berulang)')
+    parser.add_argument('--build', metavar='WEIGHTS', help='Buat varian fp32/fp16/int8 dari weight .pt terlebih dahulu')
+    parser.add_argument('--calibration', help='Folder gambar kalibrasi untuk INT8 static (default: --images)')
+    parser.add_argument('--output-dir', default=str(settings.MODELS_DIR / 'yolo'), help='Folder output varian')
+    parser.add_argument('--iou-threshold', type=float, default=0.5, help='IoU minimum untuk recall')
+    parser.add_argument('--warmup', type=int, default=3, help='Jumlah inference warmup per varian')
+    parser.add_argument('--min-agreement', type=float, default=1.0, help='Kesepakatan klasifikasi minimum')
+    parser.add_argument('--max-recall-drop', type=float, default=0.0, help='Penurunan recall maksimum vs referensi')
+    parser.add_argument('--report', default='quantization_report.json', help='Path laporan JSON')
+    args = parser.parse_args()
+
+    if args.build:
+        variants = build_variants(args.build, args.output_dir, args.calibration or args.images, settings.YOLO_IMGSZ)
+    elif args.variant:
+        variants = parse_variants(args.variant)
+    else:
+        variants = {name: Path(path) for name, path in settings.YOLO_MODEL_VARIANTS.items() if Path(path).exists()}
+
+    if not variants:
+        raise SystemExit('No model variants found. Use --build or --variant name=path.')
+
+    images = [(path, cv2.imread(str(path))) for path in list_images(args.images)]
+    images = [(path, image) for path, image in images if image is not None]
+    if not images:
+        raise SystemExit(f'No readable images in {args.images}')
+
+    # Varian pertama menjadi referensi untuk drift IoU dan kesepakatan klasifikasi
+    results = [run_variant(name, path, images, args.iou_threshold, args.warmup) for name, path in variants.items()]
+    reference = results[0]
+    for result in results:
+        result.update(compare_to_reference(result, reference))
+
+    print(f'\n{"variant":<10} {"recall":>8} {"IoU mean":>9} {"agree":>7} {"p50 ms":>9} {"p99 ms":>9}')
+    for result in results:
+        print(f'{result["variant"]:<10} {str(result["recall"]):>8} {str(result["mean_iou_vs_reference"]):>9} '
+              f'{str(result["classification_agreement"]):>7} {result["latency_p50_ms"]:>9} {result["latency_p99_ms"]:>9}')
+
+    # Pilih varian tercepat yang tidak mengubah klasifikasi dan tidak menurunkan recall
+    eligible = [
+        r for r in results
+        if (r['classification_agreement'] or 0) >= args.min_agreement
+        and (r['recall'] is None or reference['recall'] is None
+             or r['recall'] >= reference['recall'] - args.max_recall_drop)
+    ]
+    recommended = min(eligible, key=lambda r: r['latency_p50_ms']) if eligible else reference
+    print(f'\nRecommended variant: {recommended["variant"]} ({recommended["model_path"]})')
+
+    report = {
+        'reference': reference['variant'],
+        'recommended': recommended['variant'],
+        'variants': [{k: v for k, v in r.items() if k != 'per_image'} for r in results],
+        'per_image': {r['variant']: r['per_image'] for r in results},
+    }
+    Path(args.report).write_text(json.dumps(report, indent=2))
+    print(f'Report written to {args.report}')
+
+
+if __name__ == '__main__':
+    main()
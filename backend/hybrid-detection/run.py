@@ -14,6 +14,7 @@ if __name__ == '__main__':
     print(f'Starting Hybrid Bottle Detection API...')
     print(f'Host: {settings.API_HOST}')
     print(f'Port: {settings.API_PORT}')
+    print(f'YOLO Backend: {settings.YOLO_BACKEND}')
     print(f'YOLO Device: {settings.YOLO_DEVICE}')
     
     uvicorn.run(
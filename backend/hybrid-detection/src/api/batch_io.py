@@ -0,0 +1,114 @@
+# File: backend/hybrid-detection/src/api/batch_io.py
+# Fungsi: Membaca gambar satu per satu dari upload multipart / arsip tar-zip untuk endpoint /batch
+import json
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+ARCHIVE_CONTENT_TYPES = ('application/zip', 'application/x-tar', 'application/gzip', 'application/x-gzip')
+
+
+def is_image_name(name: str) -> bool:
+    """Cek ekstensi file gambar (abaikan file tersembunyi / metadata macOS)"""
+    path = PurePosixPath(name)
+    return path.suffix.lower() in IMAGE_EXTENSIONS and not path.name.startswith('.') and '__MACOSX' not in path.parts
+
+
+def archive_format(fileobj: BinaryIO) -> Optional[str]:
+    """
+    Deteksi dan validasi arsip dari isinya (header zip / tar, kompresi tar dideteksi otomatis)
+    Args:
+        fileobj: File arsip yang bisa di-seek
+    Returns:
+        'zip', 'tar', atau None jika bukan arsip yang valid
+    """
+    try:
+        fileobj.seek(0)
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            # Membuka ZipFile membaca central directory, arsip terpotong langsung gagal di sini
+            with zipfile.ZipFile(fileobj):
+                return 'zip'
+        fileobj.seek(0)
+        with tarfile.open(fileobj=fileobj, mode='r:*') as archive:
+            archive.next()
+        return 'tar'
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError):
+        return None
+    finally:
+        fileobj.seek(0)
+
+
+def is_archive_upload(filename: str, content_type: str) -> bool:
+    """Upload diperlakukan sebagai arsip dari nama file atau content type"""
+    return (filename or '').lower().endswith(ARCHIVE_EXTENSIONS) or content_type in ARCHIVE_CONTENT_TYPES
+
+
+def iter_archive_images(fileobj: BinaryIO, max_image_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Baca gambar dari arsip zip atau tar tanpa mengekstrak semuanya ke memori
+    Args:
+        fileobj: File arsip yang bisa di-seek
+        max_image_bytes: Ukuran maksimum satu gambar, yang lebih besar dilewati
+    Yields:
+        Tuple (nama file, isi file); isi b'' untuk gambar yang terlalu besar
+    """
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not is_image_name(info.filename):
+                    continue
+                if info.file_size > max_image_bytes:
+                    yield info.filename, b''
+                    continue
+                yield info.filename, archive.read(info)
+        return
+
+    fileobj.seek(0)
+    with tarfile.open(fileobj=fileobj, mode='r:*') as archive:
+        for member in archive:
+            if not member.isfile() or not is_image_name(member.name):
+                continue
+            if member.size > max_image_bytes:
+                yield member.name, b''
+                continue
+            extracted = archive.extractfile(member)
+            yield member.name, extracted.read() if extracted else b''
+
+
+def iter_batch_items(uploads: List[Tuple[str, str, BinaryIO]], max_image_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Gabungkan semua sumber batch (file gambar dan arsip) menjadi satu aliran gambar
+    Args:
+        uploads: List (nama file, content type, file object)
+        max_image_bytes: Ukuran maksimum satu gambar, yang lebih besar dilewati
+    Yields:
+        Tuple (nama file, isi file); isi b'' untuk gambar yang terlalu besar
+    """
+    for filename, content_type, fileobj in uploads:
+        filename = filename or 'upload'
+        if is_archive_upload(filename, content_type):
+            yield from iter_archive_images(fileobj, max_image_bytes)
+            continue
+
+        data = fileobj.read(max_image_bytes + 1)
+        yield filename, data if len(data) <= max_image_bytes else b''
+
+
+def json_default(value):
+    """Konversi tipe NumPy (dan tipe lain yang tidak dikenal json) untuk json.dumps"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def to_ndjson(record: dict) -> str:
+    """Serialisasi satu hasil menjadi satu baris NDJSON (tipe NumPy dikonversi ke tipe Python)"""
+    return json.dumps(record, default=json_default) + '\n'
@@ -0,0 +1,63 @@
+# File: backend/hybrid-detection/src/api/calibration_cache.py
+# Fungsi: Cache kalibrasi skala per kamera/session dengan masa berlaku
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from image_processing.calibration import Calibration
+
+
+class CalibrationCache:
+    """Class cache TTL + LRU: camera_id -> Calibration, dipakai ulang untuk semua frame berikutnya"""
+
+    def __init__(self, ttl_seconds: float = 8 * 3600, max_entries: int = 64):
+        """
+        Args:
+            ttl_seconds: Umur kalibrasi sebelum harus dikalibrasi ulang (kamera bisa bergeser)
+            max_entries: Jumlah kamera/session maksimum (yang paling lama tidak dipakai dibuang)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, camera_id: str, calibration: Calibration):
+        """Simpan (atau ganti) kalibrasi kamera"""
+        with self._lock:
+            self._entries[camera_id] = (time.monotonic() + self.ttl_seconds, calibration)
+            self._entries.move_to_end(camera_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, camera_id: Optional[str]) -> Optional[Calibration]:
+        """Kalibrasi kamera, None jika belum ada atau sudah kadaluarsa"""
+        if not camera_id:
+            return None
+        with self._lock:
+            item = self._entries.get(camera_id)
+            if item is not None and item[0] <= time.monotonic():
+                del self._entries[camera_id]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(camera_id)
+            self.hits += 1
+            return item[1]
+
+    def expires_in(self, camera_id: str) -> Optional[float]:
+        """Sisa masa berlaku dalam detik"""
+        with self._lock:
+            item = self._entries.get(camera_id)
+            return None if item is None else max(0.0, item[0] - time.monotonic())
+
+    def delete(self, camera_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(camera_id, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'cameras': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,253 @@
+# File: backend/hybrid-detection/src/api/job_queue.py
+# Fungsi: Antrian job analisis asinkron yang persisten (SQLite) dengan prioritas interactive / bulk
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Union
+
+from api.batch_io import json_default
+
+# Prioritas job: angka kecil diambil lebih dulu
+PRIORITIES = {'interactive': 0, 'bulk': 1}
+
+# State akhir: job tidak berubah lagi
+FINAL_STATES = ('done', 'failed')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    stage TEXT,
+    params TEXT NOT NULL,
+    payload BLOB,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority, created_at);
+'''
+
+
+def to_sse_event(event: str, data: dict) -> str:
+    """Satu event server-sent events (data JSON satu baris)"""
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"), default=json_default)}\n\n'
+
+
+class JobStore:
+    """Class antrian job di file SQLite: job dan hasilnya tetap ada walaupun server restart"""
+
+    def __init__(self, path: Union[str, Path], max_attempts: int = 2):
+        """
+        Args:
+            path: File database SQLite
+            max_attempts: Job yang terputus (server mati saat running) diulang sampai sejumlah ini
+        """
+        self.path = Path(path)
+        self.max_attempts = max(1, int(max_attempts))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Satu koneksi dipakai bersama dari thread pool, akses diserialisasi dengan lock
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def submit(self, payload: bytes, params: dict, priority: str = 'bulk') -> str:
+        """
+        Simpan job baru di antrian
+        Args:
+            payload: Isi gambar (bytes gambar atau string base64 yang di-encode)
+            params: Parameter analisis (overlay, multi, reduce, camera_id, ...)
+            priority: 'interactive' atau 'bulk'
+        Returns:
+            job_id
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO jobs (id, priority, state, params, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, PRIORITIES[priority], 'queued', json.dumps(params), payload, time.time()),
+            )
+        return job_id
+
+    def claim(self) -> Optional[dict]:
+        """
+        Ambil job queued berikutnya (prioritas lalu urutan masuk) dan tandai running
+        Returns:
+            Dict job berisi 'payload' dan 'params', None jika antrian kosong
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE state = 'queued' ORDER BY priority, created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            started_at = time.time()
+            self._db.execute(
+                "UPDATE jobs SET state = 'running', stage = 'starting', attempts = attempts + 1, started_at = ? "
+                "WHERE id = ?",
+                (started_at, row['id']),
+            )
+        job = self._to_dict(row)
+        job.update(state='running', stage='starting', started_at=started_at, attempts=row['attempts'] + 1,
+                   payload=row['payload'], params=json.loads(row['params']))
+        return job
+
+    def set_stage(self, job_id: str, stage: str):
+        """Catat tahapan job yang sedang berjalan (untuk progress)"""
+        with self._lock:
+            self._db.execute("UPDATE jobs SET stage = ? WHERE id = ? AND state = 'running'", (stage, job_id))
+
+    def complete(self, job_id: str, result: dict):
+        """Simpan hasil job; payload gambar dihapus karena tidak diperlukan lagi"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = 'done', stage = NULL, result = ?, payload = NULL, finished_at = ? "
+                "WHERE id = ?",
+                (json.dumps(result, default=json_default), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = 'failed', stage = NULL, error = ?, payload = NULL, finished_at = ? "
+                "WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+
+    def requeue_interrupted(self) -> int:
+        """
+        Job yang masih 'running' saat server start berarti terputus: kembalikan ke antrian,
+        atau gagalkan jika sudah mencapai max_attempts
+        Returns:
+            Jumlah job yang dikembalikan ke antrian
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = 'failed', stage = NULL, error = 'Interrupted too many times', "
+                "payload = NULL, finished_at = ? WHERE state = 'running' AND attempts >= ?",
+                (time.time(), self.max_attempts),
+            )
+            return self._db.execute(
+                "UPDATE jobs SET state = 'queued', stage = NULL WHERE state = 'running'"
+            ).rowcount
+
+    def purge(self, retention_seconds: float) -> int:
+        """Hapus job selesai yang lebih tua dari retention_seconds"""
+        with self._lock:
+            return self._db.execute(
+                'DELETE FROM jobs WHERE state IN (?, ?) AND finished_at < ?',
+                (*FINAL_STATES, time.time() - retention_seconds),
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Status job (tanpa payload)
+        Returns:
+            Dict job dengan 'result' / 'error' jika selesai dan 'position' jika masih queued, None jika tidak ada
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT id, priority, state, stage, result, error, attempts, created_at, started_at, finished_at '
+                'FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = self._to_dict(row)
+            if row['state'] == 'queued':
+                # Jumlah job yang akan diambil lebih dulu
+                job['position'] = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND "
+                    "(priority < ? OR (priority = ? AND created_at < ?))",
+                    (row['priority'], row['priority'], row['created_at']),
+                ).fetchone()[0]
+        if row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+        if row['error'] is not None:
+            job['error'] = row['error']
+        return job
+
+    def counts(self) -> dict:
+        """Jumlah job per state dan per prioritas yang masih antri"""
+        with self._lock:
+            states = dict(self._db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+            queued = dict(self._db.execute(
+                "SELECT priority, COUNT(*) FROM jobs WHERE state = 'queued' GROUP BY priority"
+            ).fetchall())
+        names = {value: name for name, value in PRIORITIES.items()}
+        return {
+            'states': states,
+            'queued': {names.get(priority, str(priority)): count for priority, count in queued.items()},
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        names = {value: name for name, value in PRIORITIES.items()}
+        return {
+            'job_id': row['id'],
+            'priority': names.get(row['priority'], row['priority']),
+            'state': row['state'],
+            'stage': row['stage'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+
+
+class InteractiveGate:
+    """
+    Hitung pekerjaan interaktif yang sedang berjalan (request sinkron kiosk, job 'interactive');
+    job bulk menunggu di antara tahapan sampai tidak ada pekerjaan interaktif
+    """
+
+    def __init__(self):
+        self.active = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    def _event(self) -> asyncio.Event:
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            if self.active == 0:
+                self._idle.set()
+        return self._idle
+
+    @contextmanager
+    def track(self):
+        """Tandai satu pekerjaan interaktif selama blok berjalan (dipanggil di event loop)"""
+        self.active += 1
+        self._event().clear()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self.active == 0:
+                self._event().set()
+
+    async def wait_idle(self, max_wait_seconds: float) -> bool:
+        """
+        Tunggu sampai tidak ada pekerjaan interaktif, paling lama max_wait_seconds (agar bulk tidak kelaparan)
+        Returns:
+            True jika harus menunggu
+        """
+        if self.active == 0:
+            return False
+        try:
+            await asyncio.wait_for(self._event().wait(), max_wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+        return True
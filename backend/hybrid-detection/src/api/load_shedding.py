@@ -0,0 +1,163 @@
+# File: backend/hybrid-detection/src/api/load_shedding.py
+# Fungsi: Admission control berbasis deadline per request dan level degradasi saat antrian memanjang
+import math
+import time
+from contextlib import contextmanager
+from typing import Optional, Sequence
+
+# Level degradasi kumulatif: setiap level juga menerapkan penghematan level sebelumnya
+LEVEL_FULL = 0
+LEVEL_SMALL_IMGSZ = 1  # Ukuran input YOLO lebih kecil, tanpa deteksi ulang ukuran penuh
+LEVEL_CHEAP_CONTOUR = 2  # Hanya tahap kontur termurah yang berhasil (tanpa eskalasi cascade)
+LEVEL_NO_OVERLAY = 3  # Overlay 'image' (render + PNG base64) dilewati
+MAX_LEVEL = LEVEL_NO_OVERLAY
+
+
+class Overloaded(Exception):
+    """Request ditolak karena antrian penuh (429) atau deadline tidak mungkin terpenuhi (503)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Budget satu request yang sudah diterima: level degradasi dan deadline absolut"""
+
+    def __init__(self, level: int, deadline: float, waves: int, retry_after: int, shed: bool = True):
+        self.level = level
+        self.deadline = deadline
+        self.waves = waves
+        self.retry_after = retry_after
+        self.shed = shed
+        self.started = time.monotonic()
+
+    def remaining(self) -> float:
+        """Sisa budget dalam detik (negatif jika sudah lewat)"""
+        return self.deadline - time.monotonic()
+
+    def check(self, stage: str):
+        """
+        Hentikan request sebelum tahapan mahal jika deadline sudah lewat (hasil terlambat tidak berguna);
+        tiket tanpa shedding (frame streaming) tidak pernah dihentikan
+        Raises:
+            Overloaded: 503 dengan Retry-After
+        """
+        if self.shed and self.remaining() <= 0:
+            raise Overloaded(503, f'Deadline exceeded before {stage}', self.retry_after)
+
+
+class LoadShedder:
+    """
+    Class admission control untuk request interaktif: jumlah request yang menunggu/berjalan dibatasi,
+    request yang diperkirakan melewati deadline ditolak lebih awal, dan level degradasi naik
+    seiring kedalaman antrian agar latency ekor tetap terbatas
+    """
+
+    def __init__(self, max_pending: int, concurrency: int, level_thresholds: Sequence[float] = (0.5, 0.75, 0.9),
+                 default_deadline_ms: float = 2000, max_deadline_ms: float = 30000,
+                 min_retry_after_seconds: int = 1, smoothing: float = 0.2):
+        """
+        Args:
+            max_pending: Request maksimum yang menunggu atau berjalan; di atas ini 429
+            concurrency: Request yang bisa diproses bersamaan (batas concurrency executor)
+            level_thresholds: Fraksi max_pending untuk naik ke level 1, 2, 3
+            default_deadline_ms: Budget latency jika client tidak mengirim deadline
+            max_deadline_ms: Batas atas deadline dari client
+            min_retry_after_seconds: Nilai minimum header Retry-After
+            smoothing: Bobot sampel baru untuk rata-rata waktu layanan (EWMA)
+        """
+        self.max_pending = max(1, int(max_pending))
+        self.concurrency = max(1, int(concurrency))
+        self.level_thresholds = tuple(level_thresholds)[:MAX_LEVEL]
+        self.default_deadline = default_deadline_ms / 1000
+        self.max_deadline = max_deadline_ms / 1000
+        self.min_retry_after = max(1, int(min_retry_after_seconds))
+        self.smoothing = smoothing
+
+        self.pending = 0
+        self.service_seconds: Optional[float] = None
+        self.rejected = {'queue_full': 0, 'deadline': 0, 'expired': 0}
+        self.levels = [0] * (MAX_LEVEL + 1)
+
+    def budget(self, deadline_ms: Optional[float]) -> float:
+        """Budget latency dalam detik dari deadline client (dibatasi max_deadline_ms)"""
+        if not deadline_ms or deadline_ms <= 0:
+            return self.default_deadline
+        return min(deadline_ms / 1000, self.max_deadline)
+
+    def _waves(self, pending: int) -> int:
+        """Jumlah 'gelombang' layanan sampai request baru selesai (request di depannya / concurrency, + 1)"""
+        return pending // self.concurrency + 1
+
+    def estimated_latency(self) -> float:
+        """Perkiraan latency request yang masuk sekarang (0 jika belum ada sampel)"""
+        return (self.service_seconds or 0.0) * self._waves(self.pending)
+
+    def retry_after(self) -> int:
+        """Perkiraan waktu sampai antrian saat ini habis, dalam detik bulat"""
+        drain = (self.service_seconds or 0.0) * self.pending / self.concurrency
+        return max(self.min_retry_after, math.ceil(drain))
+
+    def level_for(self, budget: float) -> int:
+        """Level degradasi dari kedalaman antrian; naik ke level tertinggi jika budget hampir tidak cukup"""
+        load = self.pending / self.max_pending
+        level = sum(1 for threshold in self.level_thresholds if load >= threshold)
+        if self.estimated_latency() > budget:
+            level = MAX_LEVEL
+        return level
+
+    @contextmanager
+    def admit(self, deadline_ms: Optional[float] = None, shed: bool = True):
+        """
+        Terima request (dihitung sebagai pending selama blok berjalan) atau tolak sebelum pekerjaan dimulai
+        Args:
+            deadline_ms: Budget latency dari client, None = default
+            shed: False = tidak pernah ditolak, hanya didegradasi (frame streaming yang sudah di-drop ke terbaru)
+        Yields:
+            AdmissionTicket
+        Raises:
+            Overloaded: 429 jika antrian penuh, 503 jika antrian di depan saja sudah melewati deadline
+        """
+        budget = self.budget(deadline_ms)
+        if shed:
+            if self.pending >= self.max_pending:
+                self.rejected['queue_full'] += 1
+                raise Overloaded(429, 'Server busy: request queue full', self.retry_after())
+            # Waktu tunggu sebelum request ini mulai diproses
+            wait = (self.service_seconds or 0.0) * (self._waves(self.pending) - 1)
+            if wait >= budget:
+                self.rejected['deadline'] += 1
+                raise Overloaded(503, f'Cannot meet deadline of {budget * 1000:.0f} ms '
+                                      f'(estimated wait {wait * 1000:.0f} ms)', self.retry_after())
+
+        level = self.level_for(budget)
+        ticket = AdmissionTicket(level, time.monotonic() + budget, self._waves(self.pending), self.retry_after(), shed)
+        self.levels[level] += 1
+        self.pending += 1
+        try:
+            yield ticket
+        except Overloaded:
+            self.rejected['expired'] += 1
+            raise
+        else:
+            # Waktu layanan per gelombang (latency dibagi jumlah gelombang antrian saat request masuk)
+            sample = (time.monotonic() - ticket.started) / ticket.waves
+            if self.service_seconds is None:
+                self.service_seconds = sample
+            else:
+                self.service_seconds += self.smoothing * (sample - self.service_seconds)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'current_level': self.level_for(self.default_deadline),
+            'service_ms': round(self.service_seconds * 1000, 1) if self.service_seconds is not None else None,
+            'admitted_per_level': list(self.levels),
+            'rejected': dict(self.rejected),
+        }
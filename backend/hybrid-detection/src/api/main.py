@@ -1,22 +1,39 @@
 # File: backend/hybrid-detection/src/api/main.py
 # Fungsi: Server API utama yang menggabungkan YOLO detection dan OpenCV calculation
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import cv2
-import numpy as np
-import base64
-from io import BytesIO
-from PIL import Image as PILImage
+import asyncio
+import contextlib
 import sys
+import tempfile
+import time
 from pathlib import Path
+from typing import Awaitable, Callable, Optional
 
 # Import module lokal
 sys.path.append(str(Path(__file__).parent.parent))
-from detection.yolo_detector import YOLOBottleDetector
-from image_processing.size_calculator import OpenCVSizeCalculator
+from api import pipeline
+from api.batch_io import archive_format, is_archive_upload, iter_batch_items, to_ndjson
+from api.calibration_cache import CalibrationCache
+from api.job_queue import FINAL_STATES, PRIORITIES, InteractiveGate, JobStore, to_sse_event
+from api.load_shedding import LEVEL_NO_OVERLAY, LEVEL_SMALL_IMGSZ, LoadShedder, Overloaded
+from api.render_cache import OverlayCache
+from api.result_cache import ResultCache, content_key
+from api.streaming import LatestFrameSlot, parse_text_frame
+from detection.adaptive_resolution import AdaptiveResolution
+from detection.tracker import BottleTracker
+from inference import cpu_budget
+from inference.batcher import DetectionBatcher
+from inference.executor import PipelineExecutor
+from inference.workers import InferenceWorkerPool, WorkerUnavailable
+from monitoring import metrics, profiling
 from config.settings import settings
 
+# Awal proses server, untuk mengukur cold start sampai ready
+PROCESS_STARTED = time.perf_counter()
+
 # Inisialisasi FastAPI app
 app = FastAPI(title='Hybrid Bottle Detection API')
 
@@ -29,50 +46,279 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
-# Inisialisasi detector dan calculator dengan error handling
-try:
-    print("Initializing YOLO detector...")
-    yolo_detector = YOLOBottleDetector(confidence=settings.YOLO_CONFIDENCE)
-    
-    print("Initializing size calculator...")
-    size_calculator = OpenCVSizeCalculator()
-    
-    print("All components initialized successfully")
-except Exception as e:
-    print(f"Error initializing components: {e}")
-    yolo_detector = None
-    size_calculator = None
+# Semua tahapan CPU-bound dijalankan di executor agar event loop hanya menangani I/O
+pipeline_executor = PipelineExecutor(
+    mode=settings.EXECUTOR_MODE,
+    max_workers=settings.EXECUTOR_MAX_WORKERS,
+    max_concurrency=settings.EXECUTOR_MAX_CONCURRENCY,
+    initializer=pipeline.init_worker,
+)
 
-class ImageRequest(BaseModel):
-    """Model untuk request gambar dari frontend"""
-    image: str
+# Worker inference opsional: setiap worker memuat model sendiri dan dipin ke core set
+worker_pool = None
+if settings.INFERENCE_WORKERS > 0:
+    worker_pool = InferenceWorkerPool(
+        settings.INFERENCE_WORKERS,
+        cores_per_worker=settings.INFERENCE_WORKER_CORES,
+        slots_per_worker=settings.INFERENCE_WORKER_RING_SLOTS,
+        max_frame_bytes=settings.INFERENCE_WORKER_MAX_FRAME_BYTES,
+        warmup_iterations=settings.WARMUP_ITERATIONS,
+        restart_delay_seconds=settings.INFERENCE_WORKER_RESTART_SECONDS,
+    )
+
+# Batcher menggabungkan frame dari request paralel ke satu forward pass YOLO
+detection_batcher = DetectionBatcher(
+    pipeline.detect_batch,
+    executor=pipeline_executor,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+)
+
+# Data overlay untuk render on-demand (mode response 'geometry')
+overlay_cache = OverlayCache(
+    ttl_seconds=settings.RENDER_CACHE_TTL_SECONDS,
+    max_entries=settings.RENDER_CACHE_MAX_ENTRIES,
+)
+
+# Cache response untuk frame identik / hampir identik + penggabungan request yang sedang berjalan
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    perceptual=settings.RESULT_CACHE_PERCEPTUAL,
+    perceptual_distance=settings.RESULT_CACHE_PERCEPTUAL_DISTANCE,
+)
+
+# Ukuran input YOLO adaptif per kamera/stream (ukuran botol frame sebelumnya -> imgsz frame berikutnya)
+adaptive_resolution = None
+if settings.ADAPTIVE_IMGSZ_ENABLED:
+    adaptive_resolution = AdaptiveResolution(
+        settings.ADAPTIVE_IMGSZ_SIZES,
+        default_size=settings.YOLO_IMGSZ,
+        min_object_pixels=settings.ADAPTIVE_IMGSZ_MIN_OBJECT_PIXELS,
+        roi=settings.INFERENCE_ROI,
+        ttl_seconds=settings.ADAPTIVE_IMGSZ_TTL_SECONDS,
+    )
+
+# Kalibrasi skala per kamera, dipakai ulang untuk semua frame kamera tersebut sampai kadaluarsa
+calibration_cache = CalibrationCache(
+    ttl_seconds=settings.CALIBRATION_TTL_SECONDS,
+    max_entries=settings.CALIBRATION_MAX_CAMERAS,
+)
+
+# Admission control request interaktif: antrian terbatas, deadline per request, level degradasi
+load_shedder = None
+if settings.LOAD_SHED_ENABLED:
+    load_shedder = LoadShedder(
+        settings.LOAD_SHED_MAX_PENDING,
+        concurrency=pipeline_executor.max_concurrency,
+        level_thresholds=settings.LOAD_SHED_LEVEL_THRESHOLDS,
+        default_deadline_ms=settings.LOAD_SHED_DEFAULT_DEADLINE_MS,
+        max_deadline_ms=settings.LOAD_SHED_MAX_DEADLINE_MS,
+        min_retry_after_seconds=settings.LOAD_SHED_MIN_RETRY_AFTER_SECONDS,
+    )
+
+# Antrian job asinkron persisten (POST /jobs); job bulk mengalah ke pekerjaan interaktif.
+# Database dibuka di startup hook (bukan saat import) agar import modul tidak membuat file
+job_store = None
+# Jumlah job per state terakhir, diperbarui dispatcher agar /metrics dan /health tidak query SQLite di event loop
+job_counts = {'states': {}, 'queued': {}}
+interactive_gate = InteractiveGate()
+job_wakeup = asyncio.Event()  # Di-set saat ada job baru / slot job kosong
+job_update_event = asyncio.Event()  # Di-set (lalu diganti baru) setiap ada perubahan status job
+job_dispatcher_task = None
+
+# Interval pembersihan hasil job lama oleh dispatcher
+JOB_PURGE_INTERVAL_SECONDS = 60
+
+# Profile request yang diminta client (hanya jika PROFILING_ENABLED)
+profile_store = profiling.ProfileStore(
+    settings.PROFILE_DIR,
+    max_stored=settings.PROFILE_MAX_STORED,
+    top_functions=settings.PROFILE_TOP_FUNCTIONS,
+)
 
-def decode_base64_image(base64_string: str) -> np.ndarray:
-    """Konversi base64 string ke OpenCV image"""
+# Mode response overlay yang didukung
+OVERLAY_MODES = ('image', 'geometry', 'none')
+
+# Gauge antrian dibaca langsung dari komponen saat /metrics di-scrape
+metrics.QUEUE_DEPTH.set_function(lambda: detection_batcher.queue_depth, queue='detection_batch')
+metrics.QUEUE_DEPTH.set_function(lambda: pipeline_executor.in_flight, queue='executor')
+metrics.QUEUE_DEPTH.set_function(lambda: result_cache.stats()['in_flight'], queue='result_cache_in_flight')
+if worker_pool is not None:
+    metrics.QUEUE_DEPTH.set_function(lambda: worker_pool.in_flight, queue='inference_workers')
+if settings.JOBS_ENABLED:
+    metrics.QUEUE_DEPTH.set_function(lambda: sum(job_counts['queued'].values()), queue='jobs')
+metrics.QUEUE_DEPTH.set_function(lambda: interactive_gate.active, queue='interactive')
+if load_shedder is not None:
+    metrics.QUEUE_DEPTH.set_function(lambda: load_shedder.pending, queue='admitted')
+
+# Status startup: model dimuat + warmup di background task, endpoint analisis 503 sampai 'ready'
+startup_status = {
+    'state': 'loading',  # loading -> warming_up -> ready, atau failed
+    'error': None,
+    'load_seconds': None,
+    'warmup_seconds': None,
+    'ready_seconds': None,
+}
+startup_task = None
+
+async def load_components():
+    """Muat model YOLO + calculator dan jalankan warmup tanpa memblokir event loop"""
+    global job_dispatcher_task
     try:
-        if base64_string.startswith('data:image'):
-            base64_string = base64_string.split(',')[1]
+        started = time.perf_counter()
+        # Budget thread sebelum model dimuat. Affinity di thread event loop (thread executor mewarisi
+        # affinity thread pembuatnya); torch di thread lain karena import-nya berat
+        cpu_budget.apply_thread_budget(opencv_threads=settings.OPENCV_NUM_THREADS, affinity=settings.CPU_AFFINITY)
+        await asyncio.to_thread(
+            cpu_budget.apply_thread_budget,
+            torch_threads=settings.TORCH_NUM_THREADS,
+            torch_interop_threads=settings.TORCH_INTEROP_THREADS,
+        )
+        await asyncio.to_thread(pipeline.init_components)
+        startup_status['load_seconds'] = round(time.perf_counter() - started, 3)
+        metrics.MODEL_INFO.set(
+            1,
+            backend=pipeline.yolo_detector.backend_name,
+            model_path=pipeline.yolo_detector.model.model_path,
+            device=pipeline.yolo_detector.device,
+        )
+        
+        startup_status['state'] = 'warming_up'
+        started = time.perf_counter()
+        await asyncio.to_thread(pipeline.warmup, settings.WARMUP_ITERATIONS)
+        if pipeline_executor.mode == 'process':
+            # Paksa semua worker process dibuat; initializer masing-masing memuat model dan warmup
+            await asyncio.gather(*(
+                pipeline_executor.run(pipeline.worker_pid) for _ in range(pipeline_executor.max_workers)
+            ))
+        if worker_pool is not None:
+            await worker_pool.start()
+        startup_status['warmup_seconds'] = round(time.perf_counter() - started, 3)
         
-        image_data = base64.b64decode(base64_string)
-        pil_image = PILImage.open(BytesIO(image_data))
-        cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        startup_status['ready_seconds'] = round(time.perf_counter() - PROCESS_STARTED, 3)
+        startup_status['state'] = 'ready'
+        for phase in ('load', 'warmup', 'ready'):
+            metrics.STARTUP_SECONDS.set(startup_status[f'{phase}_seconds'], phase=phase)
+        print(f"Server ready in {startup_status['ready_seconds']:.2f}s "
+              f"(load {startup_status['load_seconds']:.2f}s, warmup {startup_status['warmup_seconds']:.2f}s)")
         
-        return cv_image
+        # Job yang masuk selama loading mulai diproses setelah ready
+        if job_store is not None:
+            job_dispatcher_task = asyncio.create_task(run_job_dispatcher())
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f'Invalid image data: {str(e)}')
+        startup_status['state'] = 'failed'
+        startup_status['error'] = str(e)
+        print(f'Startup failed: {e}')
 
-def encode_image_to_base64(image: np.ndarray) -> str:
-    """Konversi OpenCV image ke base64 string"""
-    try:
-        _, buffer = cv2.imencode('.png', image)
-        image_base64 = base64.b64encode(buffer).decode('utf-8')
-        return f'data:image/png;base64,{image_base64}'
-    except Exception as e:
-        print(f'Error encoding image: {e}')
+def is_ready() -> bool:
+    return startup_status['state'] == 'ready'
+
+def require_ready():
+    """Tolak request analisis dengan 503 + Retry-After selama model belum siap"""
+    if is_ready():
+        return
+    detail = f"Server not ready: {startup_status['state']}"
+    if startup_status['error']:
+        detail += f" ({startup_status['error']})"
+    raise HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={'Retry-After': str(settings.NOT_READY_RETRY_AFTER_SECONDS)},
+    )
+
+@app.on_event('startup')
+async def start_background_workers():
+    """Jalankan background task saat server start (model dimuat setelah server menerima koneksi)"""
+    global startup_task, job_store
+    await detection_batcher.start()
+    if settings.JOBS_ENABLED:
+        try:
+            job_store = await asyncio.to_thread(JobStore, settings.JOBS_DB_PATH, settings.JOBS_MAX_ATTEMPTS)
+        except Exception as e:
+            print(f'Job store unavailable ({settings.JOBS_DB_PATH}): {e}')
+    startup_task = asyncio.create_task(load_components())
+
+@app.on_event('shutdown')
+async def stop_background_workers():
+    """Hentikan background task saat server berhenti"""
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+    if job_dispatcher_task is not None:
+        # Job yang sedang berjalan tetap 'running' di database dan diulang saat server start lagi
+        job_dispatcher_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await job_dispatcher_task
+    await detection_batcher.stop()
+    if worker_pool is not None:
+        await worker_pool.stop()
+    pipeline_executor.shutdown()
+    if job_store is not None:
+        job_store.close()
+
+class ImageRequest(BaseModel):
+    """Model untuk request gambar dari frontend"""
+    image: str
+    overlay: str = 'image'  # 'image' (PNG base64), 'geometry' (render via /render/{render_id}) atau 'none'
+    multi_bottle: bool = False  # True = ukur semua botol dalam frame
+    camera_id: Optional[str] = None  # Kamera yang sudah dikalibrasi lewat /calibrate
+
+class JobRequest(BaseModel):
+    """Model untuk job asinkron dengan gambar base64"""
+    image: str
+    overlay: str = 'none'
+    multi_bottle: bool = False
+    camera_id: Optional[str] = None
+    priority: str = 'bulk'  # 'interactive' (kiosk) atau 'bulk' (back-office)
+
+class CalibrateRequest(BaseModel):
+    """Model untuk request kalibrasi kamera"""
+    image: str
+    camera_id: str
+    marker_size_cm: float = settings.CALIBRATION_MARKER_SIZE_CM
+    reference: Optional[str] = None  # Nama botol di katalog jika tidak memakai marker
+
+def calibration_namespace(camera_id: Optional[str], calibration) -> str:
+    """Bagian namespace result cache: hasil berbeda per kalibrasi kamera"""
+    if calibration is None:
         return ''
+    return f'-cal-{camera_id}-{calibration.created_at}'
+
+def admit(connection, shed: bool = True):
+    """
+    Admission control untuk request / frame interaktif (context manager yang menghasilkan AdmissionTicket)
+    Args:
+        connection: Request atau WebSocket; deadline dari header X-Deadline-Ms atau query ?deadline_ms=
+        shed: False = tidak pernah ditolak, hanya didegradasi
+    """
+    if load_shedder is None:
+        return contextlib.nullcontext()
+    value = connection.headers.get('x-deadline-ms') or connection.query_params.get('deadline_ms')
+    try:
+        deadline_ms = float(value) if value else None
+    except ValueError:
+        deadline_ms = None
+    return load_shedder.admit(deadline_ms, shed)
+
+def shed_exception(error: Overloaded) -> HTTPException:
+    """Response 429/503 + Retry-After untuk request yang ditolak load shedder"""
+    return HTTPException(status_code=error.status_code, detail=error.detail,
+                         headers={'Retry-After': str(error.retry_after)})
+
+def degradation_namespace(ticket) -> str:
+    """Bagian namespace result cache: hasil terdegradasi tidak dipakai untuk request level lain"""
+    return f'-deg{ticket.level}' if ticket is not None and ticket.level else ''
+
+def profiling_requested(request: Request) -> bool:
+    """Profiling hanya jika diaktifkan di Settings dan diminta lewat header X-Profile atau query ?profile="""
+    if not settings.PROFILING_ENABLED:
+        return False
+    flag = request.headers.get('x-profile') or request.query_params.get('profile') or ''
+    return flag.lower() in ('1', 'true', 'yes')
 
 @app.post('/')
-async def analyze_bottle(request: ImageRequest):
+async def analyze_bottle(request: ImageRequest, http_request: Request):
     """
     Endpoint untuk analisis botol dengan pengukuran kontur detail
     
@@ -82,86 +328,816 @@ async def analyze_bottle(request: ImageRequest):
     3. Pengukuran dimensi berdasarkan analisis kontur
     4. Estimasi ukuran real dari konteks pengukuran
     5. Klasifikasi berdasarkan volume terukur
+    
+    Dengan header 'X-Profile: 1' (dan PROFILING_ENABLED) response berisi 'profile_id'
+    yang bisa diunduh lewat /profiles/{profile_id}.
     """
+    require_ready()
+    calibration = calibration_cache.get(request.camera_id)
+    with metrics.track_request('analyze') as tracked, interactive_gate.track():
+        async with profiling.profile_request('analyze', profile_store, profiling_requested(http_request)) as session:
+            try:
+                if request.overlay not in OVERLAY_MODES:
+                    return tracked.done({'error': f'Invalid overlay mode: {request.overlay}'})
+            
+                # Step 1: Decode gambar (dilewati jika frame yang sama sudah ada di cache)
+                with admit(http_request) as ticket:
+                    response = await analyze_cached(
+                        f'json-{request.overlay}-{int(request.multi_bottle)}'
+                        f'{calibration_namespace(request.camera_id, calibration)}',
+                        request.image, request.overlay, request.multi_bottle,
+                        pipeline.decode_base64_image, request.image, calibration=calibration, session=request.camera_id,
+                        ticket=ticket,
+                    )
+            
+            except Overloaded as e:
+                tracked.outcome = 'shed'
+                raise shed_exception(e)
+            except Exception as e:
+                print(f'Error in bottle measurement: {e}')
+                response = {'error': str(e)}
+        
+            if session is not None:
+                response['profile_id'] = session.id
+            return tracked.done(response)
+
+@app.post('/upload')
+async def analyze_bottle_upload(request: Request, reduce: int = 1, overlay: str = 'image', multi: bool = False,
+                                camera_id: Optional[str] = None):
+    """
+    Endpoint analisis botol dari upload biner (raw body atau multipart field 'file')
+    
+    Menerima JPEG/PNG/WebP tanpa base64/JSON dan decode langsung dengan OpenCV.
+    Query param 'reduce' (1, 2, 4, 8) mengaktifkan decode resolusi tereduksi,
+    'multi=true' mengukur semua botol dalam frame, 'profile=true' menyimpan profile request,
+    'camera_id' memakai kalibrasi kamera tersebut.
+    """
+    require_ready()
+    calibration = calibration_cache.get(camera_id)
+    with metrics.track_request('upload') as tracked, interactive_gate.track():
+        async with profiling.profile_request('upload', profile_store, profiling_requested(request)) as session:
+            try:
+                if overlay not in OVERLAY_MODES:
+                    return tracked.done({'error': f'Invalid overlay mode: {overlay}'})
+            
+                content_type = request.headers.get('content-type', '')
+            
+                if content_type.startswith('multipart/form-data'):
+                    form = await request.form()
+                    upload = form.get('file') or form.get('image')
+                    if upload is None or isinstance(upload, str):
+                        return tracked.done({'error': "Multipart upload must contain a 'file' field"})
+                    image_bytes = await upload.read()
+                else:
+                    image_bytes = await request.body()
+            
+                if not image_bytes:
+                    return tracked.done({'error': 'Empty image upload'})
+            
+                with admit(request) as ticket:
+                    response = await analyze_cached(
+                        f'upload-{overlay}-{int(multi)}-{reduce}{calibration_namespace(camera_id, calibration)}',
+                        image_bytes, overlay, multi,
+                        pipeline.decode_image_bytes, image_bytes, reduce, calibration=calibration, session=camera_id,
+                        ticket=ticket,
+                    )
+            
+                if 'error' not in response:
+                    # Koordinat pixel relatif terhadap gambar hasil decode tereduksi
+                    response['decode_scale'] = reduce
+            
+            except Overloaded as e:
+                tracked.outcome = 'shed'
+                raise shed_exception(e)
+            except Exception as e:
+                print(f'Error in bottle measurement: {e}')
+                response = {'error': str(e)}
+        
+            if session is not None:
+                response['profile_id'] = session.id
+            return tracked.done(response)
+
+@app.post('/batch')
+async def analyze_batch(request: Request, overlay: str = 'none', multi: bool = False, reduce: int = 1,
+                        camera_id: Optional[str] = None):
+    """
+    Endpoint batch: banyak gambar dalam satu request, hasil di-stream sebagai NDJSON
+    
+    Input: multipart berisi banyak file gambar dan/atau arsip tar/zip, atau raw body berupa arsip.
+    Setiap baris output adalah hasil satu gambar (urutan selesai, lihat field 'index'),
+    baris terakhir berisi 'summary'. Jumlah gambar yang diproses bersamaan dibatasi agar memori tetap datar.
+    """
+    require_ready()
+    if overlay not in OVERLAY_MODES:
+        return {'error': f'Invalid overlay mode: {overlay}'}
+    
+    content_type = request.headers.get('content-type', '')
+    
+    if content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        uploads = [
+            (value.filename, value.content_type, value.file)
+            for _, value in form.multi_items() if not isinstance(value, str)
+        ]
+        if not uploads:
+            return {'error': 'Batch upload must contain image files or an archive'}
+    else:
+        # Raw body berupa arsip: tulis ke spooled temp file agar tidak seluruhnya di memori
+        # (penulisan ke disk di thread, bukan di event loop)
+        archive = tempfile.SpooledTemporaryFile(max_size=settings.BATCH_ENDPOINT_SPOOL_BYTES)
+        async for chunk in request.stream():
+            await asyncio.to_thread(archive.write, chunk)
+        # Format zip/tar dideteksi dari isi arsip, bukan dari nama atau content type
+        kind = await asyncio.to_thread(archive_format, archive)
+        uploads = [(f'archive.{kind or "zip"}', content_type, archive)]
+    
+    # Arsip divalidasi sebelum response 200 dikirim; arsip rusak tidak bisa dilaporkan di tengah stream
+    for filename, upload_type, fileobj in uploads:
+        if content_type.startswith('multipart/form-data') and not is_archive_upload(filename, upload_type):
+            continue
+        if await asyncio.to_thread(archive_format, fileobj) is None:
+            for _, _, upload_file in uploads:
+                upload_file.close()
+            return JSONResponse(status_code=400, content={'error': f'Invalid or corrupt archive: {filename}'})
+    
+    return StreamingResponse(
+        stream_batch_results(uploads, overlay, multi, reduce, calibration_cache.get(camera_id)),
+        media_type='application/x-ndjson',
+    )
+
+async def stream_batch_results(uploads: list, overlay: str, multi: bool, reduce: int, calibration=None):
+    """Proses gambar batch dengan jendela in-flight terbatas dan yield satu baris NDJSON per gambar"""
+    items = iter_batch_items(uploads, settings.BATCH_ENDPOINT_MAX_IMAGE_BYTES)
+    started = time.perf_counter()
+    pending = set()
+    exhausted = False
+    total, errors = 0, 0
+    
+    async def process_one(index: int, name: str, image_bytes: bytes) -> dict:
+        with metrics.track_request('batch') as tracked:
+            try:
+                if not image_bytes:
+                    response = {'error': 'Empty or oversized image'}
+                else:
+                    image = await pipeline_executor.run(pipeline.decode_image_bytes, image_bytes, reduce)
+                    response = await analyze_image(image, overlay, multi=multi, calibration=calibration)
+            except Exception as e:
+                response = {'error': str(e)}
+            tracked.done(response)
+        return {'index': index, 'name': name, **response}
+    
+    aborted = None
     try:
-        # Step 1: Decode gambar
-        image = decode_base64_image(request.image)
-        original_image = image.copy()
+        try:
+            while True:
+                # Isi jendela in-flight; pembacaan file/arsip dilakukan di thread
+                while not exhausted and len(pending) < settings.BATCH_ENDPOINT_MAX_IN_FLIGHT:
+                    item = await asyncio.to_thread(next, items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    name, image_bytes = item
+                    pending.add(asyncio.create_task(process_one(total, name, image_bytes)))
+                    total += 1
+                
+                if not pending:
+                    break
+                
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    record = task.result()
+                    errors += 'error' in record
+                    yield to_ndjson(record)
+        except Exception as e:
+            # Mis. arsip rusak di tengah: status 200 sudah terkirim, laporkan sebagai baris error + summary
+            print(f'Batch aborted after {total} images: {e}')
+            aborted = str(e)
+            errors += 1
+            yield to_ndjson({'error': f'Batch aborted: {e}'})
         
-        # Step 2: YOLO Detection
-        print('Running YOLO detection...')
-        detections = yolo_detector.detect_bottles(image)
+        elapsed = time.perf_counter() - started
+        print(f'Batch complete: {total} images in {elapsed:.1f}s')
+        yield to_ndjson({'summary': {
+            'images': total,
+            'errors': errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'images_per_second': round(total / elapsed, 2) if elapsed > 0 else 0.0,
+            'aborted': aborted,
+        }})
+    finally:
+        # Client putus atau selesai: batalkan sisa task dan tutup file upload
+        for task in pending:
+            task.cancel()
+        for _, _, fileobj in uploads:
+            fileobj.close()
+
+async def analyze_cached(namespace: str, payload, overlay: str, multi: bool, decode_fn, *decode_args,
+                         calibration=None, session: Optional[str] = None, ticket=None) -> dict:
+    """
+    Decode + analisis dengan result cache berbasis hash konten. Request terdegradasi disimpan di namespace
+    sendiri, tapi lebih dulu memakai hasil kualitas penuh frame yang sama jika masih ada di cache
+    Args:
+        namespace: Parameter request yang mempengaruhi hasil (endpoint, mode overlay, reduce, kalibrasi),
+            tanpa level degradasi
+        payload: Isi gambar mentah untuk hash konten
+        overlay: Mode overlay
+        multi: True = mode multi-bottle
+        decode_fn: Fungsi decode di pipeline
+        *decode_args: Argumen untuk decode_fn
+        calibration: Kalibrasi kamera (None = skala ditebak)
+        session: Kunci state imgsz adaptif (camera_id)
+        ticket: AdmissionTicket load shedder (level degradasi + deadline), None = tanpa degradasi
+    Returns:
+        Dict response
+    """
+    degraded_namespace = namespace + degradation_namespace(ticket)
+    
+    async def compute():
+        image = await pipeline_executor.run(decode_fn, *decode_args)
         
-        if not detections:
-            return {'error': 'No bottles detected by YOLO'}
+        phash = None
+        if result_cache.perceptual:
+            phash = await pipeline_executor.run(pipeline.perceptual_hash, image)
+            for candidate in dict.fromkeys((namespace, degraded_namespace)):
+                similar = result_cache.find_similar(candidate, phash)
+                if similar is not None:
+                    print('Result cache: near-duplicate frame')
+                    return similar, phash
         
+        return await analyze_image(image, overlay, multi=multi, calibration=calibration, session=session,
+                                   ticket=ticket), phash
+    
+    # Request yang diprofile selalu dihitung ulang agar profile tidak kosong karena cache hit
+    if not settings.RESULT_CACHE_ENABLED or profiling.current() is not None:
+        response, _ = await compute()
+        return response
+    
+    full_quality = [content_key(namespace, payload)] if degraded_namespace != namespace else []
+    response = await result_cache.get_or_compute(content_key(degraded_namespace, payload), compute, full_quality)
+    if 'render_id' in response and overlay_cache.get(response['render_id']) is None:
+        # Data overlay entry cache sudah dibuang dari OverlayCache: render_id lama akan 404,
+        # geometri di 'overlay' tetap bisa dipakai client untuk menggambar sendiri
+        del response['render_id']
+    return response
+
+async def analyze_image(image, overlay: str = 'image', detections: list = None, multi: bool = False,
+                        calibration=None, session: Optional[str] = None, ticket=None,
+                        yield_point: Optional[Callable[[str], Awaitable]] = None) -> dict:
+    """
+    Jalankan deteksi dan pengukuran pada gambar yang sudah di-decode
+    Args:
+        image: Gambar BGR (OpenCV format)
+        overlay: 'image' untuk PNG base64, 'geometry' untuk geometri + render_id, 'none' tanpa overlay
+        detections: Deteksi yang sudah ada (mis. dari tracker), None = jalankan YOLO
+        multi: True = ukur semua deteksi, False = hanya deteksi dengan confidence tertinggi
+        calibration: Kalibrasi kamera; skala dipakai langsung tanpa heuristik
+        session: Kunci state imgsz adaptif (camera_id / stream), None = selalu YOLO_IMGSZ
+        ticket: AdmissionTicket load shedder; level-nya menurunkan imgsz, tahap kontur dan overlay,
+            deadline-nya dicek sebelum tahapan mahal
+        yield_point: Coroutine yang di-await sebelum setiap tahapan inference ('detection', 'measurement'),
+            dipakai job bulk untuk mengalah ke pekerjaan interaktif
+    Returns:
+        Dict response (dengan 'degradation_level'), atau dict berisi 'error'
+    """
+    level = ticket.level if ticket is not None else 0
+    if level >= LEVEL_NO_OVERLAY and overlay == 'image':
+        overlay = 'none'
+    
+    imgsz = None
+    if detections is None and adaptive_resolution is not None:
+        imgsz = adaptive_resolution.choose(session)
+    if detections is None and level >= LEVEL_SMALL_IMGSZ:
+        imgsz = min(imgsz or settings.YOLO_IMGSZ, settings.LOAD_SHED_IMGSZ)
+    
+    if ticket is not None:
+        ticket.check('detection')
+    if yield_point is not None:
+        await yield_point('detection')
+    
+    if detections is None and worker_pool is not None and profiling.current() is None:
+        try:
+            # Deteksi + pengukuran di worker inference; frame disalin sekali ke shared memory
+            response, detections, measurements = await worker_pool.run(
+                'analyze_frame', image, overlay, multi, calibration, imgsz, level
+            )
+            remember_resolution(session, image, detections)
+            if imgsz is not None:
+                response['inference_imgsz'] = imgsz
+            response['degradation_level'] = level
+            return remember_overlay(response, image, detections, measurements, overlay)
+        except (ValueError, WorkerUnavailable) as e:
+            # Frame terlalu besar untuk slot, atau worker mati / sedang dijalankan ulang
+            print(f'{e}, falling back to executor')
+    
+    # Step 2: YOLO Detection
+    if detections is None:
+        print('Running YOLO detection...' + (f' (imgsz {imgsz})' if imgsz else ''))
+        detections = await detect_image(image, imgsz)
+        # Saat degradasi, frame tanpa botol tidak dideteksi ulang di ukuran penuh
+        if level < LEVEL_SMALL_IMGSZ and pipeline.needs_full_size_retry(detections, imgsz):
+            if yield_point is not None:
+                await yield_point('detection')
+            detections = await detect_image(image)
+        remember_resolution(session, image, detections)
+    
+    if not detections:
+        return {'error': 'No bottles detected by YOLO', 'degradation_level': level}
+    
+    if ticket is not None:
+        ticket.check('measurement')
+    if yield_point is not None:
+        await yield_point('measurement')
+    
+    # Step 3-7: Kontur, dimensi, klasifikasi dan gambar hasil
+    if multi:
+        print(f'Measuring all {len(detections)} detections...')
+        response, measurements = await pipeline_executor.run(
+            pipeline.measure_all_bottles, image, detections, overlay, calibration, level
+        )
+    else:
         best_detection = max(detections, key=lambda x: x['confidence'])
         print(f'Best detection: confidence {best_detection["confidence"]:.2f}')
-        
-        # Step 3: Ekstrak dan analisis kontur detail
-        print('Extracting detailed bottle contour...')
-        bottle_data = size_calculator.extract_bottle_contour(image, best_detection['bbox'])
-        
-        if not bottle_data:
-            return {'error': 'Could not extract bottle contour for measurement'}
-        
-        # Step 4: Hitung dimensi berdasarkan pengukuran kontur
-        print('Calculating dimensions from contour measurements...')
-        dimensions = size_calculator.calculate_bottle_dimensions(bottle_data)
-        
-        if not dimensions:
-            return {'error': 'Could not calculate bottle dimensions'}
-        
-        # Step 5: Estimasi ukuran real dari konteks
-        print('Estimating real dimensions from measurement context...')
-        real_dimensions = size_calculator.estimate_real_dimensions_from_context(dimensions)
-        
-        # Step 6: Klasifikasi botol
-        print('Classifying bottle from measurements...')
-        classification = size_calculator.classify_bottle(
-            real_dimensions, 
-            settings.KNOWN_BOTTLE_SPECS, 
-            settings.CLASSIFICATION_TOLERANCE_PERCENT
+        detections = [best_detection]
+        response, measurement = await pipeline_executor.run(
+            pipeline.measure_bottle, image, best_detection, overlay, calibration, level
         )
-        
-        # Step 7: Buat gambar hasil dengan analisis detail
-        result_image = yolo_detector.draw_detections(original_image, [best_detection])
-        result_image = size_calculator.draw_detailed_analysis(
-            result_image, bottle_data, dimensions, real_dimensions
+        measurements = [measurement] if measurement is not None else None
+    
+    if imgsz is not None:
+        response['inference_imgsz'] = imgsz
+    response['degradation_level'] = level
+    return remember_overlay(response, image, detections, measurements, overlay)
+
+async def detect_image(image, imgsz: Optional[int] = None) -> list:
+    """Deteksi YOLO satu frame lewat batcher (langsung di executor jika request diprofile)"""
+    if profiling.current() is not None:
+        # Batcher berjalan di task sendiri; deteksi langsung agar masuk profile request ini
+        return (await pipeline_executor.run(pipeline.detect_batch, [image], imgsz))[0]
+    return await detection_batcher.detect(image, imgsz)
+
+def remember_resolution(session: Optional[str], image, detections: list):
+    """Simpan ukuran botol frame ini untuk memilih imgsz frame berikutnya di session yang sama"""
+    if adaptive_resolution is not None:
+        adaptive_resolution.update(session, image.shape, detections)
+
+def remember_overlay(response: dict, image, detections: list, measurements: list, overlay: str) -> dict:
+    """Untuk mode 'geometry', simpan frame + hasil pengukuran dan tambahkan render_id ke response"""
+    if measurements is not None and overlay == 'geometry':
+        # Gambar baru dirender saat diminta
+        response['render_id'] = overlay_cache.put({
+            'image': image,
+            'detections': detections,
+            'measurements': measurements,
+        })
+    return response
+
+@app.websocket('/ws')
+async def stream_frames(websocket: WebSocket, overlay: str = 'geometry', reduce: int = 1,
+                        track: bool = settings.TRACKING_ENABLED, camera_id: Optional[str] = None):
+    """
+    Mode streaming: client mengirim frame terus-menerus, server membalas hasil secara asinkron
+    
+    Frame biner (JPEG/PNG/WebP) atau teks (JSON {"image": data URL}). Jika server lebih lambat
+    dari kamera, hanya frame terbaru yang diproses sehingga tidak terjadi backlog.
+    Dengan track=true YOLO hanya dijalankan setiap N frame atau saat ada gerakan.
+    Dengan camera_id, skala dari kalibrasi kamera tersebut dipakai untuk setiap frame.
+    """
+    await websocket.accept()
+    
+    if not is_ready():
+        await websocket.send_json({'error': f"Server not ready: {startup_status['state']}",
+                                   'retry_after': settings.NOT_READY_RETRY_AFTER_SECONDS})
+        await websocket.close(code=1013)  # Try Again Later
+        return
+    
+    if overlay not in OVERLAY_MODES:
+        await websocket.send_json({'error': f'Invalid overlay mode: {overlay}'})
+        await websocket.close()
+        return
+    
+    slot = LatestFrameSlot()
+    tracker = None
+    if track:
+        tracker = BottleTracker(
+            detect_every_n=settings.TRACKING_DETECT_EVERY_N,
+            motion_threshold=settings.TRACKING_MOTION_THRESHOLD,
+            min_match_score=settings.TRACKING_MIN_MATCH_SCORE,
+            search_margin=settings.TRACKING_SEARCH_MARGIN,
         )
+    processor = asyncio.create_task(process_stream(websocket, slot, overlay, reduce, tracker, camera_id))
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message.get('bytes') is not None:
+                slot.put(('bytes', message['bytes']))
+            elif message.get('text') is not None:
+                slot.put(('text', message['text']))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        processor.cancel()
+        if adaptive_resolution is not None:
+            adaptive_resolution.forget(f'stream-{id(websocket)}')
+        print(f'Stream closed: {slot.received} frames received, {slot.dropped} dropped')
+
+async def process_stream(websocket: WebSocket, slot: LatestFrameSlot, overlay: str, reduce: int,
+                         tracker: BottleTracker = None, camera_id: Optional[str] = None):
+    """Ambil frame terbaru dari slot, analisis, lalu kirim hasilnya ke client"""
+    # Setiap stream punya state imgsz adaptif sendiri
+    session = f'stream-{id(websocket)}'
+    while True:
+        frame_id, (kind, payload) = await slot.get()
+        started = time.perf_counter()
         
-        # Response dengan data pengukuran lengkap
-        response = {
-            'classification': classification['classification'],
-            'confidence_percent': classification['confidence_percent'],
-            'real_height_cm': real_dimensions['real_height_cm'],
-            'real_diameter_cm': real_dimensions['real_diameter_cm'],
-            'estimated_volume_ml': real_dimensions['estimated_volume_ml'],
-            'detection_method': 'YOLO + OpenCV Contour Measurement',
-            'yolo_confidence': best_detection['confidence'],
-            'measurement_details': {
-                'height_pixels': dimensions['height_pixels'],
-                'diameter_pixels': dimensions['diameter_pixels'],
-                'measurement_confidence': real_dimensions['measurement_confidence'],
-                'estimated_scale': real_dimensions['estimated_scale_ppm'],
-                'solidity': dimensions['solidity_factor'],
-                'aspect_ratio': dimensions['aspect_ratio']
-            },
-            'processed_image': encode_image_to_base64(result_image)
-        }
+        # Frame stream tidak ditolak (slot sudah membuang frame lama), hanya didegradasi
+        with metrics.track_request('stream') as tracked, interactive_gate.track(), \
+                admit(websocket, shed=False) as ticket:
+            try:
+                if kind == 'bytes':
+                    image = await pipeline_executor.run(pipeline.decode_image_bytes, payload, reduce)
+                else:
+                    image = await pipeline_executor.run(pipeline.decode_base64_image, parse_text_frame(payload))
+                
+                # Dibaca per frame agar kalibrasi ulang langsung berlaku di stream yang sedang berjalan
+                calibration = calibration_cache.get(camera_id)
+                if tracker is not None:
+                    detections, source = await detect_with_tracker(tracker, image)
+                    response = await analyze_image(image, overlay, detections, calibration=calibration, ticket=ticket)
+                    response['detection_source'] = source
+                else:
+                    response = await analyze_image(image, overlay, calibration=calibration, session=session,
+                                                   ticket=ticket)
+            except Exception as e:
+                print(f'Error in stream frame {frame_id}: {e}')
+                response = {'error': str(e)}
+            tracked.done(response)
         
-        print(f"Measurement complete: {classification['classification']} ({real_dimensions['estimated_volume_ml']}mL)")
-        return response
+        response['frame_id'] = frame_id
+        response['dropped_frames'] = slot.dropped
+        response['processing_ms'] = round((time.perf_counter() - started) * 1000, 1)
         
+        try:
+            await websocket.send_json(response)
+        except Exception:
+            # Client sudah putus, receiver akan membatalkan task ini
+            return
+
+async def detect_with_tracker(tracker: BottleTracker, image):
+    """
+    Deteksi dengan tracker: YOLO penuh hanya saat diperlukan, selain itu bbox dibawa oleh tracker
+    
+    State tracker ada di proses utama, jadi langkah tracker dijalankan di thread pool default.
+    Returns:
+        Tuple (list deteksi, sumber deteksi 'yolo' / 'tracker')
+    """
+    if not await asyncio.to_thread(tracker.needs_detection, image):
+        tracked = await asyncio.to_thread(tracker.track, image)
+        if tracked is not None:
+            return [tracked], 'tracker'
+    
+    detections = await detection_batcher.detect(image)
+    await asyncio.to_thread(tracker.update_detection, image, detections)
+    return detections, 'yolo'
+
+@app.post('/calibrate')
+async def calibrate_camera(request: CalibrateRequest):
+    """
+    Kalibrasi skala kamera dari satu frame berisi marker ArUco (atau botol referensi)
+    
+    Hasilnya disimpan per camera_id; request analisis dengan camera_id yang sama memakai skala ini
+    (tanpa heuristik ukuran tipikal dan tanpa mencari marker lagi) sampai kalibrasi kadaluarsa.
+    """
+    require_ready()
+    try:
+        image = await pipeline_executor.run(pipeline.decode_base64_image, request.image)
+        calibration = await pipeline_executor.run(
+            pipeline.calibrate, image, request.marker_size_cm, settings.CALIBRATION_MARKER_DICT, request.reference
+        )
     except Exception as e:
-        print(f'Error in bottle measurement: {e}')
+        print(f'Calibration failed: {e}')
         return {'error': str(e)}
+    
+    calibration_cache.put(request.camera_id, calibration)
+    print(f'Camera {request.camera_id} calibrated: {calibration.pixels_per_cm:.2f} pixels/cm ({calibration.source})')
+    return calibration_info(request.camera_id, calibration)
+
+@app.get('/calibrate/{camera_id}')
+async def get_calibration(camera_id: str):
+    """Kalibrasi kamera yang sedang berlaku"""
+    calibration = calibration_cache.get(camera_id)
+    if calibration is None:
+        raise HTTPException(status_code=404, detail='Camera not calibrated or calibration expired')
+    return calibration_info(camera_id, calibration)
+
+@app.delete('/calibrate/{camera_id}')
+async def delete_calibration(camera_id: str):
+    """Hapus kalibrasi kamera (frame berikutnya kembali memakai estimasi skala)"""
+    if not calibration_cache.delete(camera_id):
+        raise HTTPException(status_code=404, detail='Camera not calibrated or calibration expired')
+    return {'camera_id': camera_id, 'deleted': True}
+
+def calibration_info(camera_id: str, calibration) -> dict:
+    expires_in = calibration_cache.expires_in(camera_id)
+    return {
+        'camera_id': camera_id,
+        'calibration': calibration.to_dict(),
+        'expires_in_seconds': round(expires_in, 1) if expires_in is not None else None,
+    }
+
+def require_jobs():
+    if not settings.JOBS_ENABLED:
+        raise HTTPException(status_code=404, detail='Job API disabled')
+    if job_store is None:
+        raise HTTPException(status_code=503, detail='Job store unavailable')
+
+@app.post('/jobs')
+async def submit_job(request: Request, overlay: str = 'none', multi: bool = False, reduce: int = 1,
+                     camera_id: Optional[str] = None, priority: str = 'bulk'):
+    """
+    Job analisis asinkron: langsung mengembalikan job_id, hasil diambil lewat GET /jobs/{job_id}
+    (polling) atau GET /jobs/{job_id}/events (server-sent events)
+    
+    Body JSON (seperti POST /, ditambah 'priority') atau gambar biner / multipart seperti /upload
+    dengan parameter di query. Job 'interactive' diambil lebih dulu dari job 'bulk', dan job bulk
+    mengalah di antara tahapan selama ada request interaktif. Job diterima walaupun model belum ready.
+    """
+    require_jobs()
+    content_type = request.headers.get('content-type', '')
+    
+    if content_type.startswith('application/json'):
+        try:
+            body = JobRequest(**await request.json())
+        except Exception as e:
+            return {'error': f'Invalid job request: {e}'}
+        overlay, multi, camera_id, priority = body.overlay, body.multi_bottle, body.camera_id, body.priority
+        params = {'kind': 'base64'}
+        payload = body.image.encode()
+    elif content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get('file') or form.get('image')
+        if upload is None or isinstance(upload, str):
+            return {'error': "Multipart upload must contain a 'file' field"}
+        params = {'kind': 'bytes', 'reduce': reduce}
+        payload = await upload.read()
+    else:
+        params = {'kind': 'bytes', 'reduce': reduce}
+        payload = await request.body()
+    
+    if overlay not in OVERLAY_MODES:
+        return {'error': f'Invalid overlay mode: {overlay}'}
+    if priority not in PRIORITIES:
+        return {'error': f'Invalid priority: {priority} (expected one of {tuple(PRIORITIES)})'}
+    if not payload:
+        return {'error': 'Empty image upload'}
+    if len(payload) > settings.JOBS_MAX_PAYLOAD_BYTES:
+        raise HTTPException(status_code=413, detail='Image too large for job queue')
+    
+    await refresh_job_counts()
+    if sum(job_counts['queued'].values()) >= settings.JOBS_MAX_QUEUED:
+        raise HTTPException(status_code=429, detail='Job queue full',
+                            headers={'Retry-After': str(settings.JOBS_RETRY_AFTER_SECONDS)})
+    
+    params.update(overlay=overlay, multi=multi, camera_id=camera_id)
+    job_id = await asyncio.to_thread(job_store.submit, payload, params, priority)
+    job_wakeup.set()
+    return JSONResponse(status_code=202, content={
+        'job_id': job_id,
+        'state': 'queued',
+        'priority': priority,
+        'status_url': f'/jobs/{job_id}',
+        'events_url': f'/jobs/{job_id}/events',
+    })
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str):
+    """Status job; setelah selesai berisi 'result' (response analisis) atau 'error'"""
+    require_jobs()
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found or expired')
+    return job
+
+@app.get('/jobs/{job_id}/events')
+async def job_events(job_id: str):
+    """
+    Progress job sebagai server-sent events: event 'progress' setiap state/tahapan berubah,
+    diakhiri event 'done' atau 'failed' berisi status lengkap
+    """
+    require_jobs()
+    update = job_update_event
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found or expired')
+    return StreamingResponse(stream_job_events(job_id, job, update), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache'})
+
+async def stream_job_events(job_id: str, job: dict, update: asyncio.Event):
+    """Kirim event setiap status job berubah sampai job selesai"""
+    last = None
+    while True:
+        marker = (job['state'], job['stage'], job.get('position'))
+        if marker != last:
+            last = marker
+            yield to_sse_event(job['state'] if job['state'] in FINAL_STATES else 'progress', job)
+        if job['state'] in FINAL_STATES:
+            return
+        
+        try:
+            await asyncio.wait_for(update.wait(), settings.JOBS_EVENT_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield ': keepalive\n\n'
+        # Event diambil sebelum membaca status agar perubahan di antaranya tidak terlewat
+        update = job_update_event
+        job = await asyncio.to_thread(job_store.get, job_id)
+        if job is None:
+            return
+
+def notify_job_update():
+    """Bangunkan semua stream SSE job (event diganti baru agar stream menunggu perubahan berikutnya)"""
+    global job_update_event
+    job_update_event.set()
+    job_update_event = asyncio.Event()
+
+async def refresh_job_counts():
+    """Perbarui cache jumlah job dari database (query di thread pool)"""
+    global job_counts
+    job_counts = await asyncio.to_thread(job_store.counts)
+
+async def run_job_dispatcher():
+    """
+    Ambil job dari antrian (prioritas lebih dulu) selama ada slot job kosong.
+    Error satu iterasi (mis. database terkunci) dicatat lalu dispatcher tetap berjalan
+    """
+    try:
+        requeued = await asyncio.to_thread(job_store.requeue_interrupted)
+        if requeued:
+            print(f'Requeued {requeued} interrupted job(s)')
+    except Exception as e:
+        print(f'Could not requeue interrupted jobs: {e}')
+    
+    running = set()
+    last_purge = 0.0
+    try:
+        while True:
+            job_wakeup.clear()
+            try:
+                running = {task for task in running if not task.done()}
+                if len(running) < settings.JOBS_MAX_CONCURRENCY:
+                    job = await asyncio.to_thread(job_store.claim)
+                    if job is not None:
+                        notify_job_update()
+                        running.add(asyncio.create_task(run_job(job)))
+                        continue
+                
+                if time.monotonic() - last_purge > JOB_PURGE_INTERVAL_SECONDS:
+                    last_purge = time.monotonic()
+                    await asyncio.to_thread(job_store.purge, settings.JOBS_RETENTION_SECONDS)
+                await refresh_job_counts()
+            except Exception as e:
+                print(f'Job dispatcher error: {e}')
+            
+            # Dibangunkan oleh job baru atau job selesai, polling hanya sebagai cadangan
+            try:
+                await asyncio.wait_for(job_wakeup.wait(), settings.JOBS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for task in running:
+            task.cancel()
+
+async def run_job(job: dict):
+    """Proses satu job dengan pipeline yang sama dengan endpoint sinkron lalu simpan hasilnya"""
+    job_id, params = job['job_id'], job['params']
+    bulk = job['priority'] == 'bulk'
+    # Job interactive dihitung seperti request kiosk sehingga job bulk mengalah kepadanya
+    with metrics.track_request('job') as tracked, \
+            (contextlib.nullcontext() if bulk else interactive_gate.track()):
+        try:
+            await set_job_stage(job_id, 'decode', bulk)
+            if params['kind'] == 'base64':
+                image = await pipeline_executor.run(pipeline.decode_base64_image, job['payload'].decode())
+            else:
+                image = await pipeline_executor.run(pipeline.decode_image_bytes, job['payload'], params['reduce'])
+            
+            # Kalibrasi dibaca saat job berjalan (bisa berbeda dengan saat job dikirim)
+            calibration = calibration_cache.get(params['camera_id'])
+            # Job bulk juga mengalah sebelum deteksi dan sebelum pengukuran (setiap panggilan inference)
+            response = await analyze_image(image, params['overlay'], multi=params['multi'],
+                                           calibration=calibration, session=params['camera_id'],
+                                           yield_point=lambda stage: set_job_stage(job_id, stage, bulk))
+            if 'error' not in response and params['kind'] == 'bytes':
+                response['decode_scale'] = params['reduce']
+            tracked.done(response)
+            await asyncio.to_thread(job_store.complete, job_id, response)
+        except Exception as e:
+            print(f'Job {job_id} failed: {e}')
+            await asyncio.to_thread(job_store.fail, job_id, str(e))
+    
+    notify_job_update()
+    job_wakeup.set()
+
+async def set_job_stage(job_id: str, stage: str, bulk: bool):
+    """
+    Catat tahapan job; job bulk menunggu dulu selama ada pekerjaan interaktif (maks. per tahapan).
+    Dipanggil sebelum decode, deteksi dan pengukuran: panggilan inference yang sudah berjalan tidak diinterupsi
+    """
+    if bulk and interactive_gate.active:
+        await asyncio.to_thread(job_store.set_stage, job_id, f'waiting_for_interactive:{stage}')
+        notify_job_update()
+        await interactive_gate.wait_idle(settings.JOBS_BULK_MAX_YIELD_SECONDS)
+    await asyncio.to_thread(job_store.set_stage, job_id, stage)
+    notify_job_update()
+
+@app.get('/render/{render_id}')
+async def render_overlay(render_id: str, format: str = 'jpeg', quality: int = settings.RENDER_DEFAULT_QUALITY,
+                         max_width: int = 0):
+    """
+    Render gambar overlay dari hasil analisis mode 'geometry'
+    
+    Query params: format (jpeg/webp/png), quality (1-100), max_width (preview diperkecil, 0 = penuh)
+    """
+    require_ready()
+    entry = overlay_cache.get(render_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail='Render data not found or expired')
+    
+    if format not in pipeline.OVERLAY_FORMATS:
+        raise HTTPException(status_code=400, detail=f'Unsupported overlay format: {format}')
+    
+    content, media_type = await pipeline_executor.run(
+        pipeline.render_overlay_bytes,
+        entry['image'], entry['detections'], entry['measurements'],
+        format, quality, max_width or None,
+    )
+    return Response(content=content, media_type=media_type)
+
+@app.get('/profiles/{profile_id}')
+async def download_profile(profile_id: str, format: str = 'json'):
+    """
+    Unduh profile request: format 'json' (ringkasan tahapan + fungsi teratas)
+    atau 'pstats' (file .prof untuk pstats / snakeviz)
+    """
+    if format not in ('json', 'pstats'):
+        raise HTTPException(status_code=400, detail=f'Unsupported profile format: {format}')
+    
+    path = profile_store.path(profile_id, 'json' if format == 'json' else 'prof')
+    if path is None:
+        raise HTTPException(status_code=404, detail='Profile not found')
+    
+    if format == 'json':
+        return FileResponse(path, media_type='application/json')
+    return FileResponse(path, media_type='application/octet-stream', filename=f'{profile_id}.prof')
+
+@app.get('/metrics')
+async def metrics_endpoint():
+    """Metrics format Prometheus: latency per tahapan, outcome request, in-flight dan info model"""
+    return Response(content=metrics.registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.get('/ready')
+async def readiness_check():
+    """
+    Readiness probe: 200 setelah model dimuat dan warmup selesai, selain itu 503
+    (juga 503 jika worker inference aktif tapi tidak ada yang hidup)
+    """
+    ready = is_ready()
+    body = {'ready': ready, **startup_status}
+    if ready and worker_pool is not None and worker_pool.alive_workers == 0:
+        ready = False
+        body.update(ready=False, error='No live inference workers')
+    if not ready:
+        return JSONResponse(status_code=503, content=body,
+                            headers={'Retry-After': str(settings.NOT_READY_RETRY_AFTER_SECONDS)})
+    return body
 
 @app.get('/health')
 async def health_check():
-    """Endpoint untuk cek status server"""
+    """Endpoint untuk cek status server (liveness, tetap 200 selama model dimuat)"""
+    yolo_available = pipeline.yolo_detector is not None and pipeline.yolo_detector.model is not None
     return {
         'status': 'healthy',
-        'yolo_available': yolo_detector.model is not None,
-        'device': yolo_detector.device if yolo_detector.model else 'none'
+        'yolo_available': yolo_available,
+        'device': pipeline.yolo_detector.device if yolo_available else 'none',
+        'readiness': {
+            'ready': is_ready(),
+            'state': startup_status['state'],
+            'detection_queue_depth': detection_batcher.queue_depth,
+            'executor_in_flight': pipeline_executor.in_flight,
+            'executor_max_concurrency': pipeline_executor.max_concurrency,
+        },
+        'result_cache': result_cache.stats(),
+        'calibration_cache': calibration_cache.stats(),
+        'adaptive_imgsz': adaptive_resolution.stats() if adaptive_resolution is not None else None,
+        'catalog': pipeline.catalog_store.get().info() if pipeline.catalog_store is not None else None,
+        'executor': {
+            'mode': pipeline_executor.mode,
+            'max_workers': pipeline_executor.max_workers,
+            'in_flight': pipeline_executor.in_flight,
+        },
+        'inference_workers': worker_pool.stats() if worker_pool is not None else None,
+        'jobs': job_counts if job_store is not None else None,
+        'load_shedding': load_shedder.stats() if load_shedder is not None else None,
+        'interactive_in_flight': interactive_gate.active,
     }
\ No newline at end of file
@@ -0,0 +1,533 @@
+# File: backend/hybrid-detection/src/api/pipeline.py
+# Fungsi: Tahapan pipeline analisis (CPU-bound) yang dijalankan di executor, bukan di event loop
+import cv2
+import numpy as np
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image as PILImage
+from typing import List, Optional, Tuple
+
+from api.load_shedding import LEVEL_CHEAP_CONTOUR, LEVEL_SMALL_IMGSZ
+from detection.yolo_detector import YOLOBottleDetector
+from image_processing.size_calculator import OpenCVSizeCalculator
+from image_processing.batch_measurements import measure_batch
+from image_processing.catalog import CatalogStore
+from image_processing.calibration import Calibration, calibrate_from_marker, calibrate_from_object
+from config.settings import settings
+from inference import cpu_budget
+from monitoring import metrics, profiling
+
+# Flag imdecode untuk decode resolusi tereduksi (faktor -> flag OpenCV)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Format encode untuk endpoint render (format -> (ekstensi, media type, flag quality))
+OVERLAY_FORMATS = {
+    'png': ('.png', 'image/png', None),
+    'jpeg': ('.jpg', 'image/jpeg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('.webp', 'image/webp', cv2.IMWRITE_WEBP_QUALITY),
+}
+
+# Komponen per proses (diisi oleh init_components, juga di setiap worker process)
+yolo_detector = None
+size_calculator = None
+catalog_store = None
+
+# Pool untuk pengukuran ROI paralel pada mode multi-bottle (OpenCV melepas GIL)
+_roi_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_roi_pool() -> ThreadPoolExecutor:
+    global _roi_pool
+    if _roi_pool is None:
+        _roi_pool = ThreadPoolExecutor(max_workers=settings.MULTI_BOTTLE_WORKERS, thread_name_prefix='roi')
+    return _roi_pool
+
+def init_components():
+    """
+    Inisialisasi detector dan calculator
+    Raises:
+        RuntimeError: Jika model YOLO tidak bisa dimuat (komponen dikembalikan ke None)
+    """
+    global yolo_detector, size_calculator, catalog_store
+
+    try:
+        print("Initializing YOLO detector...")
+        yolo_detector = YOLOBottleDetector(confidence=settings.YOLO_CONFIDENCE, roi=settings.INFERENCE_ROI)
+        if yolo_detector.model is None:
+            raise RuntimeError(f'YOLO model could not be loaded ({yolo_detector.backend_name})')
+
+        print("Initializing size calculator...")
+        size_calculator = OpenCVSizeCalculator(
+            cascade=settings.CONTOUR_CASCADE_ENABLED,
+            cascade_max_side=settings.CONTOUR_CASCADE_MAX_SIDE,
+            cascade_min_confidence=settings.CONTOUR_CASCADE_MIN_CONFIDENCE,
+        )
+
+        # Katalog SKU dari file (dimuat ulang otomatis saat file berubah), fallback ke KNOWN_BOTTLE_SPECS
+        catalog_store = CatalogStore(
+            settings.BOTTLE_CATALOG_PATH,
+            settings.KNOWN_BOTTLE_SPECS,
+            settings.CATALOG_RELOAD_CHECK_SECONDS,
+        )
+
+        print("All components initialized successfully")
+    except Exception as e:
+        print(f"Error initializing components: {e}")
+        yolo_detector = None
+        size_calculator = None
+        raise
+
+def warmup(iterations: int = 3) -> float:
+    """
+    Inference dummy agar alokasi memori, inisialisasi kernel dan lazy init backend
+    tidak terjadi di request pertama
+    Args:
+        iterations: Jumlah forward pass satu frame (ditambah satu pass ukuran batch penuh)
+    Returns:
+        Durasi warmup dalam detik
+    """
+    started = time.perf_counter()
+    size = settings.YOLO_IMGSZ
+    frame = np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8)
+
+    for _ in range(iterations):
+        yolo_detector.detect_bottles_batch([frame])
+    if settings.BATCH_MAX_SIZE > 1:
+        yolo_detector.detect_bottles_batch([frame] * settings.BATCH_MAX_SIZE)
+    if settings.ADAPTIVE_IMGSZ_ENABLED:
+        # Setiap ukuran adaptif dipanaskan sekali (backend bisa menyiapkan ulang graph per ukuran)
+        for imgsz in settings.ADAPTIVE_IMGSZ_SIZES:
+            yolo_detector.detect_bottles_batch([frame], imgsz)
+    if settings.LOAD_SHED_ENABLED and settings.LOAD_SHED_IMGSZ != size:
+        # Ukuran input saat degradasi beban
+        yolo_detector.detect_bottles_batch([frame], settings.LOAD_SHED_IMGSZ)
+
+    # Jalur OpenCV (kontur + encode) juga dipanaskan sekali
+    size_calculator.extract_bottle_contour(frame, [0, 0, size, size])
+    encode_image_to_base64(frame[:64, :64])
+
+    elapsed = time.perf_counter() - started
+    print(f'Warmup complete in {elapsed:.2f}s')
+    return elapsed
+
+def init_worker():
+    """Initializer worker process: budget thread, muat komponen lalu warmup sebelum menerima task"""
+    cpu_budget.apply_settings_budget()
+    init_components()
+    warmup(settings.WARMUP_ITERATIONS)
+
+def worker_pid() -> int:
+    """Task kosong untuk memaksa worker process dibuat (dan di-warmup) saat startup"""
+    return os.getpid()
+
+def decode_base64_image(base64_string: str) -> np.ndarray:
+    """Konversi base64 string ke OpenCV image"""
+    try:
+        if base64_string.startswith('data:image'):
+            base64_string = base64_string.split(',')[1]
+
+        with metrics.stage('decode'):
+            image_data = base64.b64decode(base64_string)
+            pil_image = PILImage.open(BytesIO(image_data))
+            cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+
+        return cv_image
+    except Exception as e:
+        raise ValueError(f'Invalid image data: {str(e)}')
+
+def decode_image_bytes(image_bytes: bytes, reduce: int = 1) -> np.ndarray:
+    """
+    Decode raw bytes JPEG/PNG/WebP langsung ke BGR array dengan OpenCV
+    Args:
+        image_bytes: Isi file gambar
+        reduce: Faktor pengecilan saat decode (1, 2, 4 atau 8)
+    Returns:
+        Gambar BGR (OpenCV format)
+    """
+    if reduce not in REDUCED_DECODE_FLAGS:
+        raise ValueError(f'Invalid reduce factor: {reduce} (expected one of {sorted(REDUCED_DECODE_FLAGS)})')
+
+    # frombuffer tidak menyalin data, imdecode langsung menghasilkan BGR
+    with metrics.stage('decode'):
+        buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+        cv_image = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[reduce])
+
+    if cv_image is None:
+        raise ValueError('Invalid image data: unsupported or corrupt image')
+
+    return cv_image
+
+def encode_image_to_base64(image: np.ndarray) -> str:
+    """Konversi OpenCV image ke base64 string"""
+    try:
+        with metrics.stage('encode'):
+            _, buffer = cv2.imencode('.png', image)
+            image_base64 = base64.b64encode(buffer).decode('utf-8')
+        return f'data:image/png;base64,{image_base64}'
+    except Exception as e:
+        print(f'Error encoding image: {e}')
+        return ''
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """dHash 64-bit untuk mendeteksi frame yang hampir sama"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+def detect_batch(images: List[np.ndarray], imgsz: Optional[int] = None) -> List[List[dict]]:
+    """Jalankan deteksi YOLO batch dengan detector milik proses ini (imgsz None = YOLO_IMGSZ)"""
+    with metrics.stage('detect'):
+        return yolo_detector.detect_bottles_batch(images, imgsz)
+
+def needs_full_size_retry(detections: List[dict], imgsz: Optional[int]) -> bool:
+    """Frame tanpa botol pada imgsz adaptif yang lebih kecil dideteksi ulang di ukuran default"""
+    return (not detections and settings.ADAPTIVE_IMGSZ_RETRY_ON_MISS
+            and imgsz is not None and imgsz < settings.YOLO_IMGSZ)
+
+def calibrated_scale(calibration: Optional[Calibration], detection: dict) -> Optional[float]:
+    """Skala pixel/cm kalibrasi di pusat bbox deteksi, None jika kamera belum dikalibrasi"""
+    if calibration is None:
+        return None
+    x1, y1, x2, y2 = detection['bbox']
+    return calibration.scale_at(((x1 + x2) / 2, (y1 + y2) / 2))
+
+def measure_detection(image: np.ndarray, detection: dict, calibration: Optional[Calibration] = None,
+                      degradation_level: int = 0) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Kontur, dimensi, ukuran real dan klasifikasi untuk satu deteksi
+    Args:
+        image: Gambar original
+        detection: Deteksi YOLO
+        calibration: Kalibrasi kamera (None = skala ditebak dari ukuran botol tipikal)
+        degradation_level: Level degradasi beban (>= LEVEL_CHEAP_CONTOUR = tahap kontur termurah)
+    Returns:
+        Tuple (measurement, None) jika berhasil, atau (None, pesan error)
+    """
+    # Step 3: Ekstrak dan analisis kontur detail
+    print('Extracting detailed bottle contour...')
+    with metrics.stage('contour'):
+        bottle_data = size_calculator.extract_bottle_contour(image, detection['bbox'],
+                                                             degradation_level >= LEVEL_CHEAP_CONTOUR)
+
+    if not bottle_data:
+        return None, 'Could not extract bottle contour for measurement'
+
+    # Step 4: Hitung dimensi berdasarkan pengukuran kontur
+    print('Calculating dimensions from contour measurements...')
+    with metrics.stage('measure'):
+        dimensions = size_calculator.calculate_bottle_dimensions(bottle_data)
+
+        if not dimensions:
+            return None, 'Could not calculate bottle dimensions'
+
+        # Step 5: Estimasi ukuran real dari konteks
+        print('Estimating real dimensions from measurement context...')
+        real_dimensions = size_calculator.estimate_real_dimensions_from_context(
+            dimensions, calibrated_scale(calibration, detection))
+
+        # Step 6: Klasifikasi botol
+        print('Classifying bottle from measurements...')
+        classification = size_calculator.classify_bottle(
+            real_dimensions,
+            catalog_store.get(),
+            settings.CLASSIFICATION_TOLERANCE_PERCENT
+        )
+
+    return {
+        'bottle_data': bottle_data,
+        'dimensions': dimensions,
+        'real_dimensions': real_dimensions,
+        'classification': classification,
+    }, None
+
+def build_measurement_response(detection: dict, measurement: dict) -> dict:
+    """Response dengan data pengukuran lengkap untuk satu botol"""
+    dimensions = measurement['dimensions']
+    real_dimensions = measurement['real_dimensions']
+    classification = measurement['classification']
+
+    return {
+        'classification': classification['classification'],
+        'confidence_percent': classification['confidence_percent'],
+        'real_height_cm': real_dimensions['real_height_cm'],
+        'real_diameter_cm': real_dimensions['real_diameter_cm'],
+        'estimated_volume_ml': real_dimensions['estimated_volume_ml'],
+        'detection_method': 'YOLO + OpenCV Contour Measurement',
+        'yolo_confidence': detection['confidence'],
+        'nearest_sku': classification.get('nearest_sku'),
+        'measurement_details': {
+            'height_pixels': dimensions['height_pixels'],
+            'diameter_pixels': dimensions['diameter_pixels'],
+            'measurement_confidence': real_dimensions['measurement_confidence'],
+            'estimated_scale': real_dimensions['estimated_scale_ppm'],
+            'scale_source': real_dimensions['scale_confidence'],
+            'solidity': dimensions['solidity_factor'],
+            'aspect_ratio': dimensions['aspect_ratio']
+        }
+    }
+
+def measure_bottle(image: np.ndarray, best_detection: dict, overlay: str = 'image',
+                   calibration: Optional[Calibration] = None, degradation_level: int = 0) -> Tuple[dict, Optional[dict]]:
+    """
+    Tahap pengukuran setelah deteksi YOLO (kontur, dimensi, klasifikasi, gambar hasil)
+    Args:
+        image: Gambar original
+        best_detection: Deteksi YOLO yang dipilih
+        overlay: 'image' = sertakan processed_image (PNG), 'geometry' = geometri overlay, 'none' = tanpa overlay
+        calibration: Kalibrasi kamera, None = skala ditebak
+        degradation_level: Level degradasi beban
+    Returns:
+        Tuple (response, measurement). Jika gagal, response berisi 'error' dan measurement None
+    """
+    measurement, error = measure_detection(image, best_detection, calibration, degradation_level)
+    if error:
+        return {'error': error}, None
+
+    response = build_measurement_response(best_detection, measurement)
+
+    if overlay == 'image':
+        # Step 7: Buat gambar hasil dengan analisis detail
+        result_image = render_overlay(image, [best_detection], [measurement])
+        response['processed_image'] = encode_image_to_base64(result_image)
+    elif overlay == 'geometry':
+        response['overlay'] = overlay_geometry(image, best_detection, measurement['bottle_data'])
+
+    classification = measurement['classification']
+    print(f"Measurement complete: {classification['classification']} ({measurement['real_dimensions']['estimated_volume_ml']}mL)")
+    return response, measurement
+
+def measure_contours_batch(contours: List[Optional[dict]], detections: Optional[List[dict]] = None,
+                           calibration: Optional[Calibration] = None) -> List[Tuple[Optional[dict], Optional[str]]]:
+    """
+    Dimensi, ukuran real dan klasifikasi untuk banyak kontur dalam satu pass vektor
+    Args:
+        contours: Hasil extract_bottle_contour per deteksi (None jika gagal)
+        detections: Deteksi per kontur (untuk skala lokal kalibrasi)
+        calibration: Kalibrasi kamera, None = skala ditebak
+    Returns:
+        List tuple (measurement, None) atau (None, pesan error), format sama dengan measure_detection
+    """
+    extracted = [bottle_data for bottle_data in contours if bottle_data]
+    scales = None
+    if calibration is not None and detections is not None:
+        scales = [calibrated_scale(calibration, detection)
+                  for detection, bottle_data in zip(detections, contours) if bottle_data]
+    with metrics.stage('measure'):
+        computed = iter(measure_batch([bottle_data['measurements'] for bottle_data in extracted],
+                                      catalog_store.get(), settings.CLASSIFICATION_TOLERANCE_PERCENT,
+                                      scales))
+
+    results = []
+    for bottle_data in contours:
+        if not bottle_data:
+            results.append((None, 'Could not extract bottle contour for measurement'))
+            continue
+        dimensions, real_dimensions, classification = next(computed)
+        results.append(({
+            'bottle_data': bottle_data,
+            'dimensions': dimensions,
+            'real_dimensions': real_dimensions,
+            'classification': classification,
+        }, None))
+    return results
+
+def measure_all_bottles(image: np.ndarray, detections: List[dict], overlay: str = 'image',
+                        calibration: Optional[Calibration] = None,
+                        degradation_level: int = 0) -> Tuple[dict, Optional[List[dict]]]:
+    """
+    Mode multi-bottle: ukur semua deteksi dalam frame secara paralel
+    Args:
+        image: Gambar original
+        detections: Semua deteksi YOLO
+        overlay: 'image' = satu processed_image berisi semua botol, 'geometry' = geometri per botol,
+            'none' = tanpa overlay
+        calibration: Kalibrasi kamera, None = skala ditebak
+        degradation_level: Level degradasi beban
+    Returns:
+        Tuple (response, list measurement per deteksi; None untuk deteksi yang gagal diukur)
+    """
+    cheapest = degradation_level >= LEVEL_CHEAP_CONTOUR
+    # Kontur tiap deteksi diekstrak di worker pool, urutan hasil sama dengan urutan deteksi
+    with metrics.stage('contour'):
+        contours = list(_get_roi_pool().map(
+            profiling.profiled_task(
+                lambda detection: size_calculator.extract_bottle_contour(image, detection['bbox'], cheapest)),
+            detections))
+    results = measure_contours_batch(contours, detections, calibration)
+
+    bottles, measurements = [], []
+    for detection, (measurement, error) in zip(detections, results):
+        measurements.append(measurement)
+        if error:
+            bottles.append({'error': error, 'bbox': detection['bbox'], 'yolo_confidence': detection['confidence']})
+            continue
+
+        bottle = build_measurement_response(detection, measurement)
+        bottle['bbox'] = detection['bbox']
+        if overlay == 'geometry':
+            bottle['overlay'] = overlay_geometry(image, detection, measurement['bottle_data'])
+        bottles.append(bottle)
+
+    measured = [(d, m) for d, m in zip(detections, measurements) if m is not None]
+    if not measured:
+        return {'error': 'Could not extract bottle contour for measurement'}, None
+
+    response = {
+        'bottle_count': len(measured),
+        'detection_count': len(detections),
+        'detection_method': 'YOLO + OpenCV Contour Measurement',
+        'bottles': bottles,
+    }
+
+    if overlay == 'image':
+        result_image = render_overlay(image, [d for d, _ in measured], [m for _, m in measured])
+        response['processed_image'] = encode_image_to_base64(result_image)
+
+    print(f'Multi-bottle measurement complete: {len(measured)}/{len(detections)} bottles measured')
+    return response, measurements
+
+def analyze_frame(image: np.ndarray, overlay: str = 'image', multi: bool = False,
+                  calibration: Optional[Calibration] = None, imgsz: Optional[int] = None,
+                  degradation_level: int = 0) -> Tuple[dict, List[dict], Optional[List[dict]]]:
+    """
+    Deteksi + pengukuran lengkap untuk satu frame di proses ini (dipakai worker inference)
+    Args:
+        image: Gambar BGR
+        overlay: Mode overlay response
+        multi: True = ukur semua deteksi
+        calibration: Kalibrasi kamera, None = skala ditebak
+        imgsz: Ukuran input model adaptif, None = YOLO_IMGSZ
+        degradation_level: Level degradasi beban (imgsz dan overlay sudah disesuaikan pemanggil)
+    Returns:
+        Tuple (response, deteksi yang diukur, list measurement atau None jika gagal)
+    """
+    detections = detect_batch([image], imgsz)[0]
+    if degradation_level < LEVEL_SMALL_IMGSZ and needs_full_size_retry(detections, imgsz):
+        detections = detect_batch([image])[0]
+    if not detections:
+        return {'error': 'No bottles detected by YOLO'}, [], None
+
+    if multi:
+        response, measurements = measure_all_bottles(image, detections, overlay, calibration, degradation_level)
+        return response, detections, measurements
+
+    best_detection = max(detections, key=lambda x: x['confidence'])
+    response, measurement = measure_bottle(image, best_detection, overlay, calibration, degradation_level)
+    return response, [best_detection], [measurement] if measurement is not None else None
+
+def calibrate(image: np.ndarray, marker_size_cm: float, dictionary: str = 'DICT_4X4_50',
+              reference: Optional[str] = None) -> Calibration:
+    """
+    Kalibrasi skala kamera dari satu frame: marker ArUco, atau botol referensi jika diberikan
+    Args:
+        image: Gambar BGR dari kamera yang dikalibrasi
+        marker_size_cm: Panjang sisi marker tercetak
+        dictionary: Nama dictionary ArUco
+        reference: Nama botol di katalog yang ada di frame (dipakai jika marker tidak ada)
+    Returns:
+        Calibration
+    Raises:
+        ValueError: Jika tidak ada marker maupun objek referensi yang bisa diukur
+    """
+    with metrics.stage('calibrate'):
+        calibration = calibrate_from_marker(image, marker_size_cm, dictionary)
+    if calibration is not None:
+        return calibration
+
+    if reference is None:
+        raise ValueError('No calibration marker found')
+    spec = catalog_store.get().get(reference)
+    if spec is None or not spec.get('height'):
+        raise ValueError(f'Unknown reference bottle: {reference}')
+
+    # Botol referensi: ukur seperti biasa, tinggi kontur dibandingkan dengan tinggi spesifikasi
+    detections = detect_batch([image])[0]
+    if not detections:
+        raise ValueError('No calibration marker or reference bottle found')
+    detection = max(detections, key=lambda x: x['confidence'])
+    with metrics.stage('contour'):
+        bottle_data = size_calculator.extract_bottle_contour(image, detection['bbox'])
+    dimensions = size_calculator.calculate_bottle_dimensions(bottle_data) if bottle_data else {}
+    calibration = calibrate_from_object(dimensions, spec['height'], detection['bbox'], reference)
+    if calibration is None:
+        raise ValueError('Could not measure reference bottle')
+    return calibration
+
+def overlay_geometry(image: np.ndarray, detection: dict, bottle_data: dict) -> dict:
+    """
+    Geometri overlay (tanpa render) agar client bisa menggambar sendiri
+    Args:
+        image: Gambar original (untuk ukuran frame)
+        detection: Deteksi YOLO
+        bottle_data: Hasil extract_bottle_contour
+    Returns:
+        Dict berisi bbox YOLO, bbox kontur, polyline kontur dan center points
+    """
+    height, width = image.shape[:2]
+    x, y, w, h = bottle_data['bbox']
+
+    return {
+        'image_size': [width, height],
+        'yolo_bbox': list(detection['bbox']),
+        'contour_bbox': [int(x), int(y), int(x + w), int(y + h)],
+        'contour': bottle_data['contour'].reshape(-1, 2).tolist(),
+        'centers': {name: [int(cx), int(cy)] for name, (cx, cy) in bottle_data['centers'].items()},
+    }
+
+def render_overlay(image: np.ndarray, detections: List[dict], measurements: List[Optional[dict]]) -> np.ndarray:
+    """Gambar bounding box YOLO dan analisis kontur detail pada salinan frame"""
+    with metrics.stage('draw'):
+        # draw_detections membuat salinan sendiri, jadi gambar input tidak berubah
+        result_image = yolo_detector.draw_detections(image, detections)
+        for measurement in measurements:
+            if measurement is None:
+                continue
+            result_image = size_calculator.draw_detailed_analysis(
+                result_image,
+                measurement['bottle_data'],
+                measurement['dimensions'],
+                measurement['real_dimensions'],
+            )
+    return result_image
+
+def render_overlay_bytes(image: np.ndarray, detections: List[dict], measurements: List[Optional[dict]],
+                         image_format: str = 'jpeg', quality: int = 85,
+                         max_width: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    Render overlay lalu encode ke format yang diminta
+    Args:
+        image: Gambar original
+        detections: Deteksi YOLO yang digambar
+        measurements: Hasil pengukuran per deteksi (None = hanya bbox)
+        image_format: 'png', 'jpeg' atau 'webp'
+        quality: Kualitas encode JPEG/WebP (1-100)
+        max_width: Lebar maksimum untuk preview yang diperkecil (None = resolusi penuh)
+    Returns:
+        Tuple (bytes gambar, media type)
+    """
+    if image_format not in OVERLAY_FORMATS:
+        raise ValueError(f'Unsupported overlay format: {image_format} (expected one of {sorted(OVERLAY_FORMATS)})')
+
+    extension, media_type, quality_flag = OVERLAY_FORMATS[image_format]
+    result_image = render_overlay(image, detections, measurements)
+
+    if max_width and result_image.shape[1] > max_width:
+        scale = max_width / result_image.shape[1]
+        new_size = (int(max_width), max(1, int(round(result_image.shape[0] * scale))))
+        result_image = cv2.resize(result_image, new_size, interpolation=cv2.INTER_AREA)
+
+    params = [quality_flag, int(min(max(quality, 1), 100))] if quality_flag is not None else []
+    with metrics.stage('encode'):
+        success, buffer = cv2.imencode(extension, result_image, params)
+    if not success:
+        raise ValueError(f'Could not encode overlay as {image_format}')
+
+    return buffer.tobytes(), media_type
@@ -0,0 +1,60 @@
+# File: backend/hybrid-detection/src/api/render_cache.py
+# Fungsi: Cache berumur pendek untuk data overlay agar gambar hasil hanya dirender saat diminta
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+class OverlayCache:
+    """Class cache TTL + LRU untuk menyimpan frame dan hasil pengukuran per render_id"""
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 32):
+        """
+        Args:
+            ttl_seconds: Umur maksimum entry sebelum dianggap kadaluarsa
+            max_entries: Jumlah entry maksimum (entry terlama dibuang lebih dulu)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float):
+        """Buang entry kadaluarsa (dipanggil dengan lock dipegang)"""
+        while self._entries:
+            render_id, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[render_id]
+
+    def put(self, entry: dict) -> str:
+        """
+        Simpan data overlay dan kembalikan render_id baru
+        Args:
+            entry: Dict berisi 'image', 'detection' dan 'measurement'
+        Returns:
+            render_id untuk endpoint render
+        """
+        render_id = uuid.uuid4().hex
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_expired(now)
+            self._entries[render_id] = (now + self.ttl_seconds, entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return render_id
+
+    def get(self, render_id: str) -> Optional[dict]:
+        """Ambil data overlay, None jika tidak ada atau sudah kadaluarsa"""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            item = self._entries.get(render_id)
+            return item[1] if item else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,173 @@
+# File: backend/hybrid-detection/src/api/result_cache.py
+# Fungsi: Cache hasil analisis berdasarkan hash konten + penggabungan request identik yang sedang berjalan
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Sequence, Tuple
+
+
+def content_key(namespace: str, payload) -> str:
+    """
+    Buat key cache dari isi payload (bytes atau string base64)
+    Args:
+        namespace: Parameter yang mempengaruhi hasil (mis. endpoint, mode overlay)
+        payload: Isi gambar mentah
+    Returns:
+        Key cache 'namespace:sha256'
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return f'{namespace}:{hashlib.sha256(payload).hexdigest()}'
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Jumlah bit yang berbeda antara dua perceptual hash"""
+    return bin(a ^ b).count('1')
+
+
+class ResultCache:
+    """Class cache LRU + TTL untuk response analyze_bottle dengan batas jumlah entry dan ukuran memori"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 30,
+                 perceptual: bool = False, perceptual_distance: int = 4):
+        """
+        Args:
+            max_entries: Jumlah entry maksimum
+            max_bytes: Perkiraan ukuran total response (JSON) maksimum
+            ttl_seconds: Umur entry sebelum kadaluarsa
+            perceptual: True = frame yang hampir sama (dHash) juga dianggap hit
+            perceptual_distance: Jarak Hamming maksimum untuk near-duplicate
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.perceptual = perceptual
+        self.perceptual_distance = perceptual_distance
+
+        # key -> (expires_at, size, namespace, phash, response)
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _remove(self, key: str):
+        _, size, _, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        """Buang entry kadaluarsa, lalu entry terlama sampai batas jumlah dan ukuran terpenuhi"""
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items() if entry[0] <= now]:
+            self._remove(key)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def get(self, key: str) -> Optional[dict]:
+        """Ambil response dari cache (salinan), None jika tidak ada atau kadaluarsa"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry[4])
+
+    def find_similar(self, namespace: str, phash: int) -> Optional[dict]:
+        """Cari response dengan perceptual hash terdekat dalam namespace yang sama"""
+        now = time.monotonic()
+        best_key, best_distance = None, self.perceptual_distance + 1
+        for key, (expires_at, _, entry_namespace, entry_phash, _) in self._entries.items():
+            if entry_phash is None or entry_namespace != namespace or expires_at <= now:
+                continue
+            distance = hamming_distance(phash, entry_phash)
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+
+        if best_key is None:
+            return None
+        self.near_hits += 1
+        return self.get(best_key)
+
+    def put(self, key: str, response: dict, phash: Optional[int] = None):
+        """Simpan response ke cache"""
+        size = len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        # Namespace bisa berisi ':' (camera_id dari client), hash sha256 di akhir key tidak pernah
+        namespace = key.rsplit(':', 1)[0]
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, namespace, phash, copy.deepcopy(response))
+        self._bytes += size
+        self._evict()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Tuple[dict, Optional[int]]]],
+                             preferred_keys: Sequence[str] = ()) -> dict:
+        """
+        Ambil dari cache, atau ikut menunggu komputasi yang sedang berjalan untuk key yang sama,
+        atau jalankan compute() sendiri
+        Args:
+            key: Key konten dari content_key
+            compute: Coroutine factory yang mengembalikan (response, perceptual hash atau None)
+            preferred_keys: Key yang dicek lebih dulu (mis. hasil kualitas penuh untuk request terdegradasi)
+        Returns:
+            Response (salinan milik pemanggil)
+        """
+        for candidate in (*preferred_keys, key):
+            cached = self.get(candidate)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        if key in self._in_flight:
+            self.coalesced += 1
+            response = await asyncio.shield(self._in_flight[key])
+            return copy.deepcopy(response)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        # Hindari warning 'exception was never retrieved' jika tidak ada request lain yang menunggu
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+
+        try:
+            response, phash = await compute()
+            # Response error (mis. kegagalan sementara) tidak disimpan agar tidak diulang ke request berikutnya
+            if 'error' not in response:
+                self.put(key, response, phash)
+            future.set_result(response)
+            return copy.deepcopy(response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """Statistik cache untuk /health"""
+        # near_duplicate_hits adalah bagian dari misses (dicari setelah hash konten tidak cocok)
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'near_duplicate_hits': self.near_hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'in_flight': len(self._in_flight),
+            'hit_rate': round((self.hits + self.near_hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
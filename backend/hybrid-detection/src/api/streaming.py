@@ -0,0 +1,48 @@
+# File: backend/hybrid-detection/src/api/streaming.py
+# Fungsi: Helper untuk mode streaming WebSocket (slot frame terbaru, frame lama dibuang)
+import asyncio
+import json
+from typing import Optional, Tuple
+
+
+class LatestFrameSlot:
+    """Slot berisi satu frame: frame baru menimpa frame yang belum diproses (latest-frame-wins)"""
+
+    def __init__(self):
+        self._item: Optional[Tuple[int, object]] = None
+        self._event = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, payload):
+        """Simpan frame terbaru, frame sebelumnya yang belum diambil dihitung sebagai dropped"""
+        if self._item is not None:
+            self.dropped += 1
+        self.received += 1
+        self._item = (self.received, payload)
+        self._event.set()
+
+    async def get(self) -> Tuple[int, object]:
+        """Tunggu sampai ada frame, lalu ambil (frame_id, payload)"""
+        await self._event.wait()
+        item = self._item
+        self._item = None
+        self._event.clear()
+        return item
+
+
+def parse_text_frame(text: str) -> str:
+    """
+    Ambil base64 image dari pesan teks WebSocket
+    Args:
+        text: JSON {"image": "data:image/..."} atau data URL / base64 langsung
+    Returns:
+        String base64 (boleh dengan prefix data URL)
+    """
+    stripped = text.strip()
+    if stripped.startswith('{'):
+        message = json.loads(stripped)
+        if 'image' not in message:
+            raise ValueError("Stream message must contain an 'image' field")
+        return message['image']
+    return stripped
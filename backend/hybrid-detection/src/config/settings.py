@@ -1,25 +1,154 @@
 # File: backend/hybrid-detection/src/config/settings.py
+import json
 import os
 from pathlib import Path
 
+# Nilai minimum setting yang ditulis autotune.py (nilai di bawahnya membuat startup gagal)
+TUNED_MINIMUMS = {
+    'TORCH_NUM_THREADS': 0,  # 0 = default torch
+    'TORCH_INTEROP_THREADS': 0,
+    'ONNX_INTRA_OP_THREADS': 0,
+    'OPENCV_NUM_THREADS': -1,  # -1 = default OpenCV
+    'EXECUTOR_MAX_WORKERS': 1,
+    'EXECUTOR_MAX_CONCURRENCY': 1,
+}
+
 class Settings:
     # Paths
     PROJECT_ROOT = Path(__file__).parent.parent.parent
     MODELS_DIR = PROJECT_ROOT / "models"
     YOLO_MODEL_PATH = MODELS_DIR / "yolo" / "yolov8n.pt"
+    YOLO_ONNX_PATH = MODELS_DIR / "yolo" / "yolov8n.onnx"
+    YOLO_OPENVINO_PATH = MODELS_DIR / "yolo" / "yolov8n_openvino_model" / "yolov8n.xml"
+    
+    # Varian model ONNX terkuantisasi (dibuat dengan quantize_sweep.py --build)
+    YOLO_MODEL_VARIANTS = {
+        "fp32": YOLO_ONNX_PATH,
+        "fp16": MODELS_DIR / "yolo" / "yolov8n_fp16.onnx",
+        "int8": MODELS_DIR / "yolo" / "yolov8n_int8.onnx",
+    }
+    YOLO_MODEL_VARIANT = "fp32"  # Varian yang dipakai backend onnxruntime
     
     # API Settings
     API_HOST = "127.0.0.1"
     API_PORT = 8001
     
     # YOLO Settings
+    YOLO_BACKEND = "ultralytics"  # "ultralytics", "onnxruntime" atau "openvino"
     YOLO_CONFIDENCE = 0.5
-    YOLO_DEVICE = "cpu"
+    YOLO_IOU = 0.7  # Batas IoU NMS (sama dengan default ultralytics)
+    YOLO_IMGSZ = 640  # Ukuran input model
+    YOLO_DEVICE = "cpu"  # "cpu", "cuda" atau "auto"
+    
+    # Inference ROI + ukuran input adaptif
+    INFERENCE_ROI = None  # (x1, y1, x2, y2) relatif 0-1 untuk kamera tetap, None = seluruh frame
+    ADAPTIVE_IMGSZ_ENABLED = False  # imgsz per frame dari ukuran botol frame sebelumnya (per camera_id / stream)
+    ADAPTIVE_IMGSZ_SIZES = (320, 416, 512, 640, 800)  # Ukuran yang boleh dipilih (kelipatan 32)
+    ADAPTIVE_IMGSZ_MIN_OBJECT_PIXELS = 128  # Sisi panjang botol terkecil minimum di input model
+    ADAPTIVE_IMGSZ_TTL_SECONDS = 30  # Riwayat lebih tua dari ini diabaikan
+    ADAPTIVE_IMGSZ_RETRY_ON_MISS = True  # Ulangi di YOLO_IMGSZ jika ukuran kecil tidak menemukan botol
+    ONNX_INTRA_OP_THREADS = 0  # 0 = default ONNX Runtime
+    
+    # Micro-batching Settings
+    BATCH_MAX_SIZE = 8  # Jumlah frame maksimum per forward pass
+    BATCH_MAX_WAIT_MS = 10  # Waktu tunggu maksimum untuk mengisi batch
+    
+    # Executor Settings (pipeline CPU-bound di luar event loop)
+    EXECUTOR_MODE = "thread"  # "thread" atau "process"
+    EXECUTOR_MAX_WORKERS = 4
+    EXECUTOR_MAX_CONCURRENCY = 4  # Batas task pipeline yang berjalan bersamaan
+    
+    # CPU Thread Budget (autotune.py menulis hasil terbaik ke TUNING_FILE, diterapkan saat startup)
+    TORCH_NUM_THREADS = 0  # 0 = default torch (semua core)
+    TORCH_INTEROP_THREADS = 0  # 0 = default torch
+    OPENCV_NUM_THREADS = -1  # -1 = default OpenCV (semua core), 0 = tanpa thread internal
+    CPU_AFFINITY = None  # List core untuk proses server, None = tidak dipin
+    TUNING_FILE = PROJECT_ROOT / "tuning.json"  # None = abaikan hasil autotune
+
+    # Inference Workers (proses terpisah per core set, frame lewat ring buffer shared memory)
+    INFERENCE_WORKERS = 0  # 0 = nonaktif, deteksi lewat batcher + executor
+    INFERENCE_WORKER_CORES = 0  # Core per worker (0 = bagi rata semua core)
+    INFERENCE_WORKER_RING_SLOTS = 4  # Frame in-flight maksimum per worker
+    INFERENCE_WORKER_MAX_FRAME_BYTES = 3840 * 2160 * 3  # Ukuran satu slot (frame 4K BGR)
+    INFERENCE_WORKER_RESTART_SECONDS = 1.0  # Jeda sebelum worker yang mati dijalankan ulang
+    
+    # Multi-bottle Settings
+    MULTI_BOTTLE_WORKERS = 4  # Thread untuk pengukuran ROI paralel per frame
+    
+    # Batch Endpoint Settings (/batch, hasil NDJSON)
+    BATCH_ENDPOINT_MAX_IN_FLIGHT = 16  # Gambar yang diproses bersamaan per request batch
+    BATCH_ENDPOINT_MAX_IMAGE_BYTES = 20 * 1024 * 1024  # Gambar lebih besar dilewati
+    BATCH_ENDPOINT_SPOOL_BYTES = 32 * 1024 * 1024  # Arsip raw body di atas ini ditulis ke disk
+    
+    # Tracking Settings (mode streaming WebSocket)
+    TRACKING_ENABLED = True  # Default untuk /ws, bisa diubah per koneksi dengan ?track=
+    TRACKING_DETECT_EVERY_N = 10  # Deteksi YOLO penuh minimal setiap N frame
+    TRACKING_MOTION_THRESHOLD = 12.0  # Rata-rata selisih pixel yang memicu deteksi penuh
+    TRACKING_MIN_MATCH_SCORE = 0.6  # Skor template matching minimum sebelum track dianggap hilang
+    TRACKING_SEARCH_MARGIN = 0.25  # Area pencarian di sekitar bbox terakhir
+    
+    # Result Cache Settings (frame identik / hampir identik dari kiosk)
+    RESULT_CACHE_ENABLED = True
+    RESULT_CACHE_MAX_ENTRIES = 256
+    RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Perkiraan ukuran total response JSON
+    RESULT_CACHE_TTL_SECONDS = 30  # Lebih pendek dari RENDER_CACHE_TTL_SECONDS agar render_id tetap valid
+    RESULT_CACHE_PERCEPTUAL = False  # True = near-duplicate (dHash) juga dianggap hit
+    RESULT_CACHE_PERCEPTUAL_DISTANCE = 4  # Jarak Hamming maksimum (dari 64 bit)
+    
+    # Overlay Render Settings (mode response 'geometry')
+    RENDER_CACHE_TTL_SECONDS = 60  # Umur data overlay di cache
+    RENDER_CACHE_MAX_ENTRIES = 32
+    RENDER_DEFAULT_QUALITY = 85  # Kualitas JPEG/WebP default
+    
+    # Kalibrasi skala per kamera (POST /calibrate, request analisis membawa camera_id)
+    CALIBRATION_TTL_SECONDS = 8 * 3600  # Kalibrasi ulang setelah ini (kamera bisa bergeser)
+    CALIBRATION_MAX_CAMERAS = 64
+    CALIBRATION_MARKER_SIZE_CM = 5.0  # Sisi marker ArUco tercetak
+    CALIBRATION_MARKER_DICT = "DICT_4X4_50"
+
+    # Load shedding (/, /upload, /ws): antrian terbatas, deadline per request, degradasi bertahap
+    LOAD_SHED_ENABLED = True
+    LOAD_SHED_MAX_PENDING = 32  # Request interaktif menunggu/berjalan maksimum, di atas ini 429
+    LOAD_SHED_LEVEL_THRESHOLDS = (0.5, 0.75, 0.9)  # Fraksi MAX_PENDING untuk level degradasi 1, 2, 3
+    LOAD_SHED_DEFAULT_DEADLINE_MS = 2000  # Budget latency jika client tidak mengirim X-Deadline-Ms / ?deadline_ms=
+    LOAD_SHED_MAX_DEADLINE_MS = 30000
+    LOAD_SHED_IMGSZ = 416  # Ukuran input YOLO mulai level 1 (kelipatan 32)
+    LOAD_SHED_MIN_RETRY_AFTER_SECONDS = 1
+
+    # Job asinkron (POST /jobs): antrian SQLite persisten, job bulk mengalah ke traffic interaktif
+    JOBS_ENABLED = True
+    JOBS_DB_PATH = PROJECT_ROOT / "data" / "jobs.sqlite3"
+    JOBS_MAX_CONCURRENCY = 2  # Job yang diproses bersamaan (sisa kapasitas executor untuk request sinkron)
+    JOBS_MAX_QUEUED = 1000  # POST /jobs ditolak 429 di atas jumlah ini
+    JOBS_RETRY_AFTER_SECONDS = 30  # Header Retry-After saat antrian job penuh
+    JOBS_MAX_PAYLOAD_BYTES = 20 * 1024 * 1024
+    JOBS_MAX_ATTEMPTS = 2  # Job terputus karena restart diulang sampai sejumlah ini
+    JOBS_RETENTION_SECONDS = 24 * 3600  # Hasil job selesai disimpan selama ini
+    JOBS_BULK_MAX_YIELD_SECONDS = 5  # Waktu tunggu maksimum job bulk per tahapan saat ada traffic interaktif
+    JOBS_POLL_SECONDS = 1.0  # Jeda cek antrian saat idle
+    JOBS_EVENT_KEEPALIVE_SECONDS = 15  # Komentar keepalive SSE saat tidak ada perubahan
+
+    # Startup (model dimuat di background task setelah server menerima koneksi)
+    WARMUP_ITERATIONS = 3  # Forward pass dummy sebelum server dinyatakan ready
+    NOT_READY_RETRY_AFTER_SECONDS = 2  # Header Retry-After untuk response 503 saat belum ready
+    
+    # Profiling per request (header 'X-Profile: 1' atau query '?profile=true')
+    PROFILING_ENABLED = False  # False = flag profiling dari client diabaikan
+    PROFILE_DIR = PROJECT_ROOT / "profiles"
+    PROFILE_MAX_STORED = 50  # Profile lama dihapus di atas jumlah ini
+    PROFILE_TOP_FUNCTIONS = 30  # Jumlah fungsi teratas di ringkasan cProfile
     
     # OpenCV Settings (Measurement-based)
     CLASSIFICATION_TOLERANCE_PERCENT = 25  # Toleransi untuk pengukuran
+    CONTOUR_CASCADE_ENABLED = True  # Segmentasi murah pada ROI diperkecil dulu, naik jika skor rendah
+    CONTOUR_CASCADE_MAX_SIDE = 256  # Sisi terpanjang ROI pada tahap tereduksi
+    CONTOUR_CASCADE_MIN_CONFIDENCE = 0.7  # Skor pengukuran minimum untuk early exit
+    
+    # Katalog SKU dari file .json / .csv (None = pakai KNOWN_BOTTLE_SPECS), dimuat ulang saat file berubah
+    BOTTLE_CATALOG_PATH = None
+    CATALOG_RELOAD_CHECK_SECONDS = 2  # Jeda minimum antar cek mtime file katalog
     
-    # Bottle specifications
+    # Bottle specifications (default jika BOTTLE_CATALOG_PATH tidak diset)
     KNOWN_BOTTLE_SPECS = {
         "100mL": {"volume": 100, "height": 8.5, "diameter": 3.8},
         "200mL": {"volume": 200, "height": 10.28, "diameter": 4.39},
@@ -31,4 +160,57 @@ class Settings:
         "1500mL": {"volume": 1500, "height": 28.0, "diameter": 9.5},
     }
 
-settings = Settings()
\ No newline at end of file
+    def load_tuning(self, path=None) -> dict:
+        """
+        Timpa nilai default dengan hasil autotune.py (JSON {"settings": {...}})
+        Returns:
+            Dict setting yang diterapkan (kosong jika file tidak ada)
+        """
+        path = path or self.TUNING_FILE
+        if not path or not Path(path).is_file():
+            return {}
+        
+        # File rusak tidak boleh menggagalkan startup: pakai nilai default
+        try:
+            tuned = json.loads(Path(path).read_text()).get('settings', {})
+        except (OSError, ValueError, AttributeError) as e:
+            print(f'Ignoring invalid tuning file {path}: {e}')
+            return {}
+        if not isinstance(tuned, dict):
+            print(f'Ignoring invalid tuning file {path}: settings is not an object')
+            return {}
+        
+        applied = {}
+        for name, value in tuned.items():
+            if not name.isupper() or not hasattr(Settings, name):
+                print(f'Ignoring unknown tuned setting: {name}')
+                continue
+            if not self._valid_tuned_value(name, value):
+                print(f'Ignoring invalid tuned value {name}={value!r}')
+                continue
+            setattr(self, name, value)
+            applied[name] = value
+        return applied
+    
+    @classmethod
+    def _valid_tuned_value(cls, name: str, value) -> bool:
+        """
+        Nilai tuning harus bertipe sama dengan default dan tidak di bawah batas minimum setting tersebut;
+        CPU_AFFINITY boleh None atau list nomor core, setting lain dengan default None tidak bisa di-tune
+        """
+        default = getattr(cls, name)
+        if name == 'CPU_AFFINITY':
+            return value is None or (isinstance(value, list) and all(
+                isinstance(core, int) and not isinstance(core, bool) and core >= 0 for core in value))
+        if default is None:
+            return False
+        if isinstance(default, bool) or isinstance(value, bool):
+            return isinstance(default, bool) and isinstance(value, bool)
+        if isinstance(default, (int, float)):
+            if not isinstance(value, (int, float)) or (isinstance(default, int) and not isinstance(value, int)):
+                return False
+            return value >= TUNED_MINIMUMS.get(name, float('-inf'))
+        return isinstance(value, type(default))
+
+settings = Settings()
+settings.load_tuning()
\ No newline at end of file
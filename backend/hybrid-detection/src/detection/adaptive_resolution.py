@@ -0,0 +1,93 @@
+# File: backend/hybrid-detection/src/detection/adaptive_resolution.py
+# Fungsi: Memilih ukuran input YOLO per frame dari ukuran botol pada frame sebelumnya (per kamera/session)
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+
+def roi_rect(image_shape: tuple, roi: Optional[Sequence[float]]) -> Tuple[int, int, int, int]:
+    """
+    Rect pixel (x1, y1, x2, y2) dari ROI relatif (0-1) pada frame ini
+    Args:
+        image_shape: Shape gambar
+        roi: (x1, y1, x2, y2) relatif terhadap lebar/tinggi frame, None = seluruh frame
+    """
+    height, width = image_shape[:2]
+    if not roi:
+        return 0, 0, width, height
+    x1, y1, x2, y2 = roi
+    rect = (int(round(x1 * width)), int(round(y1 * height)), int(round(x2 * width)), int(round(y2 * height)))
+    # ROI tidak valid atau kosong -> seluruh frame
+    if not (0 <= rect[0] < rect[2] <= width and 0 <= rect[1] < rect[3] <= height):
+        return 0, 0, width, height
+    return rect
+
+
+class AdaptiveResolution:
+    """Class state ukuran botol terakhir per kamera/session untuk memilih imgsz frame berikutnya"""
+
+    def __init__(self, sizes: Sequence[int], default_size: int, min_object_pixels: int = 128,
+                 roi: Optional[Sequence[float]] = None, ttl_seconds: float = 30, max_entries: int = 256):
+        """
+        Args:
+            sizes: Ukuran input yang boleh dipilih (kelipatan 32)
+            default_size: Ukuran saat belum ada riwayat atau frame sebelumnya tanpa botol
+            min_object_pixels: Sisi panjang botol terkecil minimum di input model agar tetap terdeteksi
+            roi: ROI inference relatif (ukuran botol dihitung terhadap area crop)
+            ttl_seconds: Riwayat lebih tua dari ini diabaikan (pemandangan bisa sudah berubah)
+            max_entries: Jumlah kamera/session maksimum yang diingat
+        """
+        self.sizes = sorted(int(size) for size in sizes)
+        self.default_size = int(default_size)
+        self.min_object_pixels = min_object_pixels
+        self.roi = roi
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def choose(self, key: Optional[str]) -> Optional[int]:
+        """
+        Ukuran input untuk frame berikutnya
+        Returns:
+            imgsz, atau None (= ukuran default model) jika tidak ada riwayat yang masih berlaku
+        """
+        if key is None:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] + self.ttl_seconds < time.monotonic():
+                return None
+            return item[1]
+
+    def update(self, key: Optional[str], image_shape: tuple, detections: List[dict]):
+        """Simpan imgsz yang cukup untuk botol terkecil di frame ini"""
+        if key is None:
+            return
+        x1, y1, x2, y2 = roi_rect(image_shape, self.roi)
+        longest_side = max(x2 - x1, y2 - y1)
+
+        if detections:
+            # Botol terkecil menentukan ukuran: sisi panjangnya harus >= min_object_pixels setelah letterbox
+            smallest = min(max(d['bbox'][2] - d['bbox'][0], d['bbox'][3] - d['bbox'][1]) for d in detections)
+            needed = self.min_object_pixels * longest_side / max(1, smallest)
+            size = next((s for s in self.sizes if s >= needed), self.sizes[-1])
+        else:
+            # Tidak ada botol: kembali ke ukuran default agar recall tidak turun
+            size = self.default_size
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), size)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, key: Optional[str]):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = [size for _, size in self._entries.values()]
+        return {'sessions': len(sizes), 'sizes': {str(s): sizes.count(s) for s in sorted(set(sizes))}}
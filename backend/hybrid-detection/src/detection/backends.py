@@ -0,0 +1,307 @@
+# File: backend/hybrid-detection/src/detection/backends.py
+# Fungsi: Backend inference YOLO yang bisa dipilih (ultralytics, ONNX Runtime, OpenVINO)
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Semua backend mengembalikan array (N, 6) per gambar: [x1, y1, x2, y2, confidence, class_id]
+# dalam koordinat gambar original
+EMPTY_PREDICTION = np.zeros((0, 6), dtype=np.float32)
+
+
+def letterbox(image: np.ndarray, new_shape: int = 640, color: int = 114) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Resize dengan menjaga aspect ratio lalu padding ke ukuran persegi (sama seperti ultralytics)
+    Args:
+        image: Gambar BGR
+        new_shape: Ukuran sisi input model
+        color: Nilai padding
+    Returns:
+        Tuple (gambar letterbox, rasio resize, (pad_x, pad_y))
+    """
+    height, width = image.shape[:2]
+    ratio = min(new_shape / height, new_shape / width)
+    new_unpad = (int(round(width * ratio)), int(round(height * ratio)))
+
+    pad_x = (new_shape - new_unpad[0]) / 2
+    pad_y = (new_shape - new_unpad[1]) / 2
+
+    if (width, height) != new_unpad:
+        image = cv2.resize(image, new_unpad, interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(color, color, color))
+
+    return image, ratio, (pad_x, pad_y)
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    NMS greedy dengan IoU yang dihitung vektor untuk semua kandidat sekaligus
+    Args:
+        boxes: Array (N, 4) xyxy
+        scores: Array (N,) confidence
+        iou_threshold: Batas IoU untuk membuang box yang overlap
+    Returns:
+        Index box yang dipertahankan, urut dari skor tertinggi
+    """
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=np.int64)
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-7)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+def postprocess_yolov8(output: np.ndarray, ratio: float, pad: Tuple[float, float], original_shape: tuple,
+                       confidence: float, iou_threshold: float, max_detections: int = 300) -> np.ndarray:
+    """
+    Post-processing output YOLOv8 (4 + jumlah class, jumlah anchor) tanpa loop per box
+    Args:
+        output: Output model untuk satu gambar, shape (4 + nc, anchors)
+        ratio: Rasio resize letterbox
+        pad: Padding letterbox (pad_x, pad_y)
+        original_shape: Shape gambar original
+        confidence: Minimum confidence
+        iou_threshold: Batas IoU untuk NMS
+        max_detections: Jumlah deteksi maksimum
+    Returns:
+        Array (N, 6) [x1, y1, x2, y2, confidence, class_id] dalam koordinat original
+    """
+    predictions = output.T  # (anchors, 4 + nc)
+    class_scores = predictions[:, 4:]
+
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+
+    mask = scores >= confidence
+    if not mask.any():
+        return EMPTY_PREDICTION
+
+    boxes_cxcywh = predictions[mask, :4]
+    scores = scores[mask]
+    class_ids = class_ids[mask]
+
+    # cxcywh -> xyxy, lalu kembalikan ke koordinat gambar original
+    boxes = np.empty_like(boxes_cxcywh)
+    boxes[:, 0] = boxes_cxcywh[:, 0] - boxes_cxcywh[:, 2] / 2
+    boxes[:, 1] = boxes_cxcywh[:, 1] - boxes_cxcywh[:, 3] / 2
+    boxes[:, 2] = boxes_cxcywh[:, 0] + boxes_cxcywh[:, 2] / 2
+    boxes[:, 3] = boxes_cxcywh[:, 1] + boxes_cxcywh[:, 3] / 2
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / ratio
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, original_shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, original_shape[0])
+
+    # NMS per class dengan offset koordinat per class_id (satu pass NMS untuk semua class)
+    offsets = class_ids[:, None].astype(boxes.dtype) * 7680
+    keep = non_max_suppression(boxes + offsets, scores, iou_threshold)[:max_detections]
+
+    return np.concatenate([
+        boxes[keep],
+        scores[keep, None],
+        class_ids[keep, None].astype(boxes.dtype),
+    ], axis=1).astype(np.float32)
+
+
+class InferenceBackend:
+    """Base class backend inference: predict(list gambar) -> list array (N, 6)"""
+
+    name = 'base'
+
+    def __init__(self, model_path: str, device: str = 'cpu', confidence: float = 0.5,
+                 iou_threshold: float = 0.7, imgsz: int = 640):
+        self.model_path = str(model_path)
+        self.device = device
+        self.confidence = confidence
+        self.iou_threshold = iou_threshold
+        self.imgsz = imgsz
+
+    # False untuk model dengan ukuran input tetap (override imgsz per panggilan diabaikan)
+    dynamic_imgsz = True
+
+    def predict(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Args:
+            images: List gambar BGR
+            imgsz: Ukuran input untuk panggilan ini, None = self.imgsz
+        """
+        raise NotImplementedError
+
+    def input_size(self, imgsz: Optional[int] = None) -> int:
+        """Ukuran input efektif untuk satu panggilan"""
+        return imgsz if imgsz and self.dynamic_imgsz else self.imgsz
+
+    def preprocess(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> Tuple[np.ndarray, list]:
+        """Letterbox semua gambar lalu susun menjadi satu blob NCHW float32 RGB 0-1"""
+        size = self.input_size(imgsz)
+        letterboxed, meta = [], []
+        for image in images:
+            padded, ratio, pad = letterbox(image, size)
+            letterboxed.append(padded)
+            meta.append((ratio, pad, image.shape))
+
+        blob = cv2.dnn.blobFromImages(letterboxed, scalefactor=1 / 255.0, swapRB=True)
+        return blob, meta
+
+    def postprocess(self, outputs: np.ndarray, meta: list) -> List[np.ndarray]:
+        """Post-processing output batch (B, 4 + nc, anchors)"""
+        return [
+            postprocess_yolov8(output, ratio, pad, shape, self.confidence, self.iou_threshold)
+            for output, (ratio, pad, shape) in zip(outputs, meta)
+        ]
+
+
+class UltralyticsBackend(InferenceBackend):
+    """Backend PyTorch eager via ultralytics (default, mendukung CUDA)"""
+
+    name = 'ultralytics'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from ultralytics import YOLO
+
+        # Jika file di MODELS_DIR belum ada, pakai nama file agar ultralytics mengunduh weight resmi
+        model_path = self.model_path if Path(self.model_path).exists() else Path(self.model_path).name
+        self.model = YOLO(model_path)
+
+    def predict(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        results = self.model(list(images), conf=self.confidence, iou=self.iou_threshold,
+                             imgsz=self.input_size(imgsz), device=self.device, verbose=False)
+
+        predictions = []
+        for result in results:
+            boxes = result.boxes
+            # boxes.data sudah berformat [x1, y1, x2, y2, conf, cls]: satu transfer ke CPU per gambar
+            predictions.append(boxes.data.cpu().numpy() if boxes is not None else EMPTY_PREDICTION)
+        return predictions
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """Backend ONNX Runtime (CPU, atau CUDA jika provider tersedia)"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, *args, intra_op_threads: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        providers = ['CPUExecutionProvider']
+        if self.device.startswith('cuda') and 'CUDAExecutionProvider' in ort.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Model yang diekspor tanpa dynamic=True punya batch dan ukuran input tetap
+        self.fixed_batch = isinstance(model_input.shape[0], int)
+        if isinstance(model_input.shape[2], int):
+            self.imgsz = model_input.shape[2]
+            self.dynamic_imgsz = False
+
+    def predict(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        if not images:
+            return []
+
+        blob, meta = self.preprocess(images, imgsz)
+        if self.fixed_batch:
+            outputs = np.concatenate([
+                self.session.run(None, {self.input_name: blob[i:i + 1]})[0] for i in range(len(blob))
+            ])
+        else:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+        return self.postprocess(outputs, meta)
+
+
+class OpenVINOBackend(InferenceBackend):
+    """Backend OpenVINO untuk CPU Intel"""
+
+    name = 'openvino'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from openvino.runtime import Core
+
+        core = Core()
+        model = core.read_model(self.model_path)
+        shape = model.input(0).get_partial_shape()
+        self.fixed_batch = not shape[0].is_dynamic
+        # IR statis (default export Ultralytics) hanya menerima ukuran input saat diekspor
+        self.dynamic_imgsz = shape[2].is_dynamic
+        if not self.dynamic_imgsz:
+            self.imgsz = shape[2].get_length()
+        self.compiled = core.compile_model(model, 'GPU' if self.device.startswith('gpu') else 'CPU')
+        self.output = self.compiled.output(0)
+
+    def predict(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        if not images:
+            return []
+
+        blob, meta = self.preprocess(images, imgsz)
+        if self.fixed_batch:
+            outputs = np.concatenate([self.compiled(blob[i:i + 1])[self.output] for i in range(len(blob))])
+        else:
+            outputs = self.compiled(blob)[self.output]
+        return self.postprocess(outputs, meta)
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVINOBackend.name: OpenVINOBackend,
+}
+
+
+def create_backend(name: str, model_path: str, device: str = 'cpu', confidence: float = 0.5,
+                   iou_threshold: float = 0.7, imgsz: int = 640, **options) -> InferenceBackend:
+    """
+    Buat backend inference berdasarkan nama
+    Args:
+        name: 'ultralytics', 'onnxruntime' atau 'openvino'
+        model_path: Path model (.pt, .onnx atau .xml)
+        device: Device inference
+        confidence: Minimum confidence
+        iou_threshold: Batas IoU untuk NMS
+        imgsz: Ukuran input model
+        **options: Opsi khusus backend (mis. intra_op_threads untuk ONNX Runtime)
+    Returns:
+        Instance InferenceBackend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown YOLO backend: {name} (expected one of {sorted(BACKENDS)})')
+    return BACKENDS[name](model_path, device=device, confidence=confidence,
+                          iou_threshold=iou_threshold, imgsz=imgsz, **options)
+
+
+def resolve_device(device: Optional[str]) -> str:
+    """Terjemahkan 'auto' menjadi 'cuda' jika tersedia, selain itu kembalikan apa adanya"""
+    if device and device != 'auto':
+        return device
+    try:
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    except ImportError:
+        return 'cpu'
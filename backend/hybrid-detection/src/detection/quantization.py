@@ -0,0 +1,148 @@
+# File: backend/hybrid-detection/src/detection/quantization.py
+# Fungsi: Membuat varian model terkuantisasi (FP16 / INT8) dari model YOLO untuk backend ONNX Runtime
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from detection.backends import letterbox
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def list_images(directory) -> List[Path]:
+    """Daftar file gambar dalam folder (urut nama)"""
+    return sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def export_onnx(weights_path, imgsz: int = 640, dynamic: bool = True) -> Path:
+    """
+    Ekspor weight PyTorch (.pt) ke ONNX FP32 dengan ultralytics
+    Args:
+        weights_path: Path weight .pt
+        imgsz: Ukuran input model
+        dynamic: True agar batch dan ukuran input bisa berubah
+    Returns:
+        Path file .onnx hasil ekspor (di sebelah file .pt)
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(str(weights_path))
+    return Path(model.export(format='onnx', imgsz=imgsz, dynamic=dynamic, simplify=True))
+
+
+def convert_fp16(onnx_path, output_path) -> Path:
+    """
+    Konversi model ONNX FP32 ke FP16 (input/output tetap float32)
+    Args:
+        onnx_path: Path model FP32
+        output_path: Path model FP16
+    Returns:
+        Path model FP16
+    """
+    import onnx
+    from onnxconverter_common import float16
+
+    model = onnx.load(str(onnx_path))
+    model_fp16 = float16.convert_float_to_float16(model, keep_io_types=True)
+    onnx.save(model_fp16, str(output_path))
+    return Path(output_path)
+
+
+class _LetterboxCalibrationReader:
+    """CalibrationDataReader ONNX Runtime yang memakai preprocessing sama dengan backend"""
+
+    def __init__(self, image_paths: List[Path], input_name: str, imgsz: int):
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._index = 0
+
+    def get_next(self) -> Optional[dict]:
+        while self._index < len(self.image_paths):
+            image = cv2.imread(str(self.image_paths[self._index]))
+            self._index += 1
+            if image is None:
+                continue
+            padded, _, _ = letterbox(image, self.imgsz)
+            blob = cv2.dnn.blobFromImage(padded, scalefactor=1 / 255.0, swapRB=True)
+            return {self.input_name: blob}
+        return None
+
+
+def quantize_int8(onnx_path, output_path, calibration_dir=None, imgsz: int = 640,
+                  max_calibration_images: int = 100) -> Path:
+    """
+    Kuantisasi INT8. Dengan folder kalibrasi memakai static QDQ (lebih cepat untuk konvolusi di CPU),
+    tanpa folder kalibrasi memakai dynamic quantization (hanya weight)
+    Args:
+        onnx_path: Path model FP32
+        output_path: Path model INT8
+        calibration_dir: Folder gambar representatif untuk kalibrasi aktivasi
+        imgsz: Ukuran input model
+        max_calibration_images: Jumlah gambar kalibrasi maksimum
+    Returns:
+        Path model INT8
+    """
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+
+    if calibration_dir is None:
+        quantize_dynamic(str(onnx_path), str(output_path), weight_type=QuantType.QUInt8)
+        return Path(output_path)
+
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider']).get_inputs()[0].name
+    reader = _LetterboxCalibrationReader(
+        list_images(calibration_dir)[:max_calibration_images], input_name, imgsz
+    )
+    quantize_static(
+        str(onnx_path), str(output_path), reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    return Path(output_path)
+
+
+def build_variants(weights_path, output_dir, calibration_dir=None, imgsz: int = 640) -> Dict[str, Path]:
+    """
+    Buat semua varian model (fp32, fp16, int8) dari satu weight .pt
+    Args:
+        weights_path: Path weight .pt
+        output_dir: Folder output varian
+        calibration_dir: Folder gambar kalibrasi untuk INT8 static (opsional)
+        imgsz: Ukuran input model
+    Returns:
+        Dict nama varian -> path model
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(weights_path).stem
+
+    exported = export_onnx(weights_path, imgsz=imgsz)
+    fp32_path = output_dir / f'{stem}.onnx'
+    if exported.resolve() != fp32_path.resolve():
+        exported.replace(fp32_path)
+    print(f'FP32 model: {fp32_path}')
+
+    fp16_path = convert_fp16(fp32_path, output_dir / f'{stem}_fp16.onnx')
+    print(f'FP16 model: {fp16_path}')
+
+    int8_path = quantize_int8(fp32_path, output_dir / f'{stem}_int8.onnx', calibration_dir, imgsz)
+    print(f'INT8 model: {int8_path}')
+
+    return {'fp32': fp32_path, 'fp16': fp16_path, 'int8': int8_path}
+
+
+def backend_for_model(model_path) -> str:
+    """Tentukan backend inference dari ekstensi file model"""
+    suffix = Path(model_path).suffix.lower()
+    if suffix == '.onnx':
+        return 'onnxruntime'
+    if suffix == '.xml':
+        return 'openvino'
+    return 'ultralytics'
@@ -0,0 +1,139 @@
+# File: backend/hybrid-detection/src/detection/tracker.py
+# Fungsi: Tracker ringan (template matching + motion gate) agar YOLO tidak perlu jalan di setiap frame
+import cv2
+import numpy as np
+from typing import List, Optional
+
+
+class BottleTracker:
+    """Class untuk membawa bbox botol antar frame, YOLO hanya dijalankan setiap N frame atau saat ada gerakan"""
+
+    def __init__(self, detect_every_n: int = 10, motion_threshold: float = 12.0,
+                 min_match_score: float = 0.6, search_margin: float = 0.25,
+                 motion_width: int = 160, template_size: int = 64):
+        """
+        Args:
+            detect_every_n: Jalankan deteksi penuh minimal sekali setiap N frame
+            motion_threshold: Rata-rata selisih pixel (0-255) antar frame kecil yang memicu deteksi penuh
+            min_match_score: Skor template matching minimum, di bawahnya track dianggap hilang
+            search_margin: Perluasan area pencarian di sekitar bbox terakhir (relatif ukuran bbox)
+            motion_width: Lebar frame yang diperkecil untuk motion gate
+            template_size: Sisi terpanjang template setelah diperkecil untuk template matching
+        """
+        self.detect_every_n = max(1, int(detect_every_n))
+        self.motion_threshold = motion_threshold
+        self.min_match_score = min_match_score
+        self.search_margin = search_margin
+        self.motion_width = motion_width
+        self.template_size = template_size
+
+        self.last_detection: Optional[dict] = None
+        self.frames_since_detection = 0
+        self.last_motion = 0.0
+        self._template: Optional[np.ndarray] = None
+        self._template_scale = 1.0
+        self._previous_small: Optional[np.ndarray] = None
+
+    def _motion_score(self, gray: np.ndarray) -> float:
+        """Selisih rata-rata frame kecil saat ini dengan frame sebelumnya"""
+        height, width = gray.shape[:2]
+        scale = self.motion_width / width
+        small = cv2.resize(gray, (self.motion_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        previous, self._previous_small = self._previous_small, small
+        if previous is None or previous.shape != small.shape:
+            return float('inf')
+        return float(cv2.absdiff(small, previous).mean())
+
+    def needs_detection(self, image: np.ndarray) -> bool:
+        """
+        Tentukan apakah frame ini perlu deteksi YOLO penuh
+        Args:
+            image: Frame BGR
+        Returns:
+            True jika belum ada track, sudah N frame sejak deteksi terakhir, atau motion gate terpicu
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.last_motion = self._motion_score(gray)
+
+        if self.last_detection is None or self._template is None:
+            return True
+        if self.frames_since_detection + 1 >= self.detect_every_n:
+            return True
+        return self.last_motion > self.motion_threshold
+
+    def update_detection(self, image: np.ndarray, detections: List[dict]):
+        """Simpan hasil deteksi YOLO terbaru sebagai dasar tracking"""
+        self.frames_since_detection = 0
+        if not detections:
+            self.last_detection = None
+            self._template = None
+            return
+
+        best = max(detections, key=lambda d: d['confidence'])
+        x1, y1, x2, y2 = best['bbox']
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        crop = gray[y1:y2, x1:x2]
+        if crop.size == 0:
+            self.last_detection = None
+            self._template = None
+            return
+
+        # Template diperkecil agar template matching murah untuk bbox besar
+        self._template_scale = min(1.0, self.template_size / max(crop.shape[:2]))
+        self._template = cv2.resize(crop, None, fx=self._template_scale, fy=self._template_scale,
+                                    interpolation=cv2.INTER_AREA)
+        self.last_detection = dict(best)
+
+    def track(self, image: np.ndarray) -> Optional[dict]:
+        """
+        Geser bbox terakhir ke posisi baru dengan template matching di sekitar bbox
+        Args:
+            image: Frame BGR
+        Returns:
+            Deteksi hasil tracking, atau None jika track hilang (frame berikutnya deteksi penuh)
+        """
+        if self.last_detection is None or self._template is None:
+            return None
+
+        img_h, img_w = image.shape[:2]
+        x1, y1, x2, y2 = self.last_detection['bbox']
+        box_w, box_h = x2 - x1, y2 - y1
+        margin_x, margin_y = int(box_w * self.search_margin), int(box_h * self.search_margin)
+
+        sx1, sy1 = max(0, x1 - margin_x), max(0, y1 - margin_y)
+        sx2, sy2 = min(img_w, x2 + margin_x), min(img_h, y2 + margin_y)
+
+        gray = cv2.cvtColor(image[sy1:sy2, sx1:sx2], cv2.COLOR_BGR2GRAY)
+        search = cv2.resize(gray, None, fx=self._template_scale, fy=self._template_scale,
+                            interpolation=cv2.INTER_AREA)
+
+        t_h, t_w = self._template.shape[:2]
+        if search.shape[0] < t_h or search.shape[1] < t_w:
+            self.last_detection = None
+            return None
+
+        scores = cv2.matchTemplate(search, self._template, cv2.TM_CCOEFF_NORMED)
+        _, max_score, _, max_loc = cv2.minMaxLoc(scores)
+        if max_score < self.min_match_score:
+            self.last_detection = None
+            return None
+
+        # Kembalikan posisi match ke koordinat full-res
+        nx1 = int(sx1 + max_loc[0] / self._template_scale)
+        ny1 = int(sy1 + max_loc[1] / self._template_scale)
+        nx1 = min(max(0, nx1), img_w - box_w)
+        ny1 = min(max(0, ny1), img_h - box_h)
+        nx2, ny2 = nx1 + box_w, ny1 + box_h
+
+        self.frames_since_detection += 1
+        self.last_detection = {
+            'bbox': [nx1, ny1, nx2, ny2],
+            'confidence': self.last_detection['confidence'],
+            'center': [(nx1 + nx2) // 2, (ny1 + ny2) // 2],
+            'width': box_w,
+            'height': box_h,
+            'match_score': float(max_score),
+        }
+        return dict(self.last_detection)
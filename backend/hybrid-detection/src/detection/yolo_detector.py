@@ -2,93 +2,142 @@
 # Fungsi: Deteksi botol menggunakan YOLO (You Only Look Once) AI model
 import cv2
 import numpy as np
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
-# Import YOLO dan torch
-try:
-    from ultralytics import YOLO
-    import torch  # ← Tambahkan import torch ini!
-    YOLO_AVAILABLE = True
-    print("✅ YOLO libraries loaded successfully")
-except ImportError as e:
-    print(f"⚠️ YOLO libraries not available: {e}")
-    YOLO_AVAILABLE = False
-    YOLO = None
-    torch = None
+from config.settings import settings
+from detection.adaptive_resolution import roi_rect
+from detection.backends import create_backend, resolve_device
+
+# Nilai default model path per backend (onnxruntime memakai varian terkuantisasi yang dipilih)
+DEFAULT_MODEL_PATHS = {
+    'ultralytics': settings.YOLO_MODEL_PATH,
+    'onnxruntime': settings.YOLO_MODEL_VARIANTS.get(settings.YOLO_MODEL_VARIANT, settings.YOLO_ONNX_PATH),
+    'openvino': settings.YOLO_OPENVINO_PATH,
+}
 
 class YOLOBottleDetector:
     """Class untuk mendeteksi botol menggunakan YOLO"""
     
-    def __init__(self, model_path: str = 'yolov8n.pt', confidence: float = 0.5):
+    def __init__(self, model_path: Optional[str] = None, confidence: float = 0.5,
+                 backend: Optional[str] = None, device: Optional[str] = None,
+                 roi: Optional[Sequence[float]] = None):
         """
         Inisialisasi detector YOLO
         Args:
-            model_path: Path ke file model YOLO (.pt)
+            model_path: Path ke file model (.pt / .onnx / .xml), default dari Settings sesuai backend
             confidence: Minimum confidence score (0.0-1.0)
+            backend: 'ultralytics', 'onnxruntime' atau 'openvino' (default settings.YOLO_BACKEND)
+            device: Device inference (default settings.YOLO_DEVICE, 'auto' = cuda jika tersedia)
+            roi: Area inference (x1, y1, x2, y2) relatif 0-1 untuk kamera tetap; hanya crop ini
+                yang masuk model, bbox dikembalikan dalam koordinat frame penuh. None = seluruh frame
         """
         self.confidence = confidence
+        self.roi = tuple(roi) if roi else None
+        self.backend_name = backend or settings.YOLO_BACKEND
+        self.device = resolve_device(device or settings.YOLO_DEVICE)
+        model_path = model_path or DEFAULT_MODEL_PATHS.get(self.backend_name)
         
-        # Check if YOLO is available
-        if not YOLO_AVAILABLE:
-            print("YOLO not available. Using fallback mode.")
-            self.device = 'none'
-            self.model = None
-            return
-        
-        # Determine device only if torch is available
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        options = {}
+        if self.backend_name == 'onnxruntime':
+            options['intra_op_threads'] = settings.ONNX_INTRA_OP_THREADS
         
         try:
-            # Load model YOLO pre-trained
-            self.model = YOLO(model_path)
-            print(f'YOLO model loaded on {self.device}')
+            # Load model sesuai backend yang dipilih
+            self.model = create_backend(
+                self.backend_name,
+                model_path,
+                device=self.device,
+                confidence=confidence,
+                iou_threshold=settings.YOLO_IOU,
+                imgsz=settings.YOLO_IMGSZ,
+                **options,
+            )
+            print(f'YOLO model loaded with {self.backend_name} backend on {self.device}')
         except Exception as e:
-            print(f'Error loading YOLO model: {e}')
+            print(f'Error loading YOLO model ({self.backend_name}): {e}')
             self.model = None
     
-    def detect_bottles(self, image: np.ndarray) -> List[dict]:
+    def detect_bottles(self, image: np.ndarray, imgsz: Optional[int] = None) -> List[dict]:
         """
         Deteksi botol dalam gambar
         Args:
             image: Gambar input (OpenCV format)
+            imgsz: Ukuran input model untuk frame ini, None = settings.YOLO_IMGSZ
         Returns:
             List berisi data deteksi botol
         """
-        if not YOLO_AVAILABLE or self.model is None:
+        if self.model is None:
             print("YOLO model not available, returning empty detections")
             return []
         
         try:
             # Jalankan inference YOLO
-            results = self.model(image, conf=self.confidence, device=self.device)
-            
-            detections = []
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Ambil koordinat bounding box
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # Filter khusus class botol (39 = bottle di COCO dataset)
-                        if class_id == 39:
-                            detection = {
-                                'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                                'confidence': float(confidence),
-                                'center': [int((x1 + x2) / 2), int((y1 + y2) / 2)],
-                                'width': int(x2 - x1),
-                                'height': int(y2 - y1)
-                            }
-                            detections.append(detection)
-            
-            return detections
+            return self.detect_bottles_batch([image], imgsz)[0]
             
         except Exception as e:
             print(f'Error in YOLO detection: {e}')
             return []
     
+    def detect_bottles_batch(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[List[dict]]:
+        """
+        Deteksi botol pada beberapa gambar sekaligus dalam satu forward pass
+        Args:
+            images: List gambar input (OpenCV format)
+            imgsz: Ukuran input model untuk batch ini, None = settings.YOLO_IMGSZ
+        Returns:
+            List hasil deteksi per gambar, urutannya sama dengan input
+        """
+        if not images:
+            return []
+        
+        if self.model is None:
+            print("YOLO model not available, returning empty detections")
+            return [[] for _ in images]
+        
+        # Crop ROI berupa view (tanpa salinan); offset dipakai untuk kembali ke koordinat frame penuh
+        rects = [roi_rect(image.shape, self.roi) for image in images]
+        crops = [image[y1:y2, x1:x2] for image, (x1, y1, x2, y2) in zip(images, rects)]
+        
+        # Backend mengembalikan satu array prediksi per gambar
+        predictions = self.model.predict(crops, imgsz)
+        return [
+            self._parse_predictions(prediction, (x1, y1))
+            for prediction, (x1, y1, _, _) in zip(predictions, rects)
+        ]
+    
+    def _parse_predictions(self, predictions: np.ndarray, offset: tuple = (0, 0)) -> List[dict]:
+        """
+        Konversi array prediksi backend menjadi list deteksi botol
+        Args:
+            predictions: Array (N, 6) [x1, y1, x2, y2, confidence, class_id]
+            offset: Posisi (x, y) crop ROI di frame penuh
+        Returns:
+            List berisi data deteksi botol
+        """
+        # Filter khusus class botol (39 = bottle di COCO dataset) untuk semua box sekaligus
+        bottles = predictions[predictions[:, 5].astype(np.int64) == 39]
+        if len(bottles) == 0:
+            return []
+        
+        corners = bottles[:, :4]
+        if offset != (0, 0):
+            corners = corners + np.array([offset[0], offset[1], offset[0], offset[1]], dtype=corners.dtype)
+        boxes = corners.astype(np.int64)
+        centers = ((corners[:, :2] + corners[:, 2:]) / 2).astype(np.int64)
+        sizes = (corners[:, 2:] - corners[:, :2]).astype(np.int64)
+        
+        return [
+            {
+                'bbox': bbox,
+                'confidence': confidence,
+                'center': center,
+                'width': width,
+                'height': height
+            }
+            for bbox, confidence, center, (width, height)
+            in zip(boxes.tolist(), bottles[:, 4].tolist(), centers.tolist(), sizes.tolist())
+        ]
+    
     def get_best_detection(self, detections: List[dict]) -> Optional[dict]:
         """Get the detection with highest confidence"""
         if not detections:
@@ -0,0 +1,250 @@
+# File: backend/hybrid-detection/src/image_processing/batch_measurements.py
+# Fungsi: Versi vektor (NumPy) dari perhitungan dimensi, skala, volume, confidence dan klasifikasi
+#         untuk banyak kontur sekaligus. Hasilnya sama dengan method skalar OpenCVSizeCalculator.
+import math
+import numpy as np
+from typing import List, Optional, Tuple, Union
+
+from image_processing.catalog import BottleCatalog
+
+# Field pengukuran kontur yang dipakai perhitungan (dari _analyze_contour_measurements)
+MEASUREMENT_DTYPE = np.dtype([
+    ('major_axis', 'f8'),
+    ('minor_axis', 'f8'),
+    ('bounding_width', 'f8'),
+    ('bounding_height', 'f8'),
+    ('aspect_ratio', 'f8'),
+    ('solidity', 'f8'),
+    ('circularity', 'f8'),
+    ('extent', 'f8'),
+])
+
+# Sama dengan output calculate_bottle_dimensions
+DIMENSIONS_DTYPE = np.dtype([
+    ('height_pixels', 'f8'),
+    ('diameter_pixels', 'f8'),
+    ('raw_diameter_pixels', 'f8'),
+    ('volume_cubic_pixels', 'f8'),
+    ('raw_volume_cubic_pixels', 'f8'),
+    ('shape_factor', 'f8'),
+    ('solidity_factor', 'f8'),
+    ('aspect_ratio', 'f8'),
+    ('measurement_confidence', 'f8'),
+])
+
+# Sama dengan output estimate_real_dimensions_from_context, tetapi belum dibulatkan
+REAL_DIMENSIONS_DTYPE = np.dtype([
+    ('real_height_cm', 'f8'),
+    ('real_diameter_cm', 'f8'),
+    ('estimated_volume_ml', 'f8'),
+    ('estimated_scale_ppm', 'f8'),
+    ('measurement_confidence', 'f8'),
+])
+
+SHAPE_FACTOR = 0.85  # Faktor koreksi bentuk botol (sama dengan calculate_bottle_dimensions)
+
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Pembulatan yang identik dengan round() Python.
+    np.round untuk desimal > 0 memakai x * 10^n sehingga bisa berbeda 1 ulp pada kasus batas.
+    """
+    if ndigits == 0:
+        return np.rint(values)
+    return np.array([round(float(v), ndigits) for v in values], dtype=np.float64)
+
+
+def measurements_to_array(measurements: List[dict]) -> np.ndarray:
+    """
+    Susun list dict pengukuran kontur menjadi structured array
+    Args:
+        measurements: List bottle_data['measurements']
+    Returns:
+        Structured array MEASUREMENT_DTYPE
+    """
+    array = np.zeros(len(measurements), dtype=MEASUREMENT_DTYPE)
+    for name in MEASUREMENT_DTYPE.names:
+        default = 1 if name == 'aspect_ratio' else 0
+        array[name] = [m.get(name, default) for m in measurements]
+    return array
+
+
+def measurement_confidence_batch(measurements: np.ndarray) -> np.ndarray:
+    """Versi vektor dari _calculate_measurement_confidence"""
+    solidity = measurements['solidity']
+    aspect_ratio = measurements['aspect_ratio']
+    extent = measurements['extent']
+
+    # Score berdasarkan solidity (0.6-1.0 = good)
+    solidity_score = np.where(solidity >= 0.3, np.minimum(solidity / 0.6, 1.0), 0.0)
+
+    # Score berdasarkan aspect ratio (botol biasanya 1.5-4.0)
+    aspect_score = np.select(
+        [(aspect_ratio >= 1.5) & (aspect_ratio <= 4.0), (aspect_ratio >= 1.0) & (aspect_ratio < 1.5)],
+        [1.0, (aspect_ratio - 1.0) / 0.5],
+        default=np.maximum(0, 1.0 - np.abs(aspect_ratio - 2.5) / 2.5),
+    )
+
+    # Score berdasarkan extent (seberapa penuh bounding box)
+    extent_score = np.where(extent >= 0.2, np.minimum(extent / 0.5, 1.0), 0.0)
+
+    total_confidence = solidity_score * 0.4 + aspect_score * 0.4 + extent_score * 0.2
+    return np.minimum(np.maximum(total_confidence, 0.0), 1.0)
+
+
+def calculate_dimensions_batch(measurements: np.ndarray) -> np.ndarray:
+    """
+    Versi vektor dari calculate_bottle_dimensions
+    Args:
+        measurements: Structured array MEASUREMENT_DTYPE
+    Returns:
+        Structured array DIMENSIONS_DTYPE
+    """
+    major_axis = measurements['major_axis']
+    minor_axis = measurements['minor_axis']
+    aspect_ratio = measurements['aspect_ratio']
+    solidity = measurements['solidity']
+
+    # Botol tegak memakai sumbu ellipse, botol miring/pendek memakai kombinasi dengan bounding box
+    upright = aspect_ratio > 1.5
+    estimated_height = np.where(upright, major_axis, np.maximum(major_axis, measurements['bounding_height']))
+    estimated_diameter = np.where(upright, minor_axis, np.minimum(minor_axis, measurements['bounding_width']))
+
+    corrected_diameter = estimated_diameter * np.sqrt(solidity)
+    radius = corrected_diameter / 2
+    # float_power memakai pow() seperti operator ** Python (numpy ** 2 memakai x*x, beda 1 ulp)
+    volume_cylinder = math.pi * np.float_power(radius, 2) * estimated_height
+    corrected_volume = volume_cylinder * SHAPE_FACTOR * solidity
+
+    dimensions = np.zeros(len(measurements), dtype=DIMENSIONS_DTYPE)
+    dimensions['height_pixels'] = estimated_height
+    dimensions['diameter_pixels'] = corrected_diameter
+    dimensions['raw_diameter_pixels'] = estimated_diameter
+    dimensions['volume_cubic_pixels'] = corrected_volume
+    dimensions['raw_volume_cubic_pixels'] = volume_cylinder
+    dimensions['shape_factor'] = SHAPE_FACTOR
+    dimensions['solidity_factor'] = solidity
+    dimensions['aspect_ratio'] = aspect_ratio
+    dimensions['measurement_confidence'] = measurement_confidence_batch(measurements)
+    return dimensions
+
+
+def estimate_real_dimensions_batch(dimensions: np.ndarray, pixels_per_cm: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Versi vektor dari estimate_real_dimensions_from_context (nilai belum dibulatkan)
+    Args:
+        dimensions: Structured array DIMENSIONS_DTYPE
+        pixels_per_cm: Skala kalibrasi per baris (NaN = tebak dari ukuran tipikal), None = semua ditebak
+    Returns:
+        Structured array REAL_DIMENSIONS_DTYPE
+    """
+    height_pixels = dimensions['height_pixels']
+    diameter_pixels = dimensions['diameter_pixels']
+
+    # Botol tegak: asumsi tinggi 20cm, selain itu asumsi diameter 7cm; scale dibatasi 5-50 px/cm
+    estimated_scale = np.where(dimensions['aspect_ratio'] > 2.0, height_pixels / 20.0, diameter_pixels / 7.0)
+    estimated_scale = np.clip(estimated_scale, 5, 50)
+    if pixels_per_cm is not None:
+        estimated_scale = np.where(np.isnan(pixels_per_cm), estimated_scale, pixels_per_cm)
+
+    real = np.zeros(len(dimensions), dtype=REAL_DIMENSIONS_DTYPE)
+    real['real_height_cm'] = np.clip(height_pixels / estimated_scale, 8, 35)
+    real['real_diameter_cm'] = np.clip(diameter_pixels / estimated_scale, 3, 12)
+    real['estimated_volume_ml'] = np.clip(dimensions['volume_cubic_pixels'] / np.float_power(estimated_scale, 3), 50, 2000)
+    real['estimated_scale_ppm'] = estimated_scale
+    real['measurement_confidence'] = dimensions['measurement_confidence']
+    return real
+
+
+def classify_batch(estimated_volume_ml: np.ndarray, measurement_confidence: np.ndarray,
+                   catalog: BottleCatalog, tolerance: float = 25) -> dict:
+    """
+    Versi vektor dari classify_bottle
+    Args:
+        estimated_volume_ml: Volume terbulat (seperti output estimate_real_dimensions_from_context)
+        measurement_confidence: Confidence pengukuran dalam persen (terbulat 1 desimal)
+        catalog: Katalog spesifikasi botol
+        tolerance: Toleransi volume dalam persen
+    Returns:
+        Dict array: 'index' (-1 = Unknown), 'confidence_percent', 'volume_match_percent', 'measurement_quality'
+    """
+    confidence_factor = measurement_confidence / 100
+
+    # searchsorted pada volume terurut, hasil (termasuk urutan saat seri) sama dengan loop skalar
+    best, min_difference = catalog.match_volumes(estimated_volume_ml, tolerance)
+    matched = best >= 0
+
+    best_volume = catalog.volumes[np.where(matched, best, 0)] if len(catalog) else np.ones(len(best))
+    volume_confidence = np.maximum(0, 100 - (np.where(matched, min_difference, 0) / best_volume) * 100)
+    final_confidence = (volume_confidence * 0.7) + (confidence_factor * 100 * 0.3)
+
+    return {
+        'index': best,
+        'confidence_percent': np.where(matched, final_confidence, 0.0),
+        'volume_match_percent': np.where(matched, volume_confidence, np.nan),
+        'measurement_quality': confidence_factor * 100,
+    }
+
+
+def measure_batch(measurements: List[dict], known_specs: Union[BottleCatalog, dict], tolerance: float = 25,
+                  pixels_per_cm: Optional[List[Optional[float]]] = None) -> List[Tuple[dict, dict, dict]]:
+    """
+    Hitung dimensi, ukuran real dan klasifikasi untuk banyak kontur dalam satu pass vektor
+    Args:
+        measurements: List bottle_data['measurements']
+        known_specs: BottleCatalog (atau dict spesifikasi)
+        tolerance: Toleransi klasifikasi dalam persen
+        pixels_per_cm: Skala kalibrasi per kontur (None = tebak), seperti argumen versi skalar
+    Returns:
+        List tuple (dimensions, real_dimensions, classification) dengan format dan nilai
+        yang sama seperti method skalar OpenCVSizeCalculator
+    """
+    if not measurements:
+        return []
+
+    dimensions = calculate_dimensions_batch(measurements_to_array(measurements))
+    scales = None
+    if pixels_per_cm is not None:
+        scales = np.array([scale if scale else np.nan for scale in pixels_per_cm], dtype=np.float64)
+    real = estimate_real_dimensions_batch(dimensions, scales)
+
+    # Pembulatan sama persis dengan versi skalar (klasifikasi memakai nilai terbulat)
+    rounded = {
+        'real_height_cm': _round_like_python(real['real_height_cm'], 2),
+        'real_diameter_cm': _round_like_python(real['real_diameter_cm'], 2),
+        'estimated_volume_ml': _round_like_python(real['estimated_volume_ml'], 0),
+        'estimated_scale_ppm': _round_like_python(real['estimated_scale_ppm'], 2),
+        'measurement_confidence': _round_like_python(real['measurement_confidence'] * 100, 1),
+    }
+
+    catalog = BottleCatalog.coerce(known_specs)
+    classified = classify_batch(rounded['estimated_volume_ml'], rounded['measurement_confidence'],
+                                catalog, tolerance)
+
+    results = []
+    for i in range(len(measurements)):
+        dimension_dict = {name: float(dimensions[name][i]) for name in DIMENSIONS_DTYPE.names}
+        real_dict = {name: float(rounded[name][i]) for name in REAL_DIMENSIONS_DTYPE.names}
+        real_dict['scale_confidence'] = 'improved' if scales is None or np.isnan(scales[i]) else 'calibrated'
+        nearest_sku = catalog.nearest_shape(real_dict['estimated_volume_ml'], real_dict['real_height_cm'],
+                                            real_dict['real_diameter_cm'])
+
+        measurement_quality = round(float(classified['measurement_quality'][i]), 2)
+        if classified['index'][i] >= 0:
+            classification = {
+                'classification': catalog.names[classified['index'][i]],
+                'confidence_percent': round(float(classified['confidence_percent'][i]), 2),
+                'volume_match_percent': round(float(classified['volume_match_percent'][i]), 2),
+                'measurement_quality': measurement_quality,
+                'nearest_sku': nearest_sku,
+            }
+        else:
+            classification = {
+                'classification': 'Unknown',
+                'confidence_percent': 0,
+                'measurement_quality': measurement_quality,
+                'nearest_sku': nearest_sku,
+            }
+        results.append((dimension_dict, real_dict, classification))
+
+    return results
@@ -0,0 +1,131 @@
+# File: backend/hybrid-detection/src/image_processing/calibration.py
+# Fungsi: Kalibrasi skala pixel per cm dari marker ArUco atau objek berukuran diketahui
+import math
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class Calibration:
+    """Hasil kalibrasi satu kamera: skala pixel/cm dan (opsional) homography gambar -> bidang cm"""
+
+    def __init__(self, pixels_per_cm: float, source: str, homography: Optional[np.ndarray] = None,
+                 reference: Optional[dict] = None):
+        """
+        Args:
+            pixels_per_cm: Skala rata-rata di area referensi
+            source: 'marker' atau 'object'
+            homography: Matriks 3x3 dari koordinat gambar ke bidang referensi (cm), None jika tidak ada
+            reference: Info referensi untuk response (id marker, ukuran, bbox, dll)
+        """
+        self.pixels_per_cm = float(pixels_per_cm)
+        self.source = source
+        self.homography = homography
+        self.reference = reference or {}
+        self.created_at = time.time()
+
+    def scale_at(self, point: Optional[Tuple[float, float]] = None) -> float:
+        """
+        Skala pixel/cm lokal di titik gambar (koreksi perspektif jika ada homography)
+        Args:
+            point: Titik (x, y) di gambar, mis. pusat bbox botol
+        Returns:
+            Pixel per cm
+        """
+        if self.homography is None or point is None:
+            return self.pixels_per_cm
+
+        # Luas 1 pixel persegi di bidang referensi = |det Jacobian| homography di titik tersebut
+        x, y = point
+        points = np.array([[[x, y]], [[x + 1, y]], [[x, y + 1]]], dtype=np.float64)
+        mapped = cv2.perspectiveTransform(points, self.homography)[:, 0]
+        dx, dy = mapped[1] - mapped[0], mapped[2] - mapped[0]
+        area_cm2 = abs(dx[0] * dy[1] - dx[1] * dy[0])
+        if not math.isfinite(area_cm2) or area_cm2 <= 0:
+            return self.pixels_per_cm
+        return 1.0 / math.sqrt(area_cm2)
+
+    def to_dict(self) -> dict:
+        return {
+            'pixels_per_cm': round(self.pixels_per_cm, 3),
+            'source': self.source,
+            'has_homography': self.homography is not None,
+            'reference': self.reference,
+            'created_at': self.created_at,
+        }
+
+
+def _aruco_dictionary(name: str):
+    """Dictionary ArUco dari nama konstanta OpenCV (mis. 'DICT_4X4_50')"""
+    if not hasattr(cv2, 'aruco'):
+        raise RuntimeError('OpenCV was built without the aruco module')
+    dictionary_id = getattr(cv2.aruco, name, None)
+    if dictionary_id is None:
+        raise ValueError(f'Unknown ArUco dictionary: {name}')
+    return cv2.aruco.getPredefinedDictionary(dictionary_id)
+
+
+def calibrate_from_marker(image: np.ndarray, marker_size_cm: float,
+                          dictionary: str = 'DICT_4X4_50') -> Optional[Calibration]:
+    """
+    Cari marker ArUco persegi dan hitung skala + homography dari 4 sudutnya
+    Args:
+        image: Gambar BGR
+        marker_size_cm: Panjang sisi marker tercetak
+        dictionary: Nama dictionary ArUco
+    Returns:
+        Calibration, atau None jika tidak ada marker terdeteksi
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    detector = cv2.aruco.ArucoDetector(_aruco_dictionary(dictionary), cv2.aruco.DetectorParameters())
+    corners, ids, _ = detector.detectMarkers(gray)
+    if ids is None or len(ids) == 0:
+        return None
+
+    # Marker terbesar di frame = paling sedikit error kuantisasi sudut
+    areas = [cv2.contourArea(marker.reshape(-1, 2).astype(np.float32)) for marker in corners]
+    best = int(np.argmax(areas))
+    marker = corners[best].reshape(4, 2).astype(np.float32)
+
+    sides = np.linalg.norm(marker - np.roll(marker, -1, axis=0), axis=1)
+    pixels_per_cm = float(sides.mean()) / marker_size_cm
+
+    # Sudut ArUco urut searah jarum jam dari kiri atas -> persegi di bidang cm
+    plane = np.array([[0, 0], [marker_size_cm, 0], [marker_size_cm, marker_size_cm], [0, marker_size_cm]],
+                     dtype=np.float32)
+    homography = cv2.getPerspectiveTransform(marker, plane)
+
+    calibration = Calibration(pixels_per_cm, 'marker', homography, {
+        'marker_id': int(np.asarray(ids).ravel()[best]),
+        'marker_size_cm': marker_size_cm,
+        'corners': marker.round(1).tolist(),
+    })
+    # Skala rata-rata diganti skala lokal di pusat marker (konsisten dengan scale_at)
+    calibration.pixels_per_cm = calibration.scale_at(tuple(marker.mean(axis=0)))
+    return calibration
+
+
+def calibrate_from_object(dimensions: dict, known_height_cm: float, bbox: Optional[list] = None,
+                          name: Optional[str] = None) -> Optional[Calibration]:
+    """
+    Skala dari objek berukuran diketahui (mis. botol referensi) yang sudah diukur konturnya
+    Args:
+        dimensions: Hasil calculate_bottle_dimensions
+        known_height_cm: Tinggi sebenarnya objek referensi
+        bbox: Bbox deteksi objek (untuk response)
+        name: Nama objek referensi
+    Returns:
+        Calibration tanpa homography, atau None jika dimensi tidak valid
+    """
+    height_pixels = dimensions.get('height_pixels', 0)
+    if not height_pixels or known_height_cm <= 0:
+        return None
+
+    return Calibration(height_pixels / known_height_cm, 'object', None, {
+        'object': name,
+        'known_height_cm': known_height_cm,
+        'height_pixels': round(float(height_pixels), 1),
+        'bbox': bbox,
+    })
@@ -0,0 +1,273 @@
+# File: backend/hybrid-detection/src/image_processing/catalog.py
+# Fungsi: Katalog spesifikasi botol berbasis array (volume terurut + KD-tree) yang dimuat dari file
+import csv
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+# Kolom spesifikasi yang dipakai untuk pencarian bentuk (volume mL, tinggi cm, diameter cm)
+SHAPE_FIELDS = ('volume', 'height', 'diameter')
+
+
+class _KDTree:
+    """KD-tree implisit di atas array: node = median tiap rentang index, tanpa objek per node"""
+
+    def __init__(self, points: np.ndarray):
+        self.points = np.array(points, dtype=np.float64)
+        self.index = np.arange(len(self.points))
+        self.axes = np.zeros(len(self.points), dtype=np.int8)
+        self._build(0, len(self.points), 0)
+        self._points_list = self.points.tolist()
+        self._index_list = self.index.tolist()
+        self._axes_list = self.axes.tolist()
+
+    def _build(self, lo: int, hi: int, depth: int):
+        if hi - lo <= 1:
+            return
+        axis = depth % self.points.shape[1]
+        mid = (lo + hi) // 2
+        # Partisi rentang [lo, hi) di sekitar median pada axis ini
+        order = np.argpartition(self.points[lo:hi, axis], mid - lo)
+        self.points[lo:hi] = self.points[lo:hi][order]
+        self.index[lo:hi] = self.index[lo:hi][order]
+        self.axes[mid] = axis
+        self._build(lo, mid, depth + 1)
+        self._build(mid + 1, hi, depth + 1)
+
+    def nearest(self, query) -> Tuple[int, float]:
+        """
+        Tetangga terdekat (jarak Euclidean)
+        Returns:
+            Tuple (index baris asli, jarak), (-1, inf) jika tree kosong
+        """
+        # List Python lebih cepat dari indexing numpy per node untuk query tunggal
+        points = self._points_list
+        query = [float(value) for value in query]
+        best_row, best_distance = -1, math.inf
+        # Stack (lo, hi, jarak minimum ke bidang split); sisi jauh dilewati jika sudah lebih jauh dari hasil terbaik
+        stack = [(0, len(points), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if lo >= hi or bound > best_distance:
+                continue
+            mid = (lo + hi) // 2
+            point = points[mid]
+            distance = math.sqrt(sum((p - q) ** 2 for p, q in zip(point, query)))
+            row = self._index_list[mid]
+            # Jarak sama: utamakan baris asli yang lebih awal (sama dengan scan linear)
+            if distance < best_distance or (distance == best_distance and row < best_row):
+                best_row, best_distance = row, distance
+
+            axis = self._axes_list[mid]
+            delta = query[axis] - point[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if delta < 0 else ((mid + 1, hi), (lo, mid))
+            stack.append((far[0], far[1], abs(delta)))
+            stack.append((near[0], near[1], 0.0))
+        return best_row, best_distance
+
+
+class BottleCatalog:
+    """
+    Index katalog SKU botol: array volume terurut untuk match toleransi (bisect)
+    dan KD-tree atas log(volume, tinggi, diameter) untuk SKU dengan bentuk terdekat
+    """
+
+    def __init__(self, specs: Dict[str, dict], source: Optional[str] = None):
+        """
+        Args:
+            specs: Dict nama -> {'volume', 'height', 'diameter'} (urutan dict = prioritas saat seri)
+            source: Path file asal (untuk info), None = dari Settings
+        """
+        self.source = source
+        self.specs = dict(specs)
+        self.names = list(self.specs.keys())
+        self.loaded_at = time.time()
+
+        volumes = np.array([float(spec['volume']) for spec in self.specs.values()], dtype=np.float64)
+        if len(volumes) and (volumes <= 0).any():
+            raise ValueError('Bottle volumes must be positive')
+
+        # Urutan stabil: volume sama tetap mengikuti urutan katalog
+        self.order = np.argsort(volumes, kind='stable')
+        self.sorted_volumes = volumes[self.order]
+        self._sorted_list = self.sorted_volumes.tolist()
+        self.volumes = volumes
+
+        # Hanya SKU dengan volume, tinggi dan diameter lengkap yang masuk KD-tree
+        values = list(self.specs.values())
+        rows = [i for i, spec in enumerate(values) if all(spec.get(field) for field in SHAPE_FIELDS)]
+        self._shape_rows = np.array(rows, dtype=np.int64)
+        points = np.log([[float(values[i][field]) for field in SHAPE_FIELDS] for i in rows])
+        self._tree = _KDTree(points.reshape(-1, len(SHAPE_FIELDS)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.specs.get(name)
+
+    def _run_start(self, position: int) -> int:
+        """Posisi pertama dari deretan volume yang sama dengan sorted_volumes[position]"""
+        return bisect_left(self._sorted_list, self._sorted_list[position])
+
+    def match_volume(self, estimated_volume: float, tolerance: float = 25) -> Tuple[int, float]:
+        """
+        SKU dengan selisih volume terkecil dalam toleransi (hasil sama dengan scan linear classify_bottle)
+        Args:
+            estimated_volume: Volume terukur (mL)
+            tolerance: Toleransi selisih terhadap volume SKU, dalam persen
+        Returns:
+            Tuple (index SKU di self.names atau -1, selisih volume)
+        """
+        # Kandidat dalam toleransi membentuk rentang kontinu di sekitar posisi bisect,
+        # jadi selisih terkecil selalu ada di salah satu tetangga terdekat
+        position = bisect_left(self._sorted_list, estimated_volume)
+        best, min_difference = -1, float('inf')
+        for candidate in (position - 1, position):
+            if not 0 <= candidate < len(self._sorted_list):
+                continue
+            candidate = self._run_start(candidate)
+            row = int(self.order[candidate])
+            volume = self._sorted_list[candidate]
+            volume_diff = abs(estimated_volume - volume)
+            if (volume_diff / volume) * 100 > tolerance:
+                continue
+            if volume_diff < min_difference or (volume_diff == min_difference and row < best):
+                best, min_difference = row, volume_diff
+        return best, min_difference
+
+    def match_volumes(self, estimated_volumes: np.ndarray, tolerance: float = 25) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Versi vektor dari match_volume (searchsorted untuk semua volume sekaligus)
+        Returns:
+            Tuple (array index SKU, -1 jika tidak ada match; array selisih volume, inf jika tidak ada match)
+        """
+        estimated_volumes = np.asarray(estimated_volumes, dtype=np.float64)
+        count = len(self.sorted_volumes)
+        if count == 0:
+            return np.full(len(estimated_volumes), -1, dtype=np.int64), np.full(len(estimated_volumes), np.inf)
+
+        position = np.searchsorted(self.sorted_volumes, estimated_volumes, side='left')
+        best = np.full(len(estimated_volumes), -1, dtype=np.int64)
+        min_difference = np.full(len(estimated_volumes), np.inf)
+
+        for candidate in (position - 1, position):
+            valid = (candidate >= 0) & (candidate < count)
+            candidate = np.clip(candidate, 0, count - 1)
+            # Awal deretan volume yang sama (SKU yang lebih awal di katalog menang saat seri)
+            candidate = np.searchsorted(self.sorted_volumes, self.sorted_volumes[candidate], side='left')
+            rows = self.order[candidate]
+            volumes = self.sorted_volumes[candidate]
+            volume_diff = np.abs(estimated_volumes - volumes)
+            valid &= (volume_diff / volumes) * 100 <= tolerance
+            better = valid & ((volume_diff < min_difference) | ((volume_diff == min_difference) & (rows < best)))
+            best = np.where(better, rows, best)
+            min_difference = np.where(better, volume_diff, min_difference)
+        return best, min_difference
+
+    def nearest_shape(self, volume: float, height: float, diameter: float) -> Optional[dict]:
+        """
+        SKU dengan kombinasi volume/tinggi/diameter terdekat (jarak di ruang log = selisih relatif)
+        Returns:
+            Dict {'name', 'distance'}, None jika katalog tidak punya data bentuk atau input tidak valid
+        """
+        if len(self._shape_rows) == 0 or min(volume, height, diameter) <= 0:
+            return None
+        position, distance = self._tree.nearest(np.log([volume, height, diameter]))
+        return {'name': self.names[int(self._shape_rows[position])], 'distance': round(distance, 4)}
+
+    def info(self) -> dict:
+        return {'skus': len(self), 'source': self.source, 'loaded_at': self.loaded_at}
+
+    @classmethod
+    def coerce(cls, specs: Union['BottleCatalog', Dict[str, dict]]) -> 'BottleCatalog':
+        """Terima katalog atau dict spesifikasi (format lama KNOWN_BOTTLE_SPECS)"""
+        return specs if isinstance(specs, BottleCatalog) else cls(specs)
+
+
+def load_catalog_file(path: Union[str, Path]) -> BottleCatalog:
+    """
+    Muat katalog dari file
+    Format:
+        .json: {"<nama>": {"volume": .., "height": .., "diameter": ..}} atau list objek dengan 'name'/'sku'
+        .csv: header name (atau sku), volume, height, diameter
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        data = json.loads(path.read_text())
+        rows = data if isinstance(data, list) else [{'name': name, **spec} for name, spec in data.items()]
+
+    specs = {}
+    for row in rows:
+        name = row.get('name') or row.get('sku')
+        if not name:
+            raise ValueError(f'Catalog entry without name/sku in {path}')
+        specs[str(name)] = {
+            field: float(row[field]) for field in SHAPE_FIELDS if row.get(field) not in (None, '')
+        }
+        if 'volume' not in specs[str(name)]:
+            raise ValueError(f'Catalog entry {name} has no volume')
+    return BottleCatalog(specs, str(path))
+
+
+class CatalogStore:
+    """Katalog aktif per proses; file dicek ulang (mtime) secara berkala dan dimuat ulang saat berubah"""
+
+    def __init__(self, path: Optional[Union[str, Path]], fallback_specs: Dict[str, dict],
+                 check_interval_seconds: float = 2.0):
+        """
+        Args:
+            path: File katalog, None = pakai fallback_specs
+            fallback_specs: Spesifikasi default (Settings.KNOWN_BOTTLE_SPECS)
+            check_interval_seconds: Jeda minimum antar cek mtime file
+        """
+        self.path = Path(path) if path else None
+        self.check_interval_seconds = check_interval_seconds
+        self._catalog = BottleCatalog(fallback_specs)
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._reload_if_changed(force=True)
+
+    def _reload_if_changed(self, force: bool = False):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if force:
+                print(f'Bottle catalog not found ({e}), using built-in specs')
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            catalog = load_catalog_file(self.path)
+        except Exception as e:
+            # Katalog lama tetap dipakai sampai file diperbaiki
+            print(f'Could not load bottle catalog {self.path}: {e}')
+            self._mtime = mtime
+            return
+        self._catalog = catalog
+        self._mtime = mtime
+        print(f'Bottle catalog loaded: {len(catalog)} SKUs from {self.path}')
+
+    def get(self) -> BottleCatalog:
+        """Katalog terbaru (cek file paling sering sekali per check_interval_seconds)"""
+        if self.path is not None:
+            now = time.monotonic()
+            if now - self._checked_at >= self.check_interval_seconds:
+                with self._lock:
+                    if now - self._checked_at >= self.check_interval_seconds:
+                        self._checked_at = now
+                        self._reload_if_changed()
+        return self._catalog
@@ -3,24 +3,41 @@
 import cv2
 import numpy as np
 import math
-from typing import Optional, Dict, Tuple, List
+from typing import Optional, Dict, Tuple, List, Union
+
+from image_processing.catalog import BottleCatalog
 
 class OpenCVSizeCalculator:
     """Class untuk menghitung ukuran botol dengan pengukuran kontur OpenCV"""
     
-    def __init__(self, pixels_per_cm_base: float = 10.0):
+    # Urutan cascade segmentasi, dari yang paling murah
+    CASCADE_STAGES = ('otsu_reduced', 'otsu_canny_reduced', 'full')
+    
+    def __init__(self, pixels_per_cm_base: float = 10.0, cascade: bool = True,
+                 cascade_max_side: int = 256, cascade_min_confidence: float = 0.7):
         """
         Args:
             pixels_per_cm_base: Base conversion rate (akan dikalibrasi otomatis)
+            cascade: True = coba segmentasi murah pada ROI diperkecil dulu (early exit)
+            cascade_max_side: Sisi terpanjang ROI untuk tahap cascade tereduksi
+            cascade_min_confidence: Skor _calculate_measurement_confidence minimum untuk berhenti lebih awal
         """
         self.pixels_per_cm_base = pixels_per_cm_base
+        self.cascade = cascade
+        self.cascade_max_side = cascade_max_side
+        self.cascade_min_confidence = cascade_min_confidence
     
-    def extract_bottle_contour(self, image: np.ndarray, yolo_bbox: list) -> Optional[dict]:
+    def extract_bottle_contour(self, image: np.ndarray, yolo_bbox: list, cheapest: bool = False) -> Optional[dict]:
         """
         Ekstrak kontur botol dalam area YOLO dengan analisis detail
+        
+        Dengan cascade aktif, segmentasi dimulai dari Otsu pada ROI diperkecil dan baru naik
+        ke kombinasi yang lebih mahal jika skor pengukuran di bawah threshold.
         Args:
             image: Gambar original
             yolo_bbox: Bounding box dari YOLO [x1, y1, x2, y2]
+            cheapest: True = berhenti di tahap cascade pertama yang menemukan kontur, berapa pun skornya
+                (degradasi saat server overload)
         Returns:
             Dict berisi data kontur dan pengukuran detail
         """
@@ -35,15 +52,57 @@ class OpenCVSizeCalculator:
                 
             gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
             
-            # Multiple preprocessing untuk deteksi kontur yang lebih akurat
+            stages = self.CASCADE_STAGES if self.cascade or cheapest else ('full',)
+            min_confidence = 0.0 if cheapest else self.cascade_min_confidence
+            best_result, best_score = None, -1.0
             
-            # 1. Gaussian blur untuk noise reduction
-            blurred = cv2.GaussianBlur(gray_roi, (5, 5), 0)
+            for stage in stages:
+                result = self._extract_stage(gray_roi, stage, (x1, y1), roi.shape)
+                if not result:
+                    continue
+                
+                score = self._calculate_measurement_confidence(result['measurements'])
+                if score > best_score:
+                    best_result, best_score = result, score
+                
+                # Early exit: pengukuran sudah cukup bagus, tahap mahal tidak perlu dijalankan
+                if score >= min_confidence:
+                    break
             
-            # 2. Multiple thresholding approaches
-            # Otsu thresholding
-            _, thresh_otsu = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            if best_result:
+                print(f"Contour segmentation: {best_result['segmentation']} (score {best_score:.2f})")
+            return best_result
             
+        except Exception as e:
+            print(f'Error extracting bottle contour: {e}')
+            return None
+    
+    def _extract_stage(self, gray_roi: np.ndarray, stage: str, offset: tuple, roi_shape: tuple) -> Optional[dict]:
+        """
+        Jalankan satu tahap segmentasi cascade
+        Args:
+            gray_roi: ROI grayscale resolusi penuh
+            stage: Nama tahap dari CASCADE_STAGES
+            offset: (x1, y1) posisi ROI di gambar original
+            roi_shape: Ukuran ROI untuk referensi
+        Returns:
+            Dict hasil _analyze_contour_measurements, atau None jika tidak ada kontur valid
+        """
+        scale = 1.0
+        if stage != 'full':
+            scale = min(1.0, self.cascade_max_side / max(gray_roi.shape[:2]))
+            if scale < 1.0:
+                gray_roi = cv2.resize(gray_roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        # 1. Gaussian blur untuk noise reduction
+        blurred = cv2.GaussianBlur(gray_roi, (5, 5), 0)
+        
+        # 2. Otsu thresholding (dipakai semua tahap)
+        _, combined = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        
+        if stage == 'otsu_canny_reduced':
+            combined = cv2.bitwise_or(combined, cv2.Canny(blurred, 50, 150))
+        elif stage == 'full':
             # Adaptive thresholding
             thresh_adaptive = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                                    cv2.THRESH_BINARY, 11, 2)
@@ -53,55 +112,58 @@ class OpenCVSizeCalculator:
             edges2 = cv2.Canny(blurred, 30, 100)
             
             # 4. Kombinasi semua metode
-            combined = cv2.bitwise_or(thresh_otsu, thresh_adaptive)
+            combined = cv2.bitwise_or(combined, thresh_adaptive)
             combined = cv2.bitwise_or(combined, edges1)
             combined = cv2.bitwise_or(combined, edges2)
+        
+        # 5. Morphological operations untuk cleanup
+        kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        kernel_open = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        
+        combined = cv2.morphologyEx(combined, cv2.MORPH_CLOSE, kernel_close)
+        combined = cv2.morphologyEx(combined, cv2.MORPH_OPEN, kernel_open)
+        
+        # 6. Cari kontur
+        contours, hierarchy = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        if not contours:
+            return None
+        
+        # 7. Filter dan pilih kontur terbaik (area minimum ikut diskalakan)
+        min_area = 500 * scale * scale
+        valid_contours = []
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            perimeter = cv2.arcLength(contour, True)
             
-            # 5. Morphological operations untuk cleanup
-            kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-            kernel_open = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-            
-            combined = cv2.morphologyEx(combined, cv2.MORPH_CLOSE, kernel_close)
-            combined = cv2.morphologyEx(combined, cv2.MORPH_OPEN, kernel_open)
-            
-            # 6. Cari kontur
-            contours, hierarchy = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            if not contours:
-                return None
+            # Filter berdasarkan area minimum
+            if area < min_area:
+                continue
             
-            # 7. Filter dan pilih kontur terbaik
-            valid_contours = []
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                perimeter = cv2.arcLength(contour, True)
-                
-                # Filter berdasarkan area minimum
-                if area < 500:
+            # Hitung circularity untuk filter noise
+            if perimeter > 0:
+                circularity = 4 * math.pi * area / (perimeter * perimeter)
+                if circularity < 0.1:  # Terlalu tidak beraturan
                     continue
-                
-                # Hitung circularity untuk filter noise
-                if perimeter > 0:
-                    circularity = 4 * math.pi * area / (perimeter * perimeter)
-                    if circularity < 0.1:  # Terlalu tidak beraturan
-                        continue
-                
-                valid_contours.append((contour, area))
-            
-            if not valid_contours:
-                return None
-            
-            # Ambil kontur terbesar yang valid
-            largest_contour = max(valid_contours, key=lambda x: x[1])[0]
-            
-            # 8. Adjust koordinat kembali ke gambar original
-            adjusted_contour = largest_contour + [x1, y1]
             
-            return self._analyze_contour_measurements(adjusted_contour, roi.shape)
-            
-        except Exception as e:
-            print(f'Error extracting bottle contour: {e}')
+            valid_contours.append((contour, area))
+        
+        if not valid_contours:
+            return None
+        
+        # Ambil kontur terbesar yang valid
+        largest_contour = max(valid_contours, key=lambda x: x[1])[0]
+        
+        # 8. Kembalikan ke resolusi penuh lalu adjust koordinat ke gambar original
+        if scale < 1.0:
+            largest_contour = np.round(largest_contour / scale).astype(np.int32)
+        adjusted_contour = largest_contour + [offset[0], offset[1]]
+        
+        result = self._analyze_contour_measurements(adjusted_contour, roi_shape)
+        if not result:
             return None
+        result['segmentation'] = stage
+        return result
     
     def _analyze_contour_measurements(self, contour: np.ndarray, roi_shape: tuple) -> dict:
         """
@@ -306,9 +368,12 @@ class OpenCVSizeCalculator:
             print(f'Error calculating confidence: {e}')
             return 0.5
     
-    def estimate_real_dimensions_from_context(self, dimensions: dict) -> dict:
+    def estimate_real_dimensions_from_context(self, dimensions: dict, pixels_per_cm: Optional[float] = None) -> dict:
         """
         Estimasi ukuran real berdasarkan konteks pengukuran yang lebih akurat
+        Args:
+            dimensions: Hasil calculate_bottle_dimensions
+            pixels_per_cm: Skala hasil kalibrasi kamera; None = tebak skala dari ukuran botol tipikal
         """
         try:
             height_pixels = dimensions['height_pixels']
@@ -319,8 +384,11 @@ class OpenCVSizeCalculator:
             
             # Scale estimation yang lebih konservatif dan realistis
             
+            if pixels_per_cm:
+                # Kamera sudah dikalibrasi: heuristik tidak dipakai
+                estimated_scale = pixels_per_cm
             # Untuk botol dengan aspect ratio tinggi (botol tegak)
-            if aspect_ratio > 2.0:  # Botol tegak
+            elif aspect_ratio > 2.0:  # Botol tegak
                 # Asumsi tinggi botol normal: 15-25cm
                 typical_height_cm = 20.0
                 estimated_scale = height_pixels / typical_height_cm
@@ -329,12 +397,13 @@ class OpenCVSizeCalculator:
                 typical_diameter_cm = 7.0
                 estimated_scale = diameter_pixels / typical_diameter_cm
             
-            # Batas scale yang masuk akal
+            # Batas scale yang masuk akal (hanya untuk tebakan)
             # Scale biasanya antara 5-50 pixels per cm
-            if estimated_scale < 5:
-                estimated_scale = 5
-            elif estimated_scale > 50:
-                estimated_scale = 50
+            if not pixels_per_cm:
+                if estimated_scale < 5:
+                    estimated_scale = 5
+                elif estimated_scale > 50:
+                    estimated_scale = 50
             
             # Konversi ke real dimensions
             real_height_cm = height_pixels / estimated_scale
@@ -373,35 +442,37 @@ class OpenCVSizeCalculator:
                 'estimated_volume_ml': round(real_volume_ml, 0),
                 'estimated_scale_ppm': round(estimated_scale, 2),
                 'measurement_confidence': round(confidence * 100, 1),
-                'scale_confidence': 'improved'
+                'scale_confidence': 'calibrated' if pixels_per_cm else 'improved'
             }
             
         except Exception as e:
             print(f'Error estimating real dimensions: {e}')
             return {}
     
-    def classify_bottle(self, dimensions: dict, known_specs: dict, tolerance: float = 25) -> dict:
+    def classify_bottle(self, dimensions: dict, known_specs: Union[BottleCatalog, dict], tolerance: float = 25) -> dict:
         """
         Klasifikasi botol berdasarkan volume yang dihitung dari pengukuran
+        Args:
+            dimensions: Hasil estimate_real_dimensions_from_context
+            known_specs: BottleCatalog (atau dict spesifikasi, diindex dulu)
+            tolerance: Toleransi volume dalam persen
         """
         try:
             estimated_volume = dimensions.get('estimated_volume_ml', 0)
             confidence_factor = dimensions.get('measurement_confidence', 0) / 100
+            catalog = BottleCatalog.coerce(known_specs)
             
-            best_match = None
-            min_difference = float('inf')
+            # Cari match terbaik berdasarkan volume (bisect pada volume terurut)
+            best_index, min_difference = catalog.match_volume(estimated_volume, tolerance)
+            best_match = catalog.names[best_index] if best_index >= 0 else None
             
-            # Cari match terbaik berdasarkan volume
-            for bottle_type, specs in known_specs.items():
-                volume_diff = abs(estimated_volume - specs['volume'])
-                volume_diff_percent = (volume_diff / specs['volume']) * 100
-                
-                if volume_diff_percent <= tolerance and volume_diff < min_difference:
-                    min_difference = volume_diff
-                    best_match = bottle_type
+            # SKU dengan bentuk (volume, tinggi, diameter) terdekat, membedakan SKU bervolume sama
+            nearest_sku = catalog.nearest_shape(
+                estimated_volume, dimensions.get('real_height_cm', 0), dimensions.get('real_diameter_cm', 0)
+            )
             
             if best_match:
-                volume_confidence = max(0, 100 - (min_difference / known_specs[best_match]['volume']) * 100)
+                volume_confidence = max(0, 100 - (min_difference / float(catalog.volumes[best_index])) * 100)
                 final_confidence = (volume_confidence * 0.7) + (confidence_factor * 100 * 0.3)
                 
                 print(f"Classification: {best_match} ({final_confidence:.1f}% confidence)")
@@ -409,14 +480,16 @@ class OpenCVSizeCalculator:
                     'classification': best_match,
                     'confidence_percent': round(final_confidence, 2),
                     'volume_match_percent': round(volume_confidence, 2),
-                    'measurement_quality': round(confidence_factor * 100, 2)
+                    'measurement_quality': round(confidence_factor * 100, 2),
+                    'nearest_sku': nearest_sku
                 }
             else:
                 print(f"No match found for {estimated_volume}mL")
                 return {
                     'classification': 'Unknown',
                     'confidence_percent': 0,
-                    'measurement_quality': round(confidence_factor * 100, 2)
+                    'measurement_quality': round(confidence_factor * 100, 2),
+                    'nearest_sku': nearest_sku
                 }
                 
         except Exception as e:
@@ -0,0 +1,133 @@
+# File: backend/hybrid-detection/src/inference/batcher.py
+# Fungsi: Micro-batching scheduler yang menggabungkan frame dari request paralel ke satu forward pass YOLO
+import asyncio
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+
+class DetectionBatcher:
+    """Class untuk mengumpulkan frame dari beberapa request lalu menjalankan deteksi secara batch"""
+
+    def __init__(self, detect_fn: Callable[[List[np.ndarray], Optional[int]], List[List[dict]]], executor=None,
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0):
+        """
+        Inisialisasi batcher
+        Args:
+            detect_fn: Fungsi deteksi batch (list gambar, imgsz -> list deteksi per gambar)
+            executor: PipelineExecutor untuk menjalankan forward pass (None = default executor loop)
+            max_batch_size: Jumlah frame maksimum dalam satu batch
+            max_wait_ms: Waktu tunggu maksimum (ms) untuk mengisi batch setelah frame pertama masuk
+        """
+        self.detect_fn = detect_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Jalankan background task pengumpul batch (dipanggil saat startup)"""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Hentikan background task dan gagalkan request yang masih menunggu"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError('Detection batcher stopped'))
+
+    @property
+    def queue_depth(self) -> int:
+        """Jumlah frame yang sedang menunggu untuk masuk batch"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def detect(self, image: np.ndarray, imgsz: Optional[int] = None) -> List[dict]:
+        """
+        Kirim satu frame ke batcher dan tunggu hasil deteksinya
+        Args:
+            image: Gambar input (OpenCV format)
+            imgsz: Ukuran input model untuk frame ini (None = default); frame hanya di-batch dengan imgsz yang sama
+        Returns:
+            List deteksi botol khusus untuk frame ini
+        """
+        if self._worker is None or self._worker.done():
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, imgsz, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[np.ndarray, Optional[int], asyncio.Future]]:
+        """Tunggu frame pertama, lalu kumpulkan frame berikutnya sampai batch penuh atau waktu habis"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Ambil dulu frame yang sudah menunggu tanpa perlu sleep
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Loop utama: kumpulkan batch, jalankan satu forward pass, bagikan hasil per request"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect_batch()
+
+            # Lewati request yang sudah dibatalkan client
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+
+            # Satu forward pass per ukuran input (biasanya hanya satu grup)
+            groups = {}
+            for image, imgsz, future in batch:
+                groups.setdefault(imgsz, []).append((image, future))
+
+            for imgsz, group in groups.items():
+                await self._run_group(loop, group, imgsz)
+
+    async def _run_group(self, loop, group: List[Tuple[np.ndarray, asyncio.Future]], imgsz: Optional[int]):
+        """Jalankan satu forward pass untuk frame dengan imgsz yang sama dan bagikan hasilnya"""
+        images = [image for image, _ in group]
+        try:
+            if self.executor is not None:
+                results = await self.executor.run(self.detect_fn, images, imgsz)
+            else:
+                results = await loop.run_in_executor(None, self.detect_fn, images, imgsz)
+        except Exception as e:
+            print(f'Error in batched YOLO detection: {e}')
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        print(f'Batched YOLO detection: {len(images)} frame(s)' + (f' at imgsz {imgsz}' if imgsz else ''))
+        for (_, future), detections in zip(group, results):
+            if not future.done():
+                future.set_result(detections)
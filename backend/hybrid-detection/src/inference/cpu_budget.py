@@ -0,0 +1,106 @@
+# File: backend/hybrid-detection/src/inference/cpu_budget.py
+# Fungsi: Menerapkan batas thread torch/OpenCV dan CPU affinity agar library tidak saling berebut core
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+
+from config.settings import settings
+
+
+def available_cores() -> List[int]:
+    """Core yang boleh dipakai proses ini"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores() -> List[int]:
+    """Satu logical CPU per core fisik (sibling hyper-threading dilewati); fallback ke semua core"""
+    cores, seen = [], set()
+    for core in available_cores():
+        siblings = Path(f'/sys/devices/system/cpu/cpu{core}/topology/thread_siblings_list')
+        try:
+            key = siblings.read_text().strip()
+        except OSError:
+            return available_cores()
+        if key not in seen:
+            seen.add(key)
+            cores.append(core)
+    return cores
+
+
+def valid_affinity(affinity) -> List[int]:
+    """Core dari affinity yang juga boleh dipakai proses ini (nilai yang bukan nomor core diabaikan)"""
+    if not isinstance(affinity, (list, tuple)):
+        return []
+    available = set(available_cores())
+    return sorted({core for core in affinity if isinstance(core, int) and core in available})
+
+
+def apply_thread_budget(torch_threads: int = 0, torch_interop_threads: int = 0, opencv_threads: int = -1,
+                        affinity: Optional[List[int]] = None) -> dict:
+    """
+    Terapkan budget thread untuk proses ini (panggil sebelum model dimuat)
+    Args:
+        torch_threads: torch.set_num_threads (0 = default torch)
+        torch_interop_threads: torch.set_num_interop_threads (0 = default, hanya bisa sekali per proses)
+        opencv_threads: cv2.setNumThreads (-1 = default OpenCV, 0 = tanpa thread internal)
+        affinity: List core untuk os.sched_setaffinity, None = tidak dipin
+    Returns:
+        Dict nilai yang benar-benar diterapkan
+    """
+    applied = {}
+
+    if affinity and hasattr(os, 'sched_setaffinity'):
+        # Affinity dari tuning.json bisa berasal dari mesin / cgroup lain: pakai hanya core yang tersedia
+        cores = valid_affinity(affinity)
+        if cores:
+            try:
+                os.sched_setaffinity(0, cores)
+                applied['affinity'] = sorted(os.sched_getaffinity(0))
+            except OSError as e:
+                print(f'Could not set CPU affinity {cores}: {e}')
+        else:
+            print(f'Ignoring CPU affinity {affinity}: none of these cores are available')
+
+    if torch_threads or torch_interop_threads:
+        # OpenMP/MKL membaca env ini saat library dimuat (untuk proses yang belum meng-import torch)
+        if torch_threads:
+            for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+                os.environ[variable] = str(torch_threads)
+        try:
+            import torch
+        except ImportError:
+            torch = None
+        if torch is not None:
+            if torch_threads:
+                torch.set_num_threads(torch_threads)
+                applied['torch_threads'] = torch.get_num_threads()
+            if torch_interop_threads:
+                try:
+                    torch.set_num_interop_threads(torch_interop_threads)
+                    applied['torch_interop_threads'] = torch_interop_threads
+                except RuntimeError as e:
+                    # Sudah ada pekerjaan paralel di proses ini
+                    print(f'Could not set torch interop threads: {e}')
+
+    if opencv_threads >= 0:
+        cv2.setNumThreads(opencv_threads)
+        applied['opencv_threads'] = cv2.getNumThreads()
+
+    return applied
+
+
+def apply_settings_budget() -> dict:
+    """Terapkan budget dari Settings (nilai default atau hasil autotune.py)"""
+    applied = apply_thread_budget(
+        torch_threads=settings.TORCH_NUM_THREADS,
+        torch_interop_threads=settings.TORCH_INTEROP_THREADS,
+        opencv_threads=settings.OPENCV_NUM_THREADS,
+        affinity=settings.CPU_AFFINITY,
+    )
+    if applied:
+        print(f'CPU thread budget applied: {applied}')
+    return applied
@@ -0,0 +1,98 @@
+# File: backend/hybrid-detection/src/inference/executor.py
+# Fungsi: Menjalankan tahapan pipeline yang blocking di thread/process pool dengan concurrency terbatas
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from monitoring import metrics, profiling
+
+
+class PipelineExecutor:
+    """Class pembungkus executor agar event loop hanya menangani I/O"""
+
+    MODES = ('thread', 'process')
+
+    def __init__(self, mode: str = 'thread', max_workers: int = 4,
+                 max_concurrency: Optional[int] = None, initializer: Optional[Callable] = None):
+        """
+        Inisialisasi executor
+        Args:
+            mode: 'thread' (berbagi model dengan proses utama) atau 'process' (model per proses)
+            max_workers: Jumlah worker di pool
+            max_concurrency: Batas task yang boleh berjalan bersamaan (default = max_workers)
+            initializer: Fungsi inisialisasi per worker process (hanya untuk mode 'process')
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown executor mode: {mode} (expected one of {self.MODES})')
+
+        self.mode = mode
+        self.max_workers = max(1, int(max_workers))
+        self.max_concurrency = max(1, int(max_concurrency or self.max_workers))
+        self.initializer = initializer
+
+        self._pool: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+    def _create_pool(self) -> Executor:
+        """Buat pool sesuai mode"""
+        if self.mode == 'process':
+            # Spawn agar worker tidak mewarisi state torch/OpenCV dari proses induk
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer,
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline')
+
+    @property
+    def in_flight(self) -> int:
+        """Jumlah task yang sedang berjalan atau menunggu slot"""
+        return self._in_flight
+
+    async def run(self, fn: Callable, *args):
+        """
+        Jalankan fungsi blocking di pool tanpa memblokir event loop
+        Args:
+            fn: Fungsi yang akan dijalankan (harus module-level untuk mode 'process')
+            *args: Argumen untuk fungsi
+        Returns:
+            Hasil dari fungsi
+        """
+        if self._pool is None:
+            self._pool = self._create_pool()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            async with self._semaphore:
+                session = profiling.current()
+                if session is not None:
+                    return await self._run_profiled(session, loop, fn, *args)
+                if self.mode == 'thread':
+                    return await loop.run_in_executor(self._pool, fn, *args)
+                # Metrics tahapan dicatat di worker process, kirim balik ke histogram proses utama
+                result, timings = await loop.run_in_executor(self._pool, metrics.call_collecting_stages, fn, *args)
+                metrics.observe_stages(timings)
+                return result
+        finally:
+            self._in_flight -= 1
+
+    async def _run_profiled(self, session, loop, fn: Callable, *args):
+        """Jalankan fn di bawah cProfile untuk request yang meminta profiling"""
+        started = time.perf_counter()
+        result, timings, stats = await loop.run_in_executor(self._pool, profiling.call_profiled, fn, *args)
+        metrics.observe_stages(timings)
+        session.add_call(getattr(fn, '__name__', repr(fn)), time.perf_counter() - started, timings, stats)
+        return result
+
+    def shutdown(self):
+        """Matikan pool dan tunggu task yang sedang berjalan"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._semaphore = None
@@ -0,0 +1,378 @@
+# File: backend/hybrid-detection/src/inference/workers.py
+# Fungsi: Pool worker process inference (dipin ke core) yang menerima frame lewat ring buffer shared memory
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import List, Optional
+
+import numpy as np
+
+from monitoring import metrics
+
+# Interval cek flag berhenti (dan pipe worker baru) di thread pembaca hasil
+_POLL_SECONDS = 1.0
+
+
+class WorkerUnavailable(RuntimeError):
+    """Tidak ada worker hidup, atau worker mati saat memproses frame (pemanggil bisa fallback ke executor)"""
+
+
+def plan_core_sets(num_workers: int, cores_per_worker: int = 0) -> List[Optional[List[int]]]:
+    """
+    Bagi core yang boleh dipakai proses ini menjadi set per worker
+    Args:
+        num_workers: Jumlah worker
+        cores_per_worker: Core per worker (0 = bagi rata semua core)
+    Returns:
+        List core per worker; None jika affinity tidak didukung OS (tanpa pinning)
+    """
+    if not hasattr(os, 'sched_getaffinity'):
+        return [None] * num_workers
+
+    available = sorted(os.sched_getaffinity(0))
+    per_worker = cores_per_worker or max(1, len(available) // num_workers)
+    return [
+        [available[(i * per_worker + j) % len(available)] for j in range(per_worker)]
+        for i in range(num_workers)
+    ]
+
+
+def _worker_main(shm_name: str, slot_bytes: int, cores: Optional[List[int]], tasks, results,
+                 warmup_iterations: int):
+    """Loop worker process: pin core, muat model sendiri, lalu proses frame dari slot shared memory"""
+    if cores:
+        os.sched_setaffinity(0, cores)
+        # Batasi thread BLAS/OpenMP/torch sesuai core milik worker, sebelum library berat di-import
+        for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            os.environ[variable] = str(len(cores))
+
+    from api import pipeline
+    from inference import cpu_budget
+
+    if cores:
+        cpu_budget.apply_thread_budget(torch_threads=len(cores), opencv_threads=len(cores))
+
+    try:
+        pipeline.init_components()
+        pipeline.warmup(warmup_iterations)
+        # Worker spawn memakai resource tracker proses API, jadi block tetap di-unlink sekali oleh proses API
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except Exception as e:
+        results.send(('failed', str(e)))
+        return
+
+    results.send(('ready', os.getpid()))
+
+    try:
+        while True:
+            try:
+                task = tasks.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+
+            task_id, slot, shape, dtype, fn_name, args = task
+            # View langsung ke slot shared memory, pixel tidak di-pickle atau disalin
+            frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_bytes)
+            try:
+                result, timings = metrics.call_collecting_stages(getattr(pipeline, fn_name), frame, *args)
+                results.send((task_id, True, result, timings))
+            except Exception as e:
+                results.send((task_id, False, str(e), []))
+            finally:
+                del frame
+    finally:
+        shm.close()
+
+
+class _Worker:
+    """State satu worker di proses API"""
+
+    def __init__(self, index: int, slots: int, slot_bytes: int, cores: Optional[List[int]]):
+        self.index = index
+        self.cores = cores
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        # Pipe per worker (bukan satu Queue bersama) agar worker yang mati tidak meninggalkan lock terkunci
+        self.tasks = None
+        self.results = None
+        self.process = None
+        self.free_slots: Optional[asyncio.Queue] = None
+        self.in_flight = 0
+        self.alive = False
+        self.pid = None
+        # Naik setiap kali worker dijalankan ulang; slot dari generasi lama tidak boleh dipakai lagi
+        self.generation = 0
+        self.restarts = 0
+
+
+class InferenceWorkerPool:
+    """Class pool worker process; setiap worker punya YOLOBottleDetector dan OpenCVSizeCalculator sendiri"""
+
+    def __init__(self, num_workers: int, cores_per_worker: int = 0, slots_per_worker: int = 4,
+                 max_frame_bytes: int = 3840 * 2160 * 3, warmup_iterations: int = 3,
+                 restart_delay_seconds: float = 1.0):
+        """
+        Args:
+            num_workers: Jumlah worker process
+            cores_per_worker: Core per worker untuk affinity (0 = bagi rata)
+            slots_per_worker: Jumlah slot ring buffer (frame in-flight maksimum) per worker
+            max_frame_bytes: Ukuran satu slot; frame lebih besar ditolak
+            warmup_iterations: Warmup inference di setiap worker sebelum ready
+            restart_delay_seconds: Jeda sebelum worker yang mati setelah ready dijalankan ulang
+        """
+        self.num_workers = max(1, int(num_workers))
+        self.cores_per_worker = cores_per_worker
+        self.slots_per_worker = max(1, int(slots_per_worker))
+        self.max_frame_bytes = int(max_frame_bytes)
+        self.warmup_iterations = warmup_iterations
+        self.restart_delay_seconds = max(0.0, float(restart_delay_seconds))
+
+        self._workers: List[_Worker] = []
+        self._stopping = False
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._context = multiprocessing.get_context('spawn')
+        # Pipe hasil yang dibaca thread pembaca; diubah saat worker dijalankan ulang
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        self._pending = {}
+        self._task_ids = itertools.count()
+        self._ready_futures = {}
+        self._restart_tasks = set()
+
+    @property
+    def in_flight(self) -> int:
+        """Jumlah frame yang sedang diproses di semua worker"""
+        return sum(worker.in_flight for worker in self._workers)
+
+    @property
+    def alive_workers(self) -> int:
+        """Jumlah worker yang siap menerima frame"""
+        return sum(1 for worker in self._workers if worker.alive)
+
+    def stats(self) -> dict:
+        """Status worker untuk /health"""
+        return {
+            'workers': [
+                {'pid': w.pid, 'alive': w.alive, 'cores': w.cores, 'in_flight': w.in_flight, 'restarts': w.restarts}
+                for w in self._workers
+            ],
+            'alive_workers': self.alive_workers,
+            'slots_per_worker': self.slots_per_worker,
+            'max_frame_bytes': self.max_frame_bytes,
+        }
+
+    async def start(self):
+        """Spawn worker, tunggu semua selesai memuat model dan warmup"""
+        self._loop = asyncio.get_running_loop()
+
+        for index, cores in enumerate(plan_core_sets(self.num_workers, self.cores_per_worker)):
+            worker = _Worker(index, self.slots_per_worker, self.max_frame_bytes, cores)
+            self._workers.append(worker)
+            self._spawn(worker)
+
+        self._reader = threading.Thread(target=self._read_results, name='inference-results', daemon=True)
+        self._reader.start()
+
+        errors = [error for error in await asyncio.gather(*self._ready_futures.values()) if error]
+        if errors:
+            raise RuntimeError(f'Inference worker failed to start: {errors[0]}')
+        print(f'{self.num_workers} inference workers ready (cores: {[w.cores for w in self._workers]})')
+
+    def _spawn(self, worker: _Worker):
+        """Jalankan process worker dengan pipe dan slot baru (block shared memory dipakai ulang)"""
+        task_reader, worker.tasks = self._context.Pipe(duplex=False)
+        worker.results, result_writer = self._context.Pipe(duplex=False)
+        worker.generation += 1
+        worker.free_slots = asyncio.Queue()
+        for slot in range(self.slots_per_worker):
+            worker.free_slots.put_nowait(slot)
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.shm.name, self.max_frame_bytes, worker.cores, task_reader, result_writer,
+                  self.warmup_iterations),
+            name=f'inference-worker-{worker.index}',
+            daemon=True,
+        )
+        self._ready_futures[worker.index] = self._loop.create_future()
+        worker.process.start()
+        # Ujung milik worker ditutup di sini agar EOF terdeteksi saat worker mati
+        task_reader.close()
+        result_writer.close()
+        with self._connections_lock:
+            self._connections[worker.results] = worker
+
+    def _read_results(self):
+        """Thread pembaca hasil dari semua worker, hasil diteruskan ke event loop"""
+        try:
+            while not self._stopping:
+                with self._connections_lock:
+                    connections = dict(self._connections)
+                if not connections:
+                    # Semua worker mati, tunggu worker yang dijalankan ulang
+                    time.sleep(_POLL_SECONDS)
+                    continue
+                for connection in wait(list(connections), timeout=_POLL_SECONDS):
+                    worker = connections[connection]
+                    try:
+                        message = connection.recv()
+                    except (EOFError, OSError):
+                        with self._connections_lock:
+                            self._connections.pop(connection, None)
+                        self._loop.call_soon_threadsafe(self._worker_exited, worker, connection)
+                        continue
+                    self._loop.call_soon_threadsafe(self._dispatch, worker, message)
+        except RuntimeError:
+            pass  # Event loop sudah ditutup
+
+    def _dispatch(self, worker: _Worker, message: tuple):
+        if message[0] in ('ready', 'failed'):
+            status, value = message
+            worker.alive = status == 'ready'
+            worker.pid = value if worker.alive else None
+            future = self._ready_futures.pop(worker.index, None)
+            if future is not None and not future.done():
+                future.set_result(None if worker.alive else value)
+            return
+
+        task_id = message[0]
+        entry = self._pending.pop(task_id, None)
+        if entry is None:
+            return
+        future, _, slot = entry
+        # Slot baru dibebaskan setelah worker selesai membaca frame (juga jika request sudah dibatalkan)
+        worker.in_flight -= 1
+        worker.free_slots.put_nowait(slot)
+        if not future.done():
+            future.set_result(message[1:])
+
+    def _worker_exited(self, worker: _Worker, connection=None):
+        """Worker berhenti (pipe EOF): gagalkan request miliknya lalu jalankan ulang worker tersebut"""
+        if connection is not None and connection is not worker.results:
+            return  # EOF dari pipe generasi lama, worker sudah dijalankan ulang
+
+        future = self._ready_futures.pop(worker.index, None)
+        if future is not None and not future.done():
+            future.set_result(f'worker {worker.index} exited before becoming ready')
+
+        was_alive, worker.alive = worker.alive, False
+        if was_alive and not self._stopping:
+            print(f'Inference worker {worker.index} exited unexpectedly, restarting')
+            # Worker yang gagal saat memuat model tidak dijalankan ulang (akan gagal lagi)
+            task = self._loop.create_task(self._restart(worker))
+            self._restart_tasks.add(task)
+            task.add_done_callback(self._restart_tasks.discard)
+
+        for task_id, (future, owner, slot) in list(self._pending.items()):
+            if owner is not worker:
+                continue
+            del self._pending[task_id]
+            # Kembalikan slot agar request yang menunggu slot ikut bangun dan gagal
+            owner.in_flight -= 1
+            owner.free_slots.put_nowait(slot)
+            if not future.done():
+                future.set_exception(WorkerUnavailable(f'Inference worker {worker.index} died'))
+
+    async def _restart(self, worker: _Worker):
+        """Tunggu process lama selesai, lalu spawn ulang worker dengan core set yang sama"""
+        await asyncio.sleep(self.restart_delay_seconds)
+        if self._stopping:
+            return
+        await asyncio.to_thread(worker.process.join, 5)
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.tasks.close()
+        worker.results.close()
+        if self._stopping:
+            return
+
+        worker.restarts += 1
+        self._spawn(worker)
+        error = await self._ready_futures[worker.index]
+        if error:
+            print(f'Inference worker {worker.index} failed to restart: {error}')
+        else:
+            print(f'Inference worker {worker.index} restarted (pid {worker.pid})')
+
+    def _pick_worker(self) -> _Worker:
+        alive = [worker for worker in self._workers if worker.alive]
+        if not alive:
+            raise WorkerUnavailable('No inference workers available')
+        # Utamakan worker dengan slot kosong terbanyak, lalu yang paling sedikit antrian
+        return max(alive, key=lambda w: (w.free_slots.qsize(), -w.in_flight))
+
+    async def run(self, fn_name: str, image: np.ndarray, *args):
+        """
+        Jalankan pipeline.<fn_name>(image, *args) di worker process
+        Args:
+            fn_name: Nama fungsi module-level di api.pipeline
+            image: Frame BGR, disalin sekali ke slot shared memory worker
+            *args: Argumen kecil tambahan (dikirim lewat pipe)
+        Returns:
+            Hasil fungsi
+        """
+        if image.nbytes > self.max_frame_bytes:
+            raise ValueError(f'Frame too large for inference worker slot ({image.nbytes} > {self.max_frame_bytes} bytes)')
+
+        worker = self._pick_worker()
+        generation = worker.generation
+        slot = await worker.free_slots.get()
+        if not worker.alive or worker.generation != generation:
+            raise WorkerUnavailable(f'Inference worker {worker.index} died')
+
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=worker.shm.buf, offset=slot * self.max_frame_bytes)
+        np.copyto(view, image)
+        del view
+
+        task_id = next(self._task_ids)
+        future = self._loop.create_future()
+        self._pending[task_id] = (future, worker, slot)
+        worker.in_flight += 1
+        try:
+            worker.tasks.send((task_id, slot, image.shape, image.dtype.str, fn_name, args))
+        except (BrokenPipeError, OSError):
+            self._worker_exited(worker)
+
+        ok, result, timings = await future
+        metrics.observe_stages(timings)
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    async def stop(self):
+        """Hentikan worker dan lepaskan shared memory"""
+        self._stopping = True
+        for task in list(self._restart_tasks):
+            task.cancel()
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                try:
+                    worker.tasks.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for worker in self._workers:
+            if worker.process is not None:
+                await asyncio.to_thread(worker.process.join, 5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            worker.tasks.close()
+            worker.shm.close()
+            worker.shm.unlink()
+
+        if self._reader is not None:
+            await asyncio.to_thread(self._reader.join, _POLL_SECONDS * 2)
+        for worker in self._workers:
+            worker.results.close()
+
+        for future, _, _ in self._pending.values():
+            if not future.done():
+                future.set_exception(WorkerUnavailable('Inference worker pool stopped'))
+        self._pending.clear()
+        self._workers = []
@@ -0,0 +1,262 @@
+# File: backend/hybrid-detection/src/monitoring/metrics.py
+# Fungsi: Metrics format Prometheus (counter, gauge, histogram) + timer per tahapan pipeline
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Bucket latency default (detik), dari decode cepat sampai inference CPU yang lambat
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Pesan error pipeline -> outcome request
+ERROR_OUTCOMES = {
+    'No bottles detected by YOLO': 'no_bottles',
+    'Could not extract bottle contour for measurement': 'contour_failure',
+    'Could not calculate bottle dimensions': 'contour_failure',
+}
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + '}'
+
+
+class _Metric:
+    """Base class metric dengan label; nilai per kombinasi label disimpan di dict"""
+
+    TYPE = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        for name, labels, value in self._samples():
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """Nilai yang hanya bertambah (mis. jumlah request per outcome)"""
+
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Nilai yang bisa naik turun; bisa juga dibaca dari callback saat scrape"""
+
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Nilai gauge diambil dari fn() setiap kali metrics di-scrape"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def _samples(self):
+        samples = super()._samples()
+        with self._lock:
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            samples.append((self.name, dict(zip(self.labelnames, key)), float(fn())))
+        return samples
+
+
+class Histogram(_Metric):
+    """Distribusi latency dengan bucket kumulatif, _sum dan _count"""
+
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        with self._lock:
+            items = [(key, [list(state[0]), state[1], state[2]]) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = {**labels, 'le': _format_value(bound)}
+                lines.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+class Registry:
+    """Kumpulan metric yang di-export oleh endpoint /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Format teks exposition Prometheus (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_LATENCY = registry.register(Histogram(
+    'bottle_pipeline_stage_seconds', 'Latency per pipeline stage', ('stage',)))
+REQUEST_LATENCY = registry.register(Histogram(
+    'bottle_request_seconds', 'End-to-end request latency per endpoint', ('endpoint',)))
+REQUESTS = registry.register(Counter(
+    'bottle_requests_total', 'Requests per endpoint and outcome', ('endpoint', 'outcome')))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    'bottle_requests_in_flight', 'Requests currently being processed', ('endpoint',)))
+QUEUE_DEPTH = registry.register(Gauge(
+    'bottle_queue_depth', 'Work waiting or running per internal queue', ('queue',)))
+MODEL_INFO = registry.register(Gauge(
+    'bottle_model_info', 'Loaded detection model (value is always 1)', ('backend', 'model_path', 'device')))
+STARTUP_SECONDS = registry.register(Gauge(
+    'bottle_startup_seconds', 'Startup duration per phase (load, warmup, ready since process start)', ('phase',)))
+
+# Jika aktif (per thread), durasi tahapan dikumpulkan untuk dikirim balik dari worker process
+_collector = threading.local()
+
+
+def record_stage(name: str, seconds: float):
+    """Catat durasi satu tahapan ke histogram, atau ke collector jika sedang di worker process"""
+    timings: Optional[list] = getattr(_collector, 'timings', None)
+    if timings is not None:
+        timings.append((name, seconds))
+    else:
+        STAGE_LATENCY.observe(seconds, stage=name)
+
+
+@contextmanager
+def stage(name: str):
+    """Context manager untuk mengukur durasi satu tahapan pipeline"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def call_collecting_stages(fn: Callable, *args):
+    """
+    Jalankan fn dan kumpulkan durasi tahapannya (dipakai di worker process, metrics ada di proses utama)
+    Returns:
+        Tuple (hasil fn, list (stage, detik))
+    """
+    _collector.timings = []
+    try:
+        result = fn(*args)
+        return result, _collector.timings
+    finally:
+        _collector.timings = None
+
+
+def observe_stages(timings: List[Tuple[str, float]]):
+    """Masukkan durasi tahapan dari worker process ke histogram proses utama"""
+    for name, seconds in timings:
+        STAGE_LATENCY.observe(seconds, stage=name)
+
+
+def outcome_for(response: dict) -> str:
+    """Outcome request dari isi response: success, no_bottles, contour_failure atau error"""
+    if 'error' not in response:
+        return 'success'
+    return ERROR_OUTCOMES.get(response['error'], 'error')
+
+
+class RequestTracker:
+    """Hitung latency, in-flight dan outcome untuk satu request"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.outcome = 'error'
+
+    def done(self, response: dict) -> dict:
+        """Tandai outcome dari response lalu kembalikan response apa adanya"""
+        self.outcome = outcome_for(response)
+        return response
+
+
+@contextmanager
+def track_request(endpoint: str):
+    """Context manager per request: in-flight gauge, latency histogram dan counter outcome"""
+    tracker = RequestTracker(endpoint)
+    started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    try:
+        yield tracker
+    finally:
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+        REQUESTS.inc(endpoint=endpoint, outcome=tracker.outcome)
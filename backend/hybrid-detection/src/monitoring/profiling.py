@@ -0,0 +1,223 @@
+# File: backend/hybrid-detection/src/monitoring/profiling.py
+# Fungsi: Profiling opt-in per request (cProfile + durasi per tahapan), disimpan di server untuk diunduh
+import asyncio
+import contextvars
+import cProfile
+import json
+import pstats
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from monitoring import metrics
+
+# File sumber yang method-nya dirangkum per class di breakdown profile
+CLASS_SOURCES = {
+    'yolo_detector.py': 'YOLOBottleDetector',
+    'backends.py': 'InferenceBackend',
+    'size_calculator.py': 'OpenCVSizeCalculator',
+    'batch_measurements.py': 'batch_measurements',
+}
+
+# Session profiling milik request yang sedang berjalan (None = request tidak diprofile)
+_current_session: contextvars.ContextVar = contextvars.ContextVar('profile_session', default=None)
+
+# Stats cProfile dari thread pembantu (pool ROI) untuk panggilan yang sedang diprofile di thread ini
+_helper_stats = threading.local()
+
+
+class _StatsHolder:
+    """Pembungkus dict stats agar bisa dimuat pstats.Stats (butuh create_stats + .stats)"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def call_profiled(fn: Callable, *args):
+    """
+    Jalankan fn di bawah cProfile (di thread / worker process yang menjalankannya)
+    Returns:
+        Tuple (hasil fn, list (stage, detik), dict stats cProfile yang bisa di-pickle)
+    """
+    profiler = cProfile.Profile()
+    _helper_stats.stats = helpers = []
+    profiler.enable()
+    try:
+        result, timings = metrics.call_collecting_stages(fn, *args)
+    finally:
+        profiler.disable()
+        _helper_stats.stats = None
+    profiler.create_stats()
+    if not helpers:
+        return result, timings, profiler.stats
+    # cProfile hanya melihat thread-nya sendiri, gabungkan stats dari thread pembantu
+    merged = pstats.Stats(_StatsHolder(profiler.stats))
+    for stats in helpers:
+        merged.add(_StatsHolder(stats))
+    return result, timings, merged.stats
+
+
+def profiled_task(fn: Callable) -> Callable:
+    """
+    Bungkus fn yang akan dijalankan di thread pool pembantu (mis. pengukuran ROI paralel):
+    jika thread pemanggil sedang di dalam call_profiled, thread pembantu juga diprofile
+    dan stats-nya ikut masuk profile request
+    Returns:
+        fn apa adanya jika tidak sedang diprofile (tanpa overhead)
+    """
+    helpers = getattr(_helper_stats, 'stats', None)
+    if helpers is None:
+        return fn
+
+    def run(*args):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            profiler.create_stats()
+            helpers.append(profiler.stats)
+
+    return run
+
+
+class ProfileSession:
+    """Data profiling satu request: panggilan executor, durasi tahapan dan stats cProfile"""
+
+    def __init__(self, endpoint: str):
+        self.id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.wall_seconds = None
+        self.calls = []
+        self.stages = []
+        self._stats = []
+
+    def add_call(self, name: str, seconds: float, timings: List[Tuple[str, float]], stats: dict):
+        """Catat satu panggilan executor yang diprofile"""
+        self.calls.append({'function': name, 'ms': round(seconds * 1000, 3)})
+        self.stages.extend(timings)
+        self._stats.append(stats)
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def merged_stats(self) -> Optional[pstats.Stats]:
+        """Gabungkan stats cProfile dari semua panggilan"""
+        if not self._stats:
+            return None
+        merged = pstats.Stats(_StatsHolder(self._stats[0]))
+        for stats in self._stats[1:]:
+            merged.add(_StatsHolder(stats))
+        return merged
+
+    def summary(self, top_functions: int = 30) -> dict:
+        """Ringkasan JSON: total per tahapan, method per class dan fungsi teratas (cumulative)"""
+        stage_totals = {}
+        for name, seconds in self.stages:
+            total = stage_totals.setdefault(name, {'count': 0, 'ms': 0.0})
+            total['count'] += 1
+            total['ms'] = round(total['ms'] + seconds * 1000, 3)
+
+        methods, top = {}, []
+        merged = self.merged_stats()
+        if merged is not None:
+            for (filename, line, function), (_, calls, total_time, cumulative, _) in merged.stats.items():
+                owner = CLASS_SOURCES.get(Path(filename).name)
+                if owner is not None:
+                    methods[f'{owner}.{function}'] = {
+                        'calls': calls,
+                        'own_ms': round(total_time * 1000, 3),
+                        'cumulative_ms': round(cumulative * 1000, 3),
+                    }
+
+            ranked = sorted(merged.stats.items(), key=lambda item: item[1][3], reverse=True)[:top_functions]
+            for (filename, line, function), (_, calls, total_time, cumulative, _) in ranked:
+                top.append({
+                    'function': f'{Path(filename).name}:{line}({function})',
+                    'calls': calls,
+                    'own_ms': round(total_time * 1000, 3),
+                    'cumulative_ms': round(cumulative * 1000, 3),
+                })
+
+        return {
+            'profile_id': self.id,
+            'endpoint': self.endpoint,
+            'started_at': self.started_at,
+            'wall_ms': round((self.wall_seconds or 0) * 1000, 3),
+            'executor_calls': self.calls,
+            'stages': stage_totals,
+            'methods': dict(sorted(methods.items(), key=lambda item: item[1]['cumulative_ms'], reverse=True)),
+            'top_functions': top,
+        }
+
+
+class ProfileStore:
+    """Penyimpanan profile di disk: <id>.json (ringkasan) dan <id>.prof (format pstats)"""
+
+    def __init__(self, directory, max_stored: int = 50, top_functions: int = 30):
+        self.directory = Path(directory)
+        self.max_stored = max(1, int(max_stored))
+        self.top_functions = top_functions
+
+    def save(self, session: ProfileSession) -> dict:
+        """Simpan profile lalu hapus profile terlama di atas batas"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        summary = session.summary(self.top_functions)
+        (self.directory / f'{session.id}.json').write_text(json.dumps(summary, indent=2))
+
+        merged = session.merged_stats()
+        if merged is not None:
+            merged.dump_stats(str(self.directory / f'{session.id}.prof'))
+
+        self._prune()
+        return summary
+
+    def _prune(self):
+        summaries = sorted(self.directory.glob('*.json'), key=lambda path: path.stat().st_mtime)
+        for path in summaries[:-self.max_stored]:
+            path.unlink(missing_ok=True)
+            path.with_suffix('.prof').unlink(missing_ok=True)
+
+    def path(self, profile_id: str, kind: str = 'json') -> Optional[Path]:
+        """Path file profile ('json' atau 'prof'), None jika tidak ada atau id tidak valid"""
+        if not profile_id.isalnum():
+            return None
+        path = self.directory / f'{profile_id}.{kind}'
+        return path if path.is_file() else None
+
+
+def current() -> Optional[ProfileSession]:
+    """Session profiling request saat ini (None untuk request biasa)"""
+    return _current_session.get()
+
+
+@asynccontextmanager
+async def profile_request(endpoint: str, store: ProfileStore, enabled: bool = True):
+    """
+    Aktifkan profiling untuk request ini; semua panggilan executor di dalam blok ikut diprofile.
+    Profile disimpan ke disk di thread terpisah agar event loop tidak terblokir
+    Yields:
+        ProfileSession, atau None jika tidak diminta (tanpa overhead)
+    """
+    if not enabled:
+        yield None
+        return
+
+    session = ProfileSession(endpoint)
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+        session.finish()
+        await asyncio.to_thread(store.save, session)
+        print(f'Profile saved: {session.id} ({session.wall_seconds * 1000:.1f} ms)')
@@ -0,0 +1,7 @@
+# File: backend/hybrid-detection/tests/conftest.py
+# Fungsi: Konfigurasi pytest; tambahkan src directory ke Python path seperti script di root project
+import sys
+from pathlib import Path
+
+src_dir = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_dir))
@@ -0,0 +1,102 @@
+# File: backend/hybrid-detection/tests/test_catalog.py
+# Fungsi: Test index katalog botol (bisect volume dan KD-tree bentuk) terhadap scan linear
+import math
+import random
+
+import numpy as np
+import pytest
+
+from image_processing.catalog import BottleCatalog, _KDTree
+
+
+def linear_match(specs: dict, estimated_volume: float, tolerance: float = 25):
+    """Referensi: scan linear seperti classify_bottle sebelum ada index"""
+    best, min_difference = -1, float('inf')
+    for row, spec in enumerate(specs.values()):
+        volume_diff = abs(estimated_volume - spec['volume'])
+        if (volume_diff / spec['volume']) * 100 <= tolerance and volume_diff < min_difference:
+            best, min_difference = row, volume_diff
+    return best, min_difference
+
+
+def random_specs(count: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    specs = {}
+    for i in range(count):
+        # Volume sengaja sering kembar untuk menguji urutan prioritas saat seri
+        volume = rng.choice([250, 330, 500, 600, 1000, 1500]) if i % 3 == 0 else rng.uniform(100, 2000)
+        specs[f'sku-{i}'] = {'volume': volume, 'height': rng.uniform(10, 35), 'diameter': rng.uniform(4, 11)}
+    return specs
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_match_volume_same_as_linear_scan(seed):
+    specs = random_specs(200, seed)
+    catalog = BottleCatalog(specs)
+    rng = random.Random(seed + 100)
+    for _ in range(500):
+        volume = rng.uniform(50, 2500)
+        assert catalog.match_volume(volume) == linear_match(specs, volume)
+
+
+def test_match_volume_tie_prefers_earlier_sku():
+    catalog = BottleCatalog({
+        'b': {'volume': 600},
+        'a': {'volume': 600},
+        'c': {'volume': 400},
+    })
+    assert catalog.match_volume(600) == (0, 0)
+    # 500 berjarak sama ke 400 dan 600: SKU yang lebih awal di katalog menang
+    assert catalog.match_volume(500) == (0, 100)
+
+
+def test_match_volume_outside_tolerance():
+    catalog = BottleCatalog({'small': {'volume': 100}})
+    assert catalog.match_volume(200, tolerance=25) == (-1, float('inf'))
+
+
+def test_match_volumes_vectorized_matches_scalar():
+    specs = random_specs(100, 3)
+    catalog = BottleCatalog(specs)
+    volumes = np.random.default_rng(3).uniform(50, 2500, 300)
+    rows, differences = catalog.match_volumes(volumes)
+    for volume, row, difference in zip(volumes, rows, differences):
+        assert (int(row), float(difference)) == catalog.match_volume(float(volume))
+
+
+def test_match_volumes_empty_catalog():
+    rows, differences = BottleCatalog({}).match_volumes(np.array([100.0, 200.0]))
+    assert rows.tolist() == [-1, -1]
+    assert np.isinf(differences).all()
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_kd_tree_nearest_same_as_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 10, (300, 3))
+    tree = _KDTree(points)
+    for query in rng.uniform(-1, 11, (200, 3)):
+        distances = np.sqrt(((points - query) ** 2).sum(axis=1))
+        row, distance = tree.nearest(query)
+        assert row == int(np.argmin(distances))
+        assert math.isclose(distance, float(distances.min()))
+
+
+def test_kd_tree_empty():
+    assert _KDTree(np.empty((0, 3))).nearest([1.0, 2.0, 3.0]) == (-1, math.inf)
+
+
+def test_nearest_shape():
+    catalog = BottleCatalog({
+        'can': {'volume': 330, 'height': 12, 'diameter': 6.6},
+        'bottle': {'volume': 330, 'height': 22, 'diameter': 5.5},
+        'volume_only': {'volume': 330},
+    })
+    assert catalog.nearest_shape(330, 21, 5.4)['name'] == 'bottle'
+    assert catalog.nearest_shape(330, 12.5, 6.5)['name'] == 'can'
+    assert catalog.nearest_shape(330, 0, 5) is None
+
+
+def test_non_positive_volume_rejected():
+    with pytest.raises(ValueError):
+        BottleCatalog({'broken': {'volume': 0}})
@@ -0,0 +1,128 @@
+# File: backend/hybrid-detection/tests/test_job_queue.py
+# Fungsi: Test antrian job SQLite (urutan claim, job terputus, purge) dan InteractiveGate
+import asyncio
+import time
+
+import pytest
+
+from api.job_queue import InteractiveGate, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(tmp_path / 'jobs.sqlite3', max_attempts=2)
+    yield job_store
+    job_store.close()
+
+
+def test_claim_interactive_before_bulk_then_fifo(store):
+    first_bulk = store.submit(b'a', {'kind': 'bytes'}, 'bulk')
+    second_bulk = store.submit(b'b', {'kind': 'bytes'}, 'bulk')
+    interactive = store.submit(b'c', {'kind': 'bytes'}, 'interactive')
+
+    claimed = [store.claim() for _ in range(3)]
+    assert [job['job_id'] for job in claimed] == [interactive, first_bulk, second_bulk]
+    assert claimed[0]['payload'] == b'c'
+    assert claimed[0]['params'] == {'kind': 'bytes'}
+    assert all(job['state'] == 'running' and job['attempts'] == 1 for job in claimed)
+    assert store.claim() is None
+
+
+def test_position_counts_jobs_claimed_first(store):
+    bulk = store.submit(b'a', {}, 'bulk')
+    store.submit(b'b', {}, 'bulk')
+    interactive = store.submit(b'c', {}, 'interactive')
+    assert store.get(interactive)['position'] == 0
+    assert store.get(bulk)['position'] == 1
+    assert store.counts()['queued'] == {'bulk': 2, 'interactive': 1}
+
+
+def test_complete_and_fail_drop_payload(store):
+    done = store.submit(b'a', {}, 'bulk')
+    failed = store.submit(b'b', {}, 'bulk')
+    store.claim()
+    store.claim()
+    store.complete(done, {'classification': '600ml'})
+    store.fail(failed, 'No bottles detected by YOLO')
+
+    assert store.get(done)['result'] == {'classification': '600ml'}
+    assert store.get(failed)['error'] == 'No bottles detected by YOLO'
+    assert store.counts()['states'] == {'done': 1, 'failed': 1}
+    assert store.claim() is None
+
+
+def test_interrupted_jobs_requeued_until_max_attempts(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    store = JobStore(path, max_attempts=2)
+    job_id = store.submit(b'a', {}, 'bulk')
+    store.claim()
+    store.close()
+
+    # Server restart saat job running: job kembali ke antrian
+    store = JobStore(path, max_attempts=2)
+    assert store.requeue_interrupted() == 1
+    job = store.claim()
+    assert job['job_id'] == job_id and job['attempts'] == 2
+    store.close()
+
+    # Terputus lagi setelah max_attempts: job digagalkan, tidak diulang terus
+    store = JobStore(path, max_attempts=2)
+    assert store.requeue_interrupted() == 0
+    assert store.get(job_id)['state'] == 'failed'
+    assert store.claim() is None
+    store.close()
+
+
+def test_purge_removes_only_old_finished_jobs(store):
+    finished = store.submit(b'a', {}, 'bulk')
+    queued = store.submit(b'b', {}, 'bulk')
+    store.claim()
+    store.complete(finished, {})
+    assert store.purge(retention_seconds=3600) == 0
+    time.sleep(0.01)
+    assert store.purge(retention_seconds=0) == 1
+    assert store.get(finished) is None
+    assert store.get(queued)['state'] == 'queued'
+
+
+def test_set_stage_only_for_running_jobs(store):
+    job_id = store.submit(b'a', {}, 'bulk')
+    store.set_stage(job_id, 'detection')
+    assert store.get(job_id)['stage'] is None
+    store.claim()
+    store.set_stage(job_id, 'detection')
+    assert store.get(job_id)['stage'] == 'detection'
+
+
+def test_interactive_gate_bulk_waits_until_idle():
+    async def scenario():
+        gate = InteractiveGate()
+        assert await gate.wait_idle(1) is False
+
+        async def interactive_request():
+            with gate.track():
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(interactive_request())
+        await asyncio.sleep(0)
+        assert gate.active == 1
+        started = time.monotonic()
+        assert await gate.wait_idle(5) is True
+        assert gate.active == 0
+        assert time.monotonic() - started < 1
+        await task
+
+    asyncio.run(scenario())
+
+
+def test_interactive_gate_wait_is_bounded():
+    async def scenario():
+        gate = InteractiveGate()
+        with gate.track():
+            started = time.monotonic()
+            # Job bulk tidak kelaparan: berhenti menunggu setelah max_wait_seconds
+            assert await gate.wait_idle(0.05) is True
+            assert time.monotonic() - started < 1
+            assert gate.active == 1
+
+    asyncio.run(scenario())
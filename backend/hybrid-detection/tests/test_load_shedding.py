@@ -0,0 +1,87 @@
+# File: backend/hybrid-detection/tests/test_load_shedding.py
+# Fungsi: Test admission control LoadShedder: kenaikan level degradasi, 429/503 dan tiket streaming
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from api.load_shedding import (LEVEL_CHEAP_CONTOUR, LEVEL_FULL, LEVEL_NO_OVERLAY, LEVEL_SMALL_IMGSZ,
+                               LoadShedder, Overloaded)
+
+
+def admit_many(shedder: LoadShedder, stack: ExitStack, count: int, **kwargs) -> list:
+    """Terima `count` request yang tetap pending sampai stack ditutup"""
+    return [stack.enter_context(shedder.admit(**kwargs)).level for _ in range(count)]
+
+
+def test_levels_rise_with_queue_depth_then_queue_full():
+    shedder = LoadShedder(max_pending=8, concurrency=8, level_thresholds=(0.5, 0.75, 0.9))
+    with ExitStack() as stack:
+        levels = admit_many(shedder, stack, 8)
+        assert levels == [LEVEL_FULL] * 4 + [LEVEL_SMALL_IMGSZ] * 2 + [LEVEL_CHEAP_CONTOUR] * 2
+        with pytest.raises(Overloaded) as error:
+            with shedder.admit():
+                pass
+        assert error.value.status_code == 429
+        assert error.value.retry_after >= 1
+    assert shedder.pending == 0
+    assert shedder.rejected['queue_full'] == 1
+    assert shedder.stats()['current_level'] == LEVEL_FULL
+
+
+def test_last_threshold_reaches_no_overlay():
+    shedder = LoadShedder(max_pending=10, concurrency=10, level_thresholds=(0.5, 0.75, 0.9))
+    with ExitStack() as stack:
+        assert admit_many(shedder, stack, 10)[-1] == LEVEL_NO_OVERLAY
+
+
+def test_deadline_rejects_before_work_and_degrades_tight_budget():
+    shedder = LoadShedder(max_pending=32, concurrency=1, default_deadline_ms=100)
+    shedder.service_seconds = 0.04
+    with ExitStack() as stack:
+        # Request pertama langsung jalan; request kedua menunggu 40 ms, perkiraan latency 80 ms
+        assert admit_many(shedder, stack, 2) == [LEVEL_FULL, LEVEL_FULL]
+        # Request ketiga: tunggu 80 ms < 100 ms tapi latency 120 ms > budget, jadi level tertinggi
+        assert admit_many(shedder, stack, 1) == [LEVEL_NO_OVERLAY]
+        # Request keempat: tunggu 120 ms >= budget, ditolak sebelum pekerjaan dimulai
+        with pytest.raises(Overloaded) as error:
+            with shedder.admit():
+                pass
+        assert error.value.status_code == 503
+        # Deadline client yang lebih longgar masih diterima
+        assert admit_many(shedder, stack, 1, deadline_ms=1000) == [LEVEL_FULL]
+    assert shedder.rejected['deadline'] == 1
+
+
+def test_expired_ticket_raises_and_is_counted():
+    shedder = LoadShedder(max_pending=4, concurrency=1, default_deadline_ms=1)
+    with pytest.raises(Overloaded) as error:
+        with shedder.admit() as ticket:
+            time.sleep(0.01)
+            ticket.check('detection')
+    assert error.value.status_code == 503
+    assert shedder.rejected['expired'] == 1
+    assert shedder.pending == 0
+
+
+def test_stream_ticket_degraded_but_never_rejected():
+    shedder = LoadShedder(max_pending=2, concurrency=1, default_deadline_ms=1)
+    with ExitStack() as stack:
+        levels = admit_many(shedder, stack, 4, shed=False)
+        assert levels[-1] > LEVEL_FULL
+        ticket = stack.enter_context(shedder.admit(shed=False))
+        time.sleep(0.01)
+        ticket.check('measurement')
+    assert shedder.rejected == {'queue_full': 0, 'deadline': 0, 'expired': 0}
+
+
+def test_service_time_is_smoothed():
+    shedder = LoadShedder(max_pending=4, concurrency=1, smoothing=0.5)
+    with shedder.admit():
+        time.sleep(0.02)
+    first = shedder.service_seconds
+    assert first >= 0.02
+    with shedder.admit():
+        pass
+    assert 0 < shedder.service_seconds < first
+    assert shedder.retry_after() >= shedder.min_retry_after
@@ -0,0 +1,36 @@
+# File: backend/hybrid-detection/tests/test_result_cache.py
+# Fungsi: Test ResultCache: hit hash konten, near-duplicate per namespace dan key kualitas penuh
+import asyncio
+
+from api.result_cache import ResultCache, content_key
+
+
+def test_near_duplicate_namespace_with_colon():
+    cache = ResultCache(perceptual=True, perceptual_distance=2)
+    # camera_id dari client boleh berisi ':'
+    namespace = 'upload-none-0-1-cal-line1:cam2-1700000000.0'
+    cache.put(content_key(namespace, b'frame'), {'v': 1}, phash=0b1010)
+    assert cache.find_similar(namespace, 0b1011) == {'v': 1}
+    assert cache.find_similar('upload-none-0-1', 0b1011) is None
+
+
+def test_error_response_not_cached_and_preferred_key_hit():
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return ({'error': 'No bottles detected by YOLO'} if len(calls) == 1 else {'v': 'deg'}), None
+
+    async def scenario():
+        key = content_key('ns-deg1', b'x')
+        assert 'error' in await cache.get_or_compute(key, compute)
+        assert await cache.get_or_compute(key, compute) == {'v': 'deg'}
+        # Hasil kualitas penuh frame yang sama dipakai lebih dulu
+        cache.put(content_key('ns', b'y'), {'v': 'full'})
+        assert await cache.get_or_compute(content_key('ns-deg1', b'y'), compute,
+                                          [content_key('ns', b'y')]) == {'v': 'full'}
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,41 @@
+# File: backend/hybrid-detection/tests/test_settings.py
+# Fungsi: Test validasi hasil autotune (tuning.json) yang dibaca Settings saat startup
+import json
+
+import pytest
+
+from config.settings import Settings
+
+
+def load(tmp_path, values: dict) -> dict:
+    path = tmp_path / 'tuning.json'
+    path.write_text(json.dumps({'settings': values}))
+    return Settings().load_tuning(path)
+
+
+def test_autotune_values_applied(tmp_path):
+    values = {'TORCH_NUM_THREADS': 2, 'OPENCV_NUM_THREADS': -1, 'EXECUTOR_MAX_WORKERS': 3,
+              'EXECUTOR_MAX_CONCURRENCY': 3, 'CPU_AFFINITY': [0, 1]}
+    assert load(tmp_path, values) == values
+
+
+@pytest.mark.parametrize('name, value', [
+    ('TORCH_NUM_THREADS', -2),
+    ('TORCH_NUM_THREADS', 'x'),
+    ('OPENCV_NUM_THREADS', -5),
+    ('EXECUTOR_MAX_WORKERS', 0),
+    ('EXECUTOR_MAX_WORKERS', 2.5),
+    ('CPU_AFFINITY', [0, -1]),
+    ('CPU_AFFINITY', 'all'),
+    # Setting dengan default None selain CPU_AFFINITY tidak bisa di-tune
+    ('BOTTLE_CATALOG_PATH', [1]),
+    ('INFERENCE_ROI', [0, 0, 1, 1]),
+])
+def test_invalid_values_ignored(tmp_path, name, value):
+    assert load(tmp_path, {name: value}) == {}
+
+
+def test_corrupt_file_ignored(tmp_path):
+    path = tmp_path / 'tuning.json'
+    path.write_text('{not json')
+    assert Settings().load_tuning(path) == {}
@@ -0,0 +1,106 @@
+# File: backend/hybrid-detection/tests/test_workers.py
+# Fungsi: Test ring buffer shared memory InferenceWorkerPool dengan worker tiruan (tanpa model YOLO)
+import asyncio
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from inference import workers
+
+
+def fake_worker_main(shm_name, slot_bytes, cores, tasks, results, warmup_iterations):
+    """Pengganti _worker_main: baca frame dari slot shared memory; fn 'die' mematikan process"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    results.send(('ready', os.getpid()))
+    try:
+        while True:
+            try:
+                task = tasks.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            task_id, slot, shape, dtype, fn_name, args = task
+            if fn_name == 'die':
+                os._exit(1)
+            frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_bytes)
+            results.send((task_id, True, {'sum': int(frame.sum()), 'slot': slot, 'args': args}, []))
+            del frame
+    finally:
+        shm.close()
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(workers, '_worker_main', fake_worker_main)
+    pools = []
+
+    async def make(**kwargs):
+        kwargs.setdefault('max_frame_bytes', 64 * 64 * 3)
+        pool = workers.InferenceWorkerPool(1, **kwargs)
+        pools.append(pool)
+        await pool.start()
+        return pool
+
+    yield make
+    for pool in pools:
+        if pool._workers:
+            asyncio.run(pool.stop())
+
+
+def test_plan_core_sets_covers_requested_workers():
+    core_sets = workers.plan_core_sets(3, cores_per_worker=1)
+    assert len(core_sets) == 3
+    if core_sets[0] is not None:
+        available = os.sched_getaffinity(0)
+        assert all(len(cores) == 1 and set(cores) <= available for cores in core_sets)
+
+
+def test_frames_round_trip_through_ring(make_pool):
+    async def scenario():
+        pool = await make_pool(slots_per_worker=2)
+        frames = [np.full((32, 32, 3), value, dtype=np.uint8) for value in range(1, 9)]
+        # Lebih banyak frame dari jumlah slot: request menunggu slot kosong, semua tetap selesai benar
+        results = await asyncio.gather(*(pool.run('analyze_frame', frame, 'none') for frame in frames))
+        assert [result['sum'] for result in results] == [int(frame.sum()) for frame in frames]
+        assert {result['slot'] for result in results} <= {0, 1}
+        assert results[0]['args'] == ('none',)
+        assert pool.in_flight == 0
+        assert pool._workers[0].free_slots.qsize() == 2
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_frame_larger_than_slot_rejected(make_pool):
+    async def scenario():
+        pool = await make_pool(max_frame_bytes=16)
+        with pytest.raises(ValueError):
+            await pool.run('analyze_frame', np.zeros((8, 8, 3), dtype=np.uint8))
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_dead_worker_fails_request_and_restarts(make_pool):
+    async def scenario():
+        pool = await make_pool(restart_delay_seconds=0.1)
+        frame = np.ones((4, 4, 3), dtype=np.uint8)
+        with pytest.raises(workers.WorkerUnavailable):
+            await pool.run('die', frame)
+        assert pool.alive_workers == 0
+        with pytest.raises(workers.WorkerUnavailable):
+            await pool.run('analyze_frame', frame)
+
+        for _ in range(100):
+            if pool.alive_workers:
+                break
+            await asyncio.sleep(0.1)
+        assert pool.alive_workers == 1
+        assert pool.stats()['workers'][0]['restarts'] == 1
+        assert (await pool.run('analyze_frame', frame))['sum'] == 48
+        await pool.stop()
+
+    asyncio.run(scenario())